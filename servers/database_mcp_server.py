@@ -5,6 +5,7 @@ Handles database queries, searches, and data operations
 """
 
 import json
+import os
 import sys
 import argparse
 import sqlite3
@@ -682,6 +683,13 @@ debug_print("Tools registered: search_database, update_engine_attribute, verify_
 # FastAPI Wrapper
 # ================================
 
+# Tool functions by name, for the plain HTTP /tools/call endpoint
+TOOL_HANDLERS = {
+    "search_database": search_database,
+    "update_engine_attribute": update_engine_attribute,
+    "verify_claim_exists": verify_claim_exists
+}
+
 def create_fastapi_app(mcp_server_instance) -> FastAPI:
     """Create FastAPI wrapper for the MCP server"""
     
@@ -691,13 +699,15 @@ def create_fastapi_app(mcp_server_instance) -> FastAPI:
         version="1.0.0"
     )
     
-    # CORS
+    # CORS - only the dashboard origin needs browser access; MCP clients are
+    # server-side. /tools/call includes update_engine_attribute, so other web
+    # pages must not be able to send JSON POSTs to it.
     app.add_middleware(
         CORSMiddleware,
-        allow_origins=["*"],
-        allow_credentials=True,
-        allow_methods=["*"],
-        allow_headers=["*"],
+        allow_origins=[os.getenv("DASH_ORIGIN", "http://localhost:8501")],
+        allow_credentials=False,
+        allow_methods=["GET", "POST"],
+        allow_headers=["content-type"],
     )
 
     # SSE transport
@@ -719,6 +729,32 @@ def create_fastapi_app(mcp_server_instance) -> FastAPI:
             )
         return Response()
     
+    # Plain HTTP tool calls: request/response tools don't need an SSE
+    # session or JSON-RPC framing (same shape as the research server's endpoint)
+    @app.post("/tools/call")
+    async def call_tool_direct(request: dict):
+        """Direct tool call endpoint"""
+        tool_name = request.get("name")
+        handler = TOOL_HANDLERS.get(tool_name)
+        if handler is None:
+            return {
+                "success": False,
+                "error": f"Unknown tool: {tool_name}",
+                "available_tools": list(TOOL_HANDLERS)
+            }
+        
+        try:
+            result = await handler(**request.get("arguments", {}))
+        except Exception as e:
+            debug_print(f"Error in tool call {tool_name}: {e}")
+            return {
+                "success": False,
+                "error": f"Tool call failed: {str(e)}"
+            }
+        
+        # Tools already return JSON text
+        return Response(content=result, media_type="application/json")
+    
     @app.get("/")
     async def database_dashboard():
         """Database dashboard"""
@@ -1031,6 +1067,7 @@ if __name__ == "__main__":
     debug_print("Available endpoints:")
     debug_print(f"  - Dashboard: http://{args.host}:{args.port}/")
     debug_print(f"  - SSE: http://{args.host}:{args.port}/sse")
+    debug_print(f"  - Tool calls: http://{args.host}:{args.port}/tools/call")
     debug_print(f"  - Schema: http://{args.host}:{args.port}/schema")
     debug_print(f"  - Health: http://{args.host}:{args.port}/health")
     
@@ -8,6 +8,8 @@ No fallbacks or dummy responses - production ready
 import asyncio
 import json
 import logging
+import uuid
+from collections import OrderedDict
 from typing import Any, Dict, List, Optional
 from fastapi import FastAPI, HTTPException
 from fastapi.responses import StreamingResponse
@@ -20,6 +22,25 @@ from enhanced_rag_system import EnhancedMultiHopRAG
 app = FastAPI(title="Research Paper MCP Server", version="1.0.0")
 rag_system = None
 
+# Callers that pass allow_refs get large answer / reasoning payloads as
+# /results/{id} references instead of inline; the most recent results are
+# kept in memory for them to fetch
+LARGE_PAYLOAD_BYTES = 32 * 1024
+RESULT_REF_LIMIT = 256
+result_refs: "OrderedDict[str, Any]" = OrderedDict()
+
+# Answers are LLM-generated and drift as the knowledge graph changes, so
+# clients that cache tool results should keep them only briefly
+LLM_RESULT_META = {"cache_hint": {"ttl": 300}}
+
+def store_result_ref(value: Any) -> str:
+    """Keep a payload for later retrieval and return its relative URL"""
+    ref_id = uuid.uuid4().hex
+    result_refs[ref_id] = value
+    if len(result_refs) > RESULT_REF_LIMIT:
+        result_refs.popitem(last=False)
+    return f"/results/{ref_id}"
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize the RAG system on startup"""
@@ -65,6 +86,8 @@ async def call_tool_direct(request: dict):
         # Route to appropriate tool handler
         if tool_name == "search_research_papers":
             result = await handle_search_research_papers(arguments)
+        elif tool_name == "search_research_papers_batch":
+            result = await handle_search_research_papers_batch(arguments)
         elif tool_name == "analyze_research_topic":
             result = await handle_analyze_research_topic(arguments)
         elif tool_name == "find_paper_relationships":
@@ -73,7 +96,7 @@ async def call_tool_direct(request: dict):
             return {
                 "success": False,
                 "error": f"Unknown tool: {tool_name}",
-                "available_tools": ["search_research_papers", "analyze_research_topic", "find_paper_relationships"]
+                "available_tools": ["search_research_papers", "search_research_papers_batch", "analyze_research_topic", "find_paper_relationships"]
             }
         
         return result
@@ -92,6 +115,11 @@ async def handle_search_research_papers(arguments: Dict[str, Any]) -> Dict[str,
     query = arguments.get("query", "")
     max_results = arguments.get("max_results", 10)
     include_reasoning = arguments.get("include_reasoning", True)
+    fields = arguments.get("fields")  # optional projection of top-level keys
+    allow_refs = arguments.get("allow_refs", False)
+    
+    if fields:
+        include_reasoning = include_reasoning and "reasoning_details" in fields
     
     if not query:
         return {
@@ -107,11 +135,12 @@ async def handle_search_research_papers(arguments: Dict[str, Any]) -> Dict[str,
         }
     
     try:
-        # Use your actual RAG system
-        result = rag_system.query(query)
+        # Use your actual RAG system; query() is blocking, so run it off the event loop
+        result = await asyncio.to_thread(rag_system.query, query)
         
         response = {
             "success": True,
+            "_meta": LLM_RESULT_META,
             "query": query,
             "answer": result["answer"],
             "summary": {
@@ -129,6 +158,16 @@ async def handle_search_research_papers(arguments: Dict[str, Any]) -> Dict[str,
             }
         
         logging.info(f"✅ Research search completed: {len(result['entities_used'])} entities, {result['reasoning_paths_count']} paths")
+        
+        if fields:
+            response = {key: value for key, value in response.items() if key in ("success", "_meta") or key in fields}
+        
+        if allow_refs:
+            if len(response.get("answer", "")) > LARGE_PAYLOAD_BYTES:
+                response["answer_url"] = store_result_ref(response.pop("answer"))
+            if "reasoning_details" in response and len(json.dumps(response["reasoning_details"])) > LARGE_PAYLOAD_BYTES:
+                response["reasoning_url"] = store_result_ref(response.pop("reasoning_details"))
+        
         return response
         
     except Exception as e:
@@ -138,6 +177,35 @@ async def handle_search_research_papers(arguments: Dict[str, Any]) -> Dict[str,
             "error": f"Search failed: {str(e)}"
         }
 
+async def handle_search_research_papers_batch(arguments: Dict[str, Any]) -> Dict[str, Any]:
+    """Search research papers for several queries in one call"""
+    
+    queries = arguments.get("queries", [])
+    
+    if not queries:
+        return {
+            "success": False,
+            "error": "Queries parameter is required"
+        }
+    
+    # Each query runs in a worker thread, so the batch takes about as long as its slowest query
+    results = await asyncio.gather(*(
+        handle_search_research_papers({
+            "query": query,
+            "max_results": arguments.get("max_results", 10),
+            "include_reasoning": arguments.get("include_reasoning", True),
+            "fields": arguments.get("fields"),
+            "allow_refs": arguments.get("allow_refs", False)
+        })
+        for query in queries
+    ))
+    
+    logging.info(f"✅ Batched research search completed: {len(results)} queries")
+    return {
+        "success": True,
+        "results": results
+    }
+
 async def handle_analyze_research_topic(arguments: Dict[str, Any]) -> Dict[str, Any]:
     """Analyze research topic using your real RAG system"""
     
@@ -171,6 +239,7 @@ async def handle_analyze_research_topic(arguments: Dict[str, Any]) -> Dict[str,
         
         return {
             "success": True,
+            "_meta": LLM_RESULT_META,
             "topic": topic,
             "analysis_type": analysis_type,
             "analysis": result["answer"],
@@ -233,6 +302,7 @@ async def handle_find_paper_relationships(arguments: Dict[str, Any]) -> Dict[str
         
         return {
             "success": True,
+            "_meta": LLM_RESULT_META,
             "concept1": concept1,
             "concept2": concept2,
             "max_hops": max_hops,
@@ -251,6 +321,14 @@ async def handle_find_paper_relationships(arguments: Dict[str, Any]) -> Dict[str
             "error": f"Relationship search failed: {str(e)}"
         }
 
+# Large search payloads handed out by reference
+@app.get("/results/{ref_id}")
+async def get_result_ref(ref_id: str):
+    """Fetch a payload previously returned as answer_url / reasoning_url"""
+    if ref_id not in result_refs:
+        raise HTTPException(status_code=404, detail="Result expired or not found")
+    return result_refs[ref_id]
+
 # List available tools (matching other MCP servers)
 @app.get("/tools/list")
 async def list_tools():
@@ -263,7 +341,20 @@ async def list_tools():
                 "parameters": {
                     "query": "Research question or topic",
                     "max_results": "Maximum results (default: 10)",
-                    "include_reasoning": "Include reasoning details (default: true)"
+                    "include_reasoning": "Include reasoning details (default: true)",
+                    "fields": "Optional list of top-level keys to return, e.g. [\"summary\"]",
+                    "allow_refs": "Return answers/reasoning over 32 KB as answer_url/reasoning_url (default: false)"
+                }
+            },
+            {
+                "name": "search_research_papers_batch",
+                "description": "Run search_research_papers for several queries in one call",
+                "parameters": {
+                    "queries": "List of research questions or topics",
+                    "max_results": "Maximum results per query (default: 10)",
+                    "include_reasoning": "Include reasoning details (default: true)",
+                    "fields": "Optional list of top-level keys to return per query",
+                    "allow_refs": "Return large payloads by reference (default: false)"
                 }
             },
             {
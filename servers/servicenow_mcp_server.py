@@ -5,6 +5,7 @@ Just creates tickets - keep it simple!
 """
 
 import json
+import os
 import sys
 import argparse
 from typing import Optional
@@ -16,10 +17,25 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import Response
 
+try:
+    import orjson
+
+    def serialize_ticket(ticket_data) -> bytes:
+        """Serialize a ticket dict to compact JSON bytes"""
+        return orjson.dumps(ticket_data)
+except ImportError:
+    def serialize_ticket(ticket_data) -> bytes:
+        """Serialize a ticket dict to compact JSON bytes"""
+        return json.dumps(ticket_data, separators=(",", ":")).encode("utf-8")
+
 # MCP imports
 from mcp.server.fastmcp import FastMCP
 from mcp.server.sse import SseServerTransport
 
+# Per-request tracing is opt-in (DEBUG=1) so tool calls don't format and
+# write log lines to stderr under load; startup messages always print.
+DEBUG = os.getenv("DEBUG") == "1"
+
 def debug_print(message):
     """Debug print to stderr"""
     print(f"[TICKET-SERVER] {message}", file=sys.stderr, flush=True)
@@ -31,11 +47,36 @@ debug_print("Starting Simple ServiceNow Ticket MCP Server...")
 # ================================
 
 # Store tickets in memory (replace with real database in production)
+# The *_json maps hold each ticket pre-serialized at creation time so the
+# read endpoints can splice bytes together instead of re-encoding dicts.
 TICKET_STORAGE = {
     "incidents": {},
-    "service_requests": {}
+    "service_requests": {},
+    "incidents_json": {},
+    "service_requests_json": {}
+}
+
+# Priority lookups shared by both ticket creators
+PRIORITY_MAP = {"critical": "1", "high": "2", "medium": "3", "low": "4"}
+
+SLA_RESPONSE = {
+    "critical": "30 minutes",
+    "high": "4 hours",
+    "medium": "24 hours",
+    "low": "72 hours"
 }
 
+ESTIMATED_COMPLETION = {
+    "critical": "4 hours",
+    "high": "24 hours",
+    "medium": "3 days",
+    "low": "5 days"
+}
+
+def json_array(cached: dict) -> bytes:
+    """Join pre-serialized tickets into a JSON array"""
+    return b"[" + b",".join(cached.values()) + b"]"
+
 # ================================
 # MCP Server Setup
 # ================================
@@ -66,40 +107,39 @@ async def create_incident_ticket(
         JSON string with ticket details
     """
     
-    debug_print(f"Creating incident ticket: {title}")
+    if DEBUG:
+        debug_print(f"Creating incident ticket: {title}")
     
     # Generate fake ticket number
     ticket_number = f"INC{hash(title) % 1000000:06d}"
     
-    # Map priority to ServiceNow format
-    priority_map = {"critical": "1", "high": "2", "medium": "3", "low": "4"}
+    # Normalize once and reuse for every lookup
+    p = sys.intern(priority.lower())
+    u = sys.intern(urgency.lower())
     
     # Simulate ticket creation
     ticket_data = {
         "ticket_number": ticket_number,
         "short_description": title,
         "description": description,
-        "priority": priority_map.get(priority.lower(), "3"),
-        "urgency": priority_map.get(urgency.lower(), "3"),
+        "priority": PRIORITY_MAP.get(p, "3"),
+        "urgency": PRIORITY_MAP.get(u, "3"),
         "assignment_group": assignment_group,
         "caller_id": caller_id,
         "state": "New",
         "created_on": datetime.now().isoformat(),
         "sys_id": str(uuid.uuid4()),
         "status": "created",
-        "sla_response_time": {
-            "critical": "30 minutes",
-            "high": "4 hours", 
-            "medium": "24 hours",
-            "low": "72 hours"
-        }.get(priority.lower(), "24 hours")
+        "sla_response_time": SLA_RESPONSE.get(p, "24 hours")
     }
     
     # Store ticket in memory
     TICKET_STORAGE["incidents"][ticket_number] = ticket_data
+    TICKET_STORAGE["incidents_json"][ticket_number] = serialize_ticket(ticket_data)
     
-    debug_print(f"Ticket created: {ticket_number}")
-    debug_print(f"Total incidents stored: {len(TICKET_STORAGE['incidents'])}")
+    if DEBUG:
+        debug_print(f"Ticket created: {ticket_number}")
+        debug_print(f"Total incidents stored: {len(TICKET_STORAGE['incidents'])}")
     
     return json.dumps({
         "success": True,
@@ -132,19 +172,20 @@ async def create_service_request(
         JSON string with service request details
     """
     
-    debug_print(f"Creating service request: {title}")
+    if DEBUG:
+        debug_print(f"Creating service request: {title}")
     
     # Generate fake request number
     request_number = f"REQ{hash(title) % 1000000:06d}"
     
-    priority_map = {"critical": "1", "high": "2", "medium": "3", "low": "4"}
+    p = sys.intern(priority.lower())
     
     # Simulate service request creation
     request_data = {
         "request_number": request_number,
         "short_description": title,
         "description": description,
-        "priority": priority_map.get(priority.lower(), "3"),
+        "priority": PRIORITY_MAP.get(p, "3"),
         "assignment_group": assignment_group,
         "requested_by": caller_id,
         "category": category,
@@ -152,19 +193,16 @@ async def create_service_request(
         "created_on": datetime.now().isoformat(),
         "sys_id": str(uuid.uuid4()),
         "status": "created",
-        "estimated_completion": {
-            "critical": "4 hours",
-            "high": "24 hours",
-            "medium": "3 days", 
-            "low": "5 days"
-        }.get(priority.lower(), "3 days")
+        "estimated_completion": ESTIMATED_COMPLETION.get(p, "3 days")
     }
     
     # Store service request in memory
     TICKET_STORAGE["service_requests"][request_number] = request_data
+    TICKET_STORAGE["service_requests_json"][request_number] = serialize_ticket(request_data)
     
-    debug_print(f"Service request created: {request_number}")
-    debug_print(f"Total service requests stored: {len(TICKET_STORAGE['service_requests'])}")
+    if DEBUG:
+        debug_print(f"Service request created: {request_number}")
+        debug_print(f"Total service requests stored: {len(TICKET_STORAGE['service_requests'])}")
     
     return json.dumps({
         "success": True,
@@ -189,7 +227,8 @@ async def get_ticket_status(
         JSON string with ticket status
     """
     
-    debug_print(f"Getting status for ticket: {ticket_number}")
+    if DEBUG:
+        debug_print(f"Getting status for ticket: {ticket_number}")
     
     # Simulate ticket lookup
     if ticket_number.startswith("INC"):
@@ -258,6 +297,13 @@ debug_print("Tools registered: create_incident_ticket, create_service_request, g
 # FastAPI Wrapper
 # ================================
 
+# Tool functions by name, for the plain HTTP /tools/call endpoint
+TOOL_HANDLERS = {
+    "create_incident_ticket": create_incident_ticket,
+    "create_service_request": create_service_request,
+    "get_ticket_status": get_ticket_status
+}
+
 def create_fastapi_app(mcp_server_instance) -> FastAPI:
     """Create FastAPI wrapper for the MCP server"""
     
@@ -267,13 +313,13 @@ def create_fastapi_app(mcp_server_instance) -> FastAPI:
         version="1.0.0"
     )
     
-    # CORS
+    # CORS - only the dashboard origin needs browser access; MCP clients are server-side
     app.add_middleware(
         CORSMiddleware,
-        allow_origins=["*"],
-        allow_credentials=True,
-        allow_methods=["*"],
-        allow_headers=["*"],
+        allow_origins=[os.getenv("DASH_ORIGIN", "http://localhost:8501")],
+        allow_credentials=False,
+        allow_methods=["GET", "POST"],
+        allow_headers=["content-type"],
     )
 
     # SSE transport
@@ -295,40 +341,67 @@ def create_fastapi_app(mcp_server_instance) -> FastAPI:
             )
         return Response()
     
+    # Plain HTTP tool calls: request/response tools don't need an SSE
+    # session or JSON-RPC framing (same shape as the research server's endpoint)
+    @app.post("/tools/call")
+    async def call_tool_direct(request: dict):
+        """Direct tool call endpoint"""
+        tool_name = request.get("name")
+        handler = TOOL_HANDLERS.get(tool_name)
+        if handler is None:
+            return {
+                "success": False,
+                "error": f"Unknown tool: {tool_name}",
+                "available_tools": list(TOOL_HANDLERS)
+            }
+        
+        try:
+            result = await handler(**request.get("arguments", {}))
+        except Exception as e:
+            debug_print(f"Error in tool call {tool_name}: {e}")
+            return {
+                "success": False,
+                "error": f"Tool call failed: {str(e)}"
+            }
+        
+        # Tools already return JSON text
+        return Response(content=result, media_type="application/json")
+    
     @app.get("/tickets")
     async def list_all_tickets():
         """List all created tickets"""
-        return {
-            "incidents": {
-                "count": len(TICKET_STORAGE["incidents"]),
-                "tickets": list(TICKET_STORAGE["incidents"].values())
-            },
-            "service_requests": {
-                "count": len(TICKET_STORAGE["service_requests"]),
-                "tickets": list(TICKET_STORAGE["service_requests"].values())
-            },
-            "total_tickets": len(TICKET_STORAGE["incidents"]) + len(TICKET_STORAGE["service_requests"])
-        }
+        incidents = TICKET_STORAGE["incidents_json"]
+        service_requests = TICKET_STORAGE["service_requests_json"]
+        incident_count = len(incidents)
+        request_count = len(service_requests)
+        content = (
+            b'{"incidents":{"count":' + str(incident_count).encode() +
+            b',"tickets":' + json_array(incidents) +
+            b'},"service_requests":{"count":' + str(request_count).encode() +
+            b',"tickets":' + json_array(service_requests) +
+            b'},"total_tickets":' + str(incident_count + request_count).encode() + b'}'
+        )
+        return Response(content=content, media_type="application/json")
     
     @app.get("/tickets/{ticket_number}")
     async def get_specific_ticket(ticket_number: str):
         """Get specific ticket details"""
         
         # Check incidents
-        if ticket_number in TICKET_STORAGE["incidents"]:
-            return {
-                "found": True,
-                "type": "incident",
-                "ticket": TICKET_STORAGE["incidents"][ticket_number]
-            }
+        if ticket_number in TICKET_STORAGE["incidents_json"]:
+            return Response(
+                content=b'{"found":true,"type":"incident","ticket":' +
+                        TICKET_STORAGE["incidents_json"][ticket_number] + b'}',
+                media_type="application/json"
+            )
         
         # Check service requests
-        if ticket_number in TICKET_STORAGE["service_requests"]:
-            return {
-                "found": True,
-                "type": "service_request", 
-                "ticket": TICKET_STORAGE["service_requests"][ticket_number]
-            }
+        if ticket_number in TICKET_STORAGE["service_requests_json"]:
+            return Response(
+                content=b'{"found":true,"type":"service_request","ticket":' +
+                        TICKET_STORAGE["service_requests_json"][ticket_number] + b'}',
+                media_type="application/json"
+            )
         
         return {
             "found": False,
@@ -338,18 +411,22 @@ def create_fastapi_app(mcp_server_instance) -> FastAPI:
     @app.get("/tickets/incidents")
     async def list_incidents():
         """List all incidents"""
-        return {
-            "count": len(TICKET_STORAGE["incidents"]),
-            "incidents": list(TICKET_STORAGE["incidents"].values())
-        }
+        incidents = TICKET_STORAGE["incidents_json"]
+        return Response(
+            content=b'{"count":' + str(len(incidents)).encode() +
+                    b',"incidents":' + json_array(incidents) + b'}',
+            media_type="application/json"
+        )
     
     @app.get("/tickets/service_requests")
     async def list_service_requests():
         """List all service requests"""
-        return {
-            "count": len(TICKET_STORAGE["service_requests"]),
-            "service_requests": list(TICKET_STORAGE["service_requests"].values())
-        }
+        service_requests = TICKET_STORAGE["service_requests_json"]
+        return Response(
+            content=b'{"count":' + str(len(service_requests)).encode() +
+                    b',"service_requests":' + json_array(service_requests) + b'}',
+            media_type="application/json"
+        )
     
     @app.get("/")
     async def ticket_dashboard():
@@ -357,6 +434,8 @@ def create_fastapi_app(mcp_server_instance) -> FastAPI:
         
         incidents = list(TICKET_STORAGE["incidents"].values())
         service_requests = list(TICKET_STORAGE["service_requests"].values())
+        incident_count = len(incidents)
+        request_count = len(service_requests)
         
         html_content = f"""
         <!DOCTYPE html>
@@ -385,15 +464,15 @@ def create_fastapi_app(mcp_server_instance) -> FastAPI:
             <div class="stats">
                 <div class="stat-box">
                     <h3>🚨 Incidents</h3>
-                    <h2>{len(incidents)}</h2>
+                    <h2>{incident_count}</h2>
                 </div>
                 <div class="stat-box">
                     <h3>📋 Service Requests</h3>
-                    <h2>{len(service_requests)}</h2>
+                    <h2>{request_count}</h2>
                 </div>
                 <div class="stat-box">
                     <h3>📊 Total Tickets</h3>
-                    <h2>{len(incidents) + len(service_requests)}</h2>
+                    <h2>{incident_count + request_count}</h2>
                 </div>
             </div>
             
@@ -404,6 +483,7 @@ def create_fastapi_app(mcp_server_instance) -> FastAPI:
         
         if incidents:
             for ticket in sorted(incidents, key=lambda x: x['created_on'], reverse=True):
+                desc = ticket['description']
                 priority_class = f"priority-{ticket.get('priority', '3').replace('1', 'critical').replace('2', 'high').replace('3', 'medium').replace('4', 'low')}"
                 html_content += f"""
                 <div class="ticket {priority_class}">
@@ -412,7 +492,7 @@ def create_fastapi_app(mcp_server_instance) -> FastAPI:
                        <strong>Status:</strong> {ticket['state']} | 
                        <strong>Assigned:</strong> {ticket['assignment_group']}</p>
                     <p><strong>Created:</strong> {ticket['created_on']}</p>
-                    <p><strong>Description:</strong> {ticket['description'][:100]}...</p>
+                    <p><strong>Description:</strong> {desc if len(desc) <= 100 else desc[:100] + "..."}</p>
                 </div>
                 """
         else:
@@ -422,6 +502,7 @@ def create_fastapi_app(mcp_server_instance) -> FastAPI:
         
         if service_requests:
             for ticket in sorted(service_requests, key=lambda x: x['created_on'], reverse=True):
+                desc = ticket['description']
                 html_content += f"""
                 <div class="ticket">
                     <h4>{ticket['request_number']} - {ticket['short_description']}</h4>
@@ -429,7 +510,7 @@ def create_fastapi_app(mcp_server_instance) -> FastAPI:
                        <strong>Status:</strong> {ticket['state']} | 
                        <strong>Category:</strong> {ticket.get('category', 'General')}</p>
                     <p><strong>Created:</strong> {ticket['created_on']}</p>
-                    <p><strong>Description:</strong> {ticket['description'][:100]}...</p>
+                    <p><strong>Description:</strong> {desc if len(desc) <= 100 else desc[:100] + "..."}</p>
                 </div>
                 """
         else:
@@ -455,14 +536,16 @@ def create_fastapi_app(mcp_server_instance) -> FastAPI:
     @app.get("/health")
     async def health_check():
         """Health check"""
+        incident_count = len(TICKET_STORAGE["incidents"])
+        request_count = len(TICKET_STORAGE["service_requests"])
         return {
             "status": "healthy",
             "server": "ServiceNow Ticket MCP Server",
             "version": "1.0.0",
             "tickets_stored": {
-                "incidents": len(TICKET_STORAGE["incidents"]),
-                "service_requests": len(TICKET_STORAGE["service_requests"]),
-                "total": len(TICKET_STORAGE["incidents"]) + len(TICKET_STORAGE["service_requests"])
+                "incidents": incident_count,
+                "service_requests": request_count,
+                "total": incident_count + request_count
             }
         }
     
@@ -521,15 +604,31 @@ if __name__ == "__main__":
     debug_print(f"  - SSE: http://{args.host}:{args.port}/sse")
     debug_print(f"  - Health: http://{args.host}:{args.port}/health")
     debug_print(f"  - Tools: http://{args.host}:{args.port}/tools")
+    debug_print(f"  - Tool calls: http://{args.host}:{args.port}/tools/call")
     
     # Start server
     try:
         import uvicorn
-        debug_print(f"Starting server...")
+        
+        # Prefer uvloop + httptools; fall back to stdlib loop / h11 where unavailable
+        try:
+            import uvloop
+            loop_impl = "uvloop"
+        except ImportError:
+            loop_impl = "asyncio"
+        try:
+            import httptools
+            http_impl = "httptools"
+        except ImportError:
+            http_impl = "h11"
+        
+        debug_print(f"Starting server (loop={loop_impl}, http={http_impl})...")
         uvicorn.run(
             fastapi_app,
             host=args.host,
             port=args.port,
+            loop=loop_impl,
+            http=http_impl,
             log_level="info"
         )
     except Exception as e:
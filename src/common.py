@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Shared helpers for the chatbot client, workflow and intent classifier
+"""
+
+import asyncio
+import json
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from typing import Awaitable, Callable, Dict, Any, List, Optional
+
+# HTTP/2 needs the optional h2 package; without it httpx stays on HTTP/1.1
+try:
+    import h2
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# orjson parses and serializes the (often tens of KB) research payloads and
+# Claude replies several times faster; fall back to the stdlib when it isn't
+# installed
+try:
+    import orjson
+    
+    def json_loads(data):
+        """Parse JSON from str or bytes"""
+        return orjson.loads(data)
+    
+    def json_dumps(obj) -> str:
+        """Serialize to compact JSON text"""
+        return orjson.dumps(obj).decode("utf-8")
+    
+    def json_dumps_bytes(obj) -> bytes:
+        """Serialize to compact UTF-8 JSON, ready to send as a request body"""
+        return orjson.dumps(obj)
+    
+    def json_dumps_sorted(obj) -> bytes:
+        """Serialize with sorted keys, for stable cache keys"""
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)
+except ImportError:
+    def json_loads(data):
+        """Parse JSON from str or bytes"""
+        return json.loads(data)
+    
+    def json_dumps(obj) -> str:
+        """Serialize to compact JSON text"""
+        return json.dumps(obj, separators=(",", ":"))
+    
+    def json_dumps_bytes(obj) -> bytes:
+        """Serialize to compact UTF-8 JSON, ready to send as a request body"""
+        return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+    
+    def json_dumps_sorted(obj) -> bytes:
+        """Serialize with sorted keys, for stable cache keys"""
+        return json.dumps(obj, sort_keys=True).encode("utf-8")
+
+def use_uvloop() -> bool:
+    """
+    Run asyncio.run() on uvloop where it is installed (Linux/macOS)
+    
+    Changes the process-wide event loop policy, so only entry points call it,
+    never module imports. Returns whether uvloop is in use.
+    """
+    try:
+        import uvloop
+    except ImportError:
+        return False
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return True
+
+def new_event_loop() -> asyncio.AbstractEventLoop:
+    """A new uvloop loop where installed, else asyncio's; leaves the global policy alone"""
+    try:
+        import uvloop
+    except ImportError:
+        return asyncio.new_event_loop()
+    return uvloop.new_event_loop()
+
+def bullet_list(items) -> str:
+    """Render items as newline-separated '• item' lines"""
+    return "\n".join(f"• {item}" for item in items)
+
+# One queue and listener thread for every module that routes its logging here
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+_log_handler = QueueHandler(_log_queue)
+_log_listener: Optional[QueueListener] = None
+
+def configure_logging(*loggers: logging.Logger, level: int = logging.DEBUG) -> QueueListener:
+    """
+    Route the given loggers' records through a background thread
+    
+    Calling threads only enqueue records; formatting and the stderr write
+    happen on the listener thread. Every call shares the same queue and
+    listener. Call .stop() on the returned listener to flush it on shutdown.
+    """
+    
+    global _log_listener
+    if _log_listener is None:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(levelname)s %(message)s"))
+        _log_listener = QueueListener(_log_queue, handler)
+        _log_listener.start()
+    
+    for logger in loggers:
+        if _log_handler not in logger.handlers:
+            logger.addHandler(_log_handler)
+        logger.setLevel(level)
+        logger.propagate = False
+    
+    return _log_listener
+
+class RequestBatcher:
+    """
+    Coalesces concurrent submit() calls into batched requests.
+    
+    A background worker collects whatever arrives within `window` seconds
+    (up to `max_batch` items) and hands them to `call_many` in one go. A
+    lone request is dispatched immediately through `call_one`, so a single
+    caller never pays the batching window. Each batch runs as its own task,
+    so requests queued while a batch is in flight don't wait for it.
+    """
+    
+    def __init__(self, call_one: Callable[[Any], Awaitable[Dict[str, Any]]],
+                 call_many: Callable[[List[Any]], Awaitable[List[Dict[str, Any]]]],
+                 window: float = 0.01, max_batch: int = 16):
+        self.call_one = call_one
+        self.call_many = call_many
+        self.window = window
+        self.max_batch = max_batch
+        self._loop = None
+        self._queue = None
+        self._worker = None
+        self._batches = set()
+    
+    async def submit(self, item: Any) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        
+        # Callers may drive each request with a fresh asyncio.run(); bind the
+        # queue and worker to whichever loop is current
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._batches = set()
+            self._worker = loop.create_task(self._run())
+        
+        future = loop.create_future()
+        await self._queue.put((item, future))
+        return await future
+    
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            
+            # Let concurrently scheduled submitters enqueue, then only hold the
+            # window open if there is actually something to batch with
+            await asyncio.sleep(0)
+            if not self._queue.empty():
+                deadline = self._loop.time() + self.window
+                while len(batch) < self.max_batch:
+                    timeout = deadline - self._loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+            
+            # Keep a reference so the task isn't garbage collected mid-flight
+            task = self._loop.create_task(self._dispatch(batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+    
+    async def _dispatch(self, batch: List[Any]):
+        try:
+            if len(batch) == 1:
+                results = [await self.call_one(batch[0][0])]
+            else:
+                results = await self.call_many([item for item, _ in batch])
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            # Cancelled with the loop: don't leave submitters waiting forever
+            for _, future in batch:
+                if not future.done():
+                    future.cancel()
@@ -5,10 +5,223 @@ UPDATED VERSION - Now includes Research Query handling
 """
 
 import asyncio
-import json
+import re
+import uuid
+from functools import lru_cache
 import anthropic
-from typing import Dict, Any, Optional
+import httpx
+from collections import OrderedDict
+from typing import Callable, Dict, Any, List, Optional, Tuple
 from enum import Enum
+from types import SimpleNamespace
+from common import HTTP2_AVAILABLE, RequestBatcher, use_uvloop
+
+# Model + prompt version for manipulation detection; both are part of the
+# cache key so bumping either invalidates previously cached classifications
+MANIPULATION_MODEL = "claude-3-haiku-20240307"
+MANIPULATION_PROMPT_VERSION = "v4"
+MANIPULATION_CACHE_SIZE = 1024
+
+# Static parts of the manipulation-detection prompts. Sent as their own content
+# block with cache_control so Claude can reuse the processed prefix. The short
+# prompt (rules only; the tool schema carries the structure) is tried first and
+# the few-shot MANIPULATION_PROMPT is only used when its answer is incomplete.
+MANIPULATION_SHORT_PROMPT = """
+You are a data operation analyzer. Determine if the user wants to manipulate data (UPDATE/DELETE/INSERT) vs just search/read data, and report the result with the classify_operation tool.
+
+RULES:
+- UPDATE/MODIFY/CHANGE/ALTER/SET = manipulation (requires approval)
+- DELETE/REMOVE/DROP = manipulation (requires approval)
+- INSERT/ADD/CREATE = manipulation (requires approval)
+- FIND/GET/SHOW/SEARCH = search (no approval needed)
+- All data manipulation requires approval for safety
+- entity_identifier is the claim number / engine serial / warranty ID being referenced
+- sql_intent is a plain English description of the SQL that would run
+"""
+
+MANIPULATION_PROMPT = """
+You are a data operation analyzer. Determine if the user wants to manipulate data (UPDATE/DELETE/INSERT) vs just search/read data.
+
+Analyze the user input and report the result with the classify_operation tool using this structure:
+
+{
+    "is_manipulation": true/false,
+    "operation_type": "update" | "delete" | "insert" | "search",
+    "entity_type": "claim" | "engine" | "warranty" | "unknown",
+    "entity_identifier": "extracted ID/serial/number",
+    "target_field": "field being changed",
+    "old_value": "current value",
+    "new_value": "desired new value",
+    "sql_intent": "Plain English description of what SQL would do",
+    "requires_approval": true/false
+}
+
+EXAMPLES:
+
+Input: "Update engine serial 12345678 model from X10 to X15"
+Output: {
+    "is_manipulation": true,
+    "operation_type": "update",
+    "entity_type": "engine", 
+    "entity_identifier": "12345678",
+    "target_field": "model_name",
+    "old_value": "X10",
+    "new_value": "X15",
+    "sql_intent": "Update engines table SET model_name='X15' WHERE serial_number='12345678'",
+    "requires_approval": true
+}
+
+Input: "Can u update claim Number '1-CCCC' to '1-DDDD'"
+Output: {
+    "is_manipulation": true,
+    "operation_type": "update",
+    "entity_type": "claim",
+    "entity_identifier": "1-CCCC", 
+    "target_field": "claim_number",
+    "old_value": "1-CCCC",
+    "new_value": "1-DDDD",
+    "sql_intent": "Update claims table SET claim_number='1-DDDD' WHERE claim_number='1-CCCC'",
+    "requires_approval": true
+}
+
+Input: "Find claim 1-ABCD"
+Output: {
+    "is_manipulation": false,
+    "operation_type": "search",
+    "entity_type": "claim",
+    "entity_identifier": "1-ABCD",
+    "target_field": null,
+    "old_value": null,
+    "new_value": null,
+    "sql_intent": "Select from claims table WHERE claim_number='1-ABCD'",
+    "requires_approval": false
+}
+
+RULES:
+- UPDATE/MODIFY/CHANGE/ALTER/SET = manipulation (requires approval)
+- DELETE/REMOVE/DROP = manipulation (requires approval)  
+- INSERT/ADD/CREATE = manipulation (requires approval)
+- FIND/GET/SHOW/SEARCH = search (no approval needed)
+- All data manipulation requires approval for safety
+"""
+
+# Tool schema that Claude is forced to call, so the output is structured
+# server-side instead of parsed out of free text
+MANIPULATION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "is_manipulation": {"type": "boolean"},
+        "operation_type": {"type": "string", "enum": ["update", "delete", "insert", "search"]},
+        "entity_type": {"type": "string", "enum": ["claim", "engine", "warranty", "unknown"]},
+        "entity_identifier": {"type": ["string", "null"]},
+        "target_field": {"type": ["string", "null"]},
+        "old_value": {"type": ["string", "null"]},
+        "new_value": {"type": ["string", "null"]},
+        "sql_intent": {"type": "string"},
+        "requires_approval": {"type": "boolean"}
+    },
+    "required": [
+        "is_manipulation", "operation_type", "entity_type", "entity_identifier",
+        "target_field", "old_value", "new_value", "sql_intent", "requires_approval"
+    ]
+}
+
+MANIPULATION_TOOL = {
+    "name": "classify_operation",
+    "description": "Report whether a data request is a manipulation or a search",
+    "input_schema": MANIPULATION_SCHEMA
+}
+
+MANIPULATION_BATCH_TOOL = {
+    "name": "classify_operations",
+    "description": "Report the classification of each numbered data request, in order",
+    "input_schema": {
+        "type": "object",
+        "properties": {"results": {"type": "array", "items": MANIPULATION_SCHEMA}},
+        "required": ["results"]
+    }
+}
+
+# Rule-based fast path for manipulation detection (mirrors the RULES block of
+# the Claude prompt). Only unambiguous inputs are resolved locally.
+MANIPULATION_VERB_RE = re.compile(
+    r"\b(update|modify|change|alter|set|delete|remove|drop|insert|add|create)\b", re.I
+)
+SEARCH_VERB_RE = re.compile(r"\b(find|get|show|search|list|display)\b", re.I)
+ENTITY_RE = re.compile(r"\b(claim|engine|warranty)s?\b", re.I)
+
+# Same verbs in any inflection ("updating", "changed"), for the cheaper
+# question of whether an input is likely a data query at all
+DATA_VERB_RE = re.compile(
+    r"\b(updat|modif|chang|alter|set|delet|remov|drop|insert|add|creat|find|get|show|search|list|display)\w*", re.I
+)
+IDENTIFIER_RE = re.compile(r"(?<![\w-])(?=[A-Z-]*\d)[0-9A-Z][0-9A-Z-]{3,}(?![\w-])")
+CHANGE_RE = re.compile(r"\b(\w+)\s+from\s+'?([\w.-]+)'?\s+to\s+'?([\w.-]+)'?", re.I)
+
+# Phrases that indicate a user is reporting missing data rather than searching,
+# compiled into a single alternation so each query is scanned once
+MISSING_KEYWORDS = (
+    "missing", "can't find", "cannot find", "not found", "lost",
+    "disappeared", "absent", "unavailable", "not showing up",
+    "not in the system", "not there", "where is"
+)
+MISSING_DATA_RE = re.compile("|".join(re.escape(keyword) for keyword in MISSING_KEYWORDS))
+
+# Keyword -> owning team, checked in priority order
+ASSIGNMENT_GROUPS = (
+    ("claim", "Brazil Claims Team"),
+    ("engine", "Engine Data Team"),
+    ("warranty", "Warranty Support Team")
+)
+
+@lru_cache(maxsize=1024)
+def is_missing_data_query(user_input: str) -> bool:
+    """Check if the input contains missing-data indicators"""
+    return MISSING_DATA_RE.search(user_input.lower()) is not None
+
+@lru_cache(maxsize=1024)
+def looks_like_data_query(user_input: str) -> bool:
+    """Check for a data operation verb and a claim/engine/warranty mention"""
+    return DATA_VERB_RE.search(user_input) is not None and ENTITY_RE.search(user_input) is not None
+
+@lru_cache(maxsize=1024)
+def get_assignment_group(user_input: str) -> str:
+    """Map the input to the team that owns the mentioned data"""
+    
+    query_lower = user_input.lower()
+    
+    for keyword, group in ASSIGNMENT_GROUPS:
+        if keyword in query_lower:
+            return group
+    
+    return "Data Support Team"
+
+# search_database is idempotent, so data queries may run it speculatively
+# alongside manipulation detection
+SPECULATIVE_SEARCH = True
+
+# Manipulation detection may call Claude, and a speculative call is usually
+# sent (and billed) before classification rules the input out. So it only
+# starts alongside classification for inputs that already look like data
+# queries (looks_like_data_query), unless this is enabled.
+SPECULATIVE_DETECTION = False
+
+# Optionally create approval / investigation tickets on a background worker,
+# replying with a provisional number that reconcile_ticket() later swaps for
+# the real one. Off by default: it only saves latency for a caller that
+# replies before flush_tickets() (reporting the ticket via on_ticket_created),
+# and that caller must still flush before its event loop ends.
+ASYNC_TICKET_CREATION = False
+PENDING_TICKET_PREFIX = "PENDING-"
+
+# Technical fields hidden from search result previews
+SKIPPED_RESULT_FIELDS = frozenset({"sys_id", "last_updated"})
+
+ENTITY_TABLES = {
+    "claim": ("claims", "claim_number"),
+    "engine": ("engines", "serial_number"),
+    "warranty": ("warranties", "warranty_number")
+}
 
 # Import your existing components - FIXED IMPORTS
 try:
@@ -63,6 +276,9 @@ except ImportError:
         def __init__(self):
             pass
         
+        async def close(self):
+            pass
+        
         async def search_database(self, query, table_hint=None):
             return {"success": False, "error": "MCP client not available"}
         
@@ -76,6 +292,270 @@ except ImportError:
         async def handle_research_query_workflow(self, query, user_id, analysis_type="comprehensive"):
             return {"success": False, "error": "Research MCP client not available"}
 
+# ================================
+# Response Templates
+# ================================
+
+# Static message bodies, filled with str.format() per request
+INCIDENT_CREATED_TEMPLATE = """
+🚨 **Critical System Incident - Ticket Created**
+
+**Analysis Results:**
+• **Severity:** {severity}
+• **System:** {system}
+• **Impact:** {impact}
+
+**Ticket Created:**
+• **Ticket Number:** {ticket_number}
+• **Priority:** {priority}
+• **Assigned to:** {assignment_group}
+• **Expected Response:** {sla_response_time}
+
+**Immediate Actions:**
+{immediate_actions}
+
+You'll receive email updates as the incident progresses.
+""".strip()
+
+INCIDENT_FAILED_TEMPLATE = """
+❌ **Incident Analysis Complete - Ticket Creation Failed**
+
+**Analysis Results:**
+• **Severity:** {severity}
+• **Impact:** {impact}
+
+**Error:** {error}
+
+**Manual Steps:**
+• Contact {assignment_group} directly
+• Reference this analysis in your communication
+• Escalate if critical: {escalate}
+""".strip()
+
+TICKET_FAILED_TEMPLATE = """
+❌ **Request Understood - Ticket Creation Failed**
+
+**Ticket:** {ticket_type}
+**Error:** {error}
+
+No ticket was created. Please try again or contact support.
+""".strip()
+
+# TICKET_FAILED_TEMPLATE name for each ticket-creating workflow
+TICKET_TYPES = {
+    "data_manipulation_approval": "Data manipulation approval request",
+    "missing_data_investigation": "Missing data investigation",
+}
+
+MANIPULATION_APPROVAL_TEMPLATE = """
+🔒 **Data Manipulation Request - Admin Approval Required**
+
+**Operation:** {operation}
+**Entity:** {entity_type} - {entity_identifier}
+**Change:** {target_field} from '{old_value}' to '{new_value}'
+
+**SQL Intent:** {sql_intent}
+
+✅ **Approval Request Created:**
+• **Ticket Number:** {ticket_number}
+• **Assigned to:** Data Administration Team
+• **Priority:** Medium
+• **Expected Response:** 24-48 hours
+
+**⚠️ Important:** This operation will modify live data and requires admin approval for safety.
+
+You'll receive an email notification once the request is reviewed.
+""".strip()
+
+SEARCH_RESULTS_TEMPLATE = """
+🔍 **Database Search Results**
+
+**Query:** {query}
+**Results Found:** {count}
+
+**Data Preview:**
+{preview}
+
+{more}
+"""
+
+MISSING_DATA_TEMPLATE = """
+📋 **Missing Data Investigation Initiated**
+
+**Query:** {query}
+**Status:** No records found in database
+
+✅ **Investigation Ticket Created:**
+• **Ticket Number:** {ticket_number}
+• **Assigned to:** {assignment_group}
+
+The appropriate team will investigate and contact you with findings.
+""".strip()
+
+NO_RESULTS_TEMPLATE = """
+🔍 **Database Search Complete**
+
+**Query:** {query}
+**Results Found:** 0
+
+No matching records found. Try:
+• Checking spelling of search terms
+• Using partial names or numbers
+• Broadening your search criteria
+""".strip()
+
+SEARCH_FAILED_TEMPLATE = """
+❌ **Database Search Failed**
+
+**Query:** {query}
+**Error:** {error}
+
+Please try again or contact support.
+""".strip()
+
+RESEARCH_FAILED_TEMPLATE = """
+❌ **Research Query Processing Failed**
+
+**Query:** {query}
+**Error:** {error}
+
+**Alternative Resources:**
+• Academic databases (IEEE, ACM, arXiv)
+• Company knowledge base
+• Technical documentation
+• Subject matter experts
+
+**Next Steps:**
+• Try rephrasing your research question
+• Check if research MCP server is running
+• Contact research support team
+
+Would you like me to help you rephrase your research question?
+""".strip()
+
+APPROVAL_TICKET_TEMPLATE = """
+**Data Manipulation Approval Request**
+
+**Original Request:** {user_input}
+**Requested by:** {user_id}
+**Operation Type:** {operation}
+
+**Entity Details:**
+• Type: {entity_type}
+• Identifier: {entity_identifier}
+• Field: {target_field}
+• Current Value: {old_value}
+• New Value: {new_value}
+
+**SQL Intent:** 
+{sql_intent}
+
+**Risk Assessment:**
+• Data manipulation operation detected
+• Requires admin review for data integrity
+• Backup recommended before execution
+
+**Approval Required:**
+Please review this request and either:
+1. ✅ Approve and execute the change
+2. ❌ Reject with reason
+3. 🔄 Request clarification from user
+
+**Note:** All data manipulation operations require approval for safety and audit compliance.
+""".strip()
+
+MISSING_DATA_TICKET_TEMPLATE = """
+**Missing Data Investigation Request**
+
+**Original Query:** {user_input}
+**Reported by:** {user_id}
+**Search Result:** No matching records found
+
+**Database Search Details:**
+• SQL Generated: {sql_generated}
+• Tables Searched: {tables_searched}
+• Search Confidence: {confidence}
+
+**Investigation Required:**
+Please investigate why the requested data is not available and provide status to the user.
+
+**Possible Actions:**
+• Verify data entry status
+• Check data synchronization
+• Review access permissions
+• Contact source system owners
+""".strip()
+
+INFORMATION_FALLBACK_TEMPLATE = """
+📚 **Information Request: {topic_title} - {category_title}**
+
+I understand you're looking for information about {topic} processes. 
+
+**Available Resources:**
+• Internal Documentation Portal
+• Process Wiki Pages  
+• Training Materials
+• Subject Matter Experts
+
+**Recommended Next Steps:**
+• Check the internal knowledge base
+• Contact the {topic} team directly
+• Schedule a training session
+
+For specific technical details, please contact the appropriate team or submit a detailed information request.
+""".strip()
+
+DEFAULT_IMMEDIATE_ACTIONS = "• Ticket created\n• Team notified"
+
+# Canned knowledge base answers by topic and category
+KNOWLEDGE_RESPONSES = {
+    "claims": {
+        "process": """
+📋 **Brazil Claims Upload Process**
+
+**Steps:**
+1. **Data Collection:** Gather claim details (customer info, product serial, issue description)
+2. **Validation:** Verify claim meets warranty criteria
+3. **System Entry:** Upload to reliability system via web portal
+4. **Review:** Brazil Claims team reviews within 24-48 hours
+5. **Processing:** Approved claims enter payment workflow
+
+**Required Fields:**
+• Customer Name and Contact
+• Product Serial Number
+• Claim Date and Amount
+• Issue Description
+• Supporting Documentation
+
+**Upload Methods:**
+• Web Portal: https://claims.company.com
+• Bulk Upload: Excel template available
+• API Integration: For automated systems
+        """,
+        "technical": """
+🔧 **Technical Integration Details**
+
+**API Endpoints:**
+• POST /api/claims/create - Create new claim
+• GET /api/claims/{id} - Retrieve claim details
+• PUT /api/claims/{id} - Update claim status
+
+**Database Schema:**
+• claims.claim_id (Primary Key)
+• claims.customer_info (JSON)
+• claims.product_data (Foreign Key)
+• claims.status_history (Audit Trail)
+
+**Data Flow:**
+1. Claims Portal → API Gateway
+2. API Gateway → Validation Service
+3. Validation Service → Database
+4. Database → Reliability System Sync
+        """
+    }
+}
+
+
 class CompleteChatbotWorkflow:
     """
     Complete workflow that combines:
@@ -92,141 +572,353 @@ class CompleteChatbotWorkflow:
         # Initialize MCP client
         self.mcp_client = MultiMCPClient()
         
-        # Store Claude client for data manipulation detection
-        self.claude_client = anthropic.Anthropic(api_key=claude_api_key)
+        # Async Claude client for data manipulation detection so the call
+        # doesn't block the event loop. Concurrent turns share one keep-alive
+        # pool (multiplexed over HTTP/2 when available) instead of paying a
+        # TLS handshake per request.
+        self.claude_http_client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(max_keepalive_connections=64, max_connections=128),
+            timeout=30.0
+        )
+        self.claude_client = anthropic.AsyncAnthropic(
+            api_key=claude_api_key,
+            max_retries=2,
+            http_client=self.claude_http_client
+        )
+        
+        # Coalesces concurrent Claude manipulation checks into shared requests
+        self._manipulation_batcher = RequestBatcher(
+            self._classify_manipulation_single, self._classify_manipulation_batch,
+            window=0.05, max_batch=8
+        )
+        
+        # How often the short prompt sufficed vs. fell back to the few-shot prompt
+        self.manipulation_prompt_stats = {"short": 0, "long": 0}
+        
+        # LRU cache of manipulation classifications keyed by normalized input
+        self._manipulation_cache: "OrderedDict[Tuple[str, str, str], Dict[str, Any]]" = OrderedDict()
+        
+        # Background ticket creation: correlation id -> real MCP result, plus
+        # an optional on_ticket_created(correlation_id, result) notification hook
+        self._ticket_loop = None
+        self._ticket_queue = None
+        self._ticket_worker_task = None
+        self.ticket_results: Dict[str, Dict[str, Any]] = {}
+        self.on_ticket_created: Optional[Callable[[str, Dict[str, Any]], Any]] = None
     
-    def is_missing_data_query(self, user_input: str) -> bool:
+    async def close(self):
+        """Finish queued ticket creation and release pooled Claude and MCP connections"""
+        await self.flush_tickets()
+        await self.mcp_client.close()
+        await self.claude_http_client.aclose()
+    
+    async def _enqueue_service_request(self, **request) -> Dict[str, Any]:
         """
-        Detect if user is reporting missing/lost data vs just searching
+        Queue a create_service_request call and return a provisional result
+        
+        The provisional request_number is PENDING_TICKET_PREFIX + correlation
+        id; use reconcile_ticket() after flush_tickets() to swap in the real one.
         """
         
-        missing_keywords = [
-            "missing", "can't find", "cannot find", "not found", "lost", 
-            "disappeared", "absent", "unavailable", "not showing up",
-            "not in the system", "not there", "where is"
-        ]
+        if not ASYNC_TICKET_CREATION:
+            return await self.mcp_client.create_service_request(**request)
+        
+        loop = asyncio.get_running_loop()
+        
+        # Same loop rebinding as RequestBatcher: callers may use a fresh asyncio.run() per turn.
+        # Requests the old worker never got to move to the new queue.
+        if self._ticket_loop is not loop or self._ticket_worker_task is None or self._ticket_worker_task.done():
+            old_queue = self._ticket_queue
+            self._ticket_loop = loop
+            self._ticket_queue = asyncio.Queue()
+            while old_queue is not None and not old_queue.empty():
+                self._ticket_queue.put_nowait(old_queue.get_nowait())
+            self._ticket_worker_task = loop.create_task(self._ticket_worker())
+        
+        correlation_id = uuid.uuid4().hex[:8].upper()
+        await self._ticket_queue.put((correlation_id, request))
+        
+        return {
+            "success": True,
+            "pending": True,
+            "correlation_id": correlation_id,
+            "result": {"request_number": f"{PENDING_TICKET_PREFIX}{correlation_id}"}
+        }
+    
+    async def _ticket_worker(self):
+        while True:
+            correlation_id, request = await self._ticket_queue.get()
+            
+            try:
+                result = await self.mcp_client.create_service_request(**request)
+            except Exception as e:
+                result = {"success": False, "error": str(e)}
+            
+            self.ticket_results[correlation_id] = result
+            print(f"🎫 Ticket {correlation_id} -> {result.get('result', {}).get('request_number', 'failed')}")
+            
+            if self.on_ticket_created is not None:
+                try:
+                    self.on_ticket_created(correlation_id, result)
+                except Exception as e:
+                    print(f"Ticket notification failed: {e}")
+            
+            self._ticket_queue.task_done()
+    
+    async def flush_tickets(self):
+        """Wait until every ticket queued on the running loop has been created"""
+        
+        if (self._ticket_queue is not None and self._ticket_loop is asyncio.get_running_loop()
+                and not self._ticket_worker_task.done()):
+            await self._ticket_queue.join()
+    
+    def reconcile_ticket(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Replace a workflow result's provisional ticket number with the real one, if known"""
+        
+        ticket_result = result.get("ticket_result", {})
+        correlation_id = ticket_result.get("correlation_id")
+        if not ticket_result.get("pending") or correlation_id not in self.ticket_results:
+            return result
         
-        # Check if query contains missing data indicators
-        query_lower = user_input.lower()
+        created = self.ticket_results[correlation_id]
+        result["ticket_result"] = created
+        if not created.get("success"):
+            return self._ticket_failed(result)
         
-        for keyword in missing_keywords:
-            if keyword in query_lower:
-                return True
+        request_number = created.get("result", {}).get("request_number", "Unknown")
+        result["message"] = result["message"].replace(f"{PENDING_TICKET_PREFIX}{correlation_id}", request_number)
+        return result
+    
+    def _ticket_failed(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Turn a ticket-creating workflow result into a failure when its ticket wasn't created"""
+        
+        result["success"] = False
+        result["message"] = TICKET_FAILED_TEMPLATE.format(
+            ticket_type=TICKET_TYPES.get(result.get("workflow"), "Service request"),
+            error=result["ticket_result"].get("error", "Unknown error")
+        )
+        return result
+    
+    def _check_ticket(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Failure result if a synchronously created ticket failed; queued tickets are checked on reconcile"""
+        
+        ticket_result = result["ticket_result"]
+        if ticket_result.get("pending") or ticket_result.get("success"):
+            return result
+        return self._ticket_failed(result)
+    
+    def is_missing_data_query(self, user_input: str) -> bool:
+        """
+        Detect if user is reporting missing/lost data vs just searching
+        """
         
-        return False
+        return is_missing_data_query(user_input)
     
     async def detect_data_manipulation_with_llm(self, user_input: str) -> Dict[str, Any]:
         """
         Use Claude to detect and parse data manipulation requests
+        
+        Results are cached by whitespace/case-normalized input so repeated
+        requests skip the Claude round trip.
         """
         
-        prompt = f"""
-You are a data operation analyzer. Determine if the user wants to manipulate data (UPDATE/DELETE/INSERT) vs just search/read data.
-
-USER INPUT: "{user_input}"
-
-Analyze the request and return JSON with this exact structure:
-
-{{
-    "is_manipulation": true/false,
-    "operation_type": "update" | "delete" | "insert" | "search",
-    "entity_type": "claim" | "engine" | "warranty" | "unknown",
-    "entity_identifier": "extracted ID/serial/number",
-    "target_field": "field being changed",
-    "old_value": "current value",
-    "new_value": "desired new value",
-    "sql_intent": "Plain English description of what SQL would do",
-    "requires_approval": true/false
-}}
-
-EXAMPLES:
-
-Input: "Update engine serial 12345678 model from X10 to X15"
-Output: {{
-    "is_manipulation": true,
-    "operation_type": "update",
-    "entity_type": "engine", 
-    "entity_identifier": "12345678",
-    "target_field": "model_name",
-    "old_value": "X10",
-    "new_value": "X15",
-    "sql_intent": "Update engines table SET model_name='X15' WHERE serial_number='12345678'",
-    "requires_approval": true
-}}
-
-Input: "Can u update claim Number '1-CCCC' to '1-DDDD'"
-Output: {{
-    "is_manipulation": true,
-    "operation_type": "update",
-    "entity_type": "claim",
-    "entity_identifier": "1-CCCC", 
-    "target_field": "claim_number",
-    "old_value": "1-CCCC",
-    "new_value": "1-DDDD",
-    "sql_intent": "Update claims table SET claim_number='1-DDDD' WHERE claim_number='1-CCCC'",
-    "requires_approval": true
-}}
-
-Input: "Find claim 1-ABCD"
-Output: {{
-    "is_manipulation": false,
-    "operation_type": "search",
-    "entity_type": "claim",
-    "entity_identifier": "1-ABCD",
-    "target_field": null,
-    "old_value": null,
-    "new_value": null,
-    "sql_intent": "Select from claims table WHERE claim_number='1-ABCD'",
-    "requires_approval": false
-}}
-
-RULES:
-- UPDATE/MODIFY/CHANGE/ALTER/SET = manipulation (requires approval)
-- DELETE/REMOVE/DROP = manipulation (requires approval)  
-- INSERT/ADD/CREATE = manipulation (requires approval)
-- FIND/GET/SHOW/SEARCH = search (no approval needed)
-- All data manipulation requires approval for safety
-
-Analyze the input now:
-"""
-
+        rule_result = self._detect_data_manipulation_with_rules(user_input)
+        if rule_result is not None:
+            return rule_result
+        
+        cache_key = (" ".join(user_input.lower().split()), MANIPULATION_MODEL, MANIPULATION_PROMPT_VERSION)
+        cached = self._manipulation_cache.get(cache_key)
+        if cached is not None:
+            self._manipulation_cache.move_to_end(cache_key)
+            return dict(cached)
+        
+        result = await self._detect_data_manipulation_uncached(user_input)
+        
+        # Don't cache fallback results so transient API errors are retried
+        if "error" not in result:
+            self._manipulation_cache[cache_key] = result
+            if len(self._manipulation_cache) > MANIPULATION_CACHE_SIZE:
+                self._manipulation_cache.popitem(last=False)
+            result = dict(result)
+        
+        return result
+    
+    def _detect_data_manipulation_with_rules(self, user_input: str) -> Optional[Dict[str, Any]]:
+        """
+        Resolve clear-cut requests without calling Claude.
+        
+        Returns None (fall back to the LLM) unless exactly one of the
+        manipulation/search verb classes matches, exactly one entity type is
+        mentioned and a single identifier can be extracted. Manipulations
+        additionally need an explicit "<field> from <old> to <new>" change.
+        """
+        
+        is_manipulation = MANIPULATION_VERB_RE.search(user_input) is not None
+        is_search = SEARCH_VERB_RE.search(user_input) is not None
+        if is_manipulation == is_search:
+            return None
+        
+        entities = {match.lower() for match in ENTITY_RE.findall(user_input)}
+        if len(entities) != 1:
+            return None
+        entity_type = entities.pop()
+        table, id_field = ENTITY_TABLES[entity_type]
+        
+        if is_manipulation:
+            change = CHANGE_RE.search(user_input)
+            if not change:
+                return None
+            target_field, old_value, new_value = change.groups()
+            identifiers = [i for i in IDENTIFIER_RE.findall(user_input) if i not in (old_value, new_value)]
+            if len(identifiers) != 1:
+                return None
+            entity_identifier = identifiers[0]
+            
+            return {
+                "is_manipulation": True,
+                "operation_type": "update",
+                "entity_type": entity_type,
+                "entity_identifier": entity_identifier,
+                "target_field": target_field.lower(),
+                "old_value": old_value,
+                "new_value": new_value,
+                "sql_intent": f"Update {table} table SET {target_field.lower()}='{new_value}' WHERE {id_field}='{entity_identifier}'",
+                "requires_approval": True
+            }
+        
+        identifiers = IDENTIFIER_RE.findall(user_input)
+        if len(identifiers) != 1:
+            return None
+        
+        return {
+            "is_manipulation": False,
+            "operation_type": "search",
+            "entity_type": entity_type,
+            "entity_identifier": identifiers[0],
+            "target_field": None,
+            "old_value": None,
+            "new_value": None,
+            "sql_intent": f"Select from {table} table WHERE {id_field}='{identifiers[0]}'",
+            "requires_approval": False
+        }
+    
+    async def _detect_data_manipulation_uncached(self, user_input: str) -> Dict[str, Any]:
+        """Classify via Claude, sharing a request with other concurrent turns"""
+        return await self._manipulation_batcher.submit(user_input)
+    
+    async def _classify_manipulation_single(self, user_input: str) -> Dict[str, Any]:
+        """Call Claude to classify a data request as manipulation vs search"""
+        
+        try:
+            result = await self._call_manipulation_tool(MANIPULATION_SHORT_PROMPT, user_input)
+            if not self._needs_long_prompt(result):
+                self.manipulation_prompt_stats["short"] += 1
+                return result
+        except anthropic.APIError as e:
+            print(f"LLM data manipulation detection error: {e}")
+            return self._fallback_manipulation_analysis(user_input, e)
+        except Exception as e:
+            print(f"Short manipulation prompt failed, retrying with examples: {e}")
+        
+        return await self._classify_manipulation_long(user_input)
+    
+    async def _classify_manipulation_long(self, user_input: str) -> Dict[str, Any]:
+        """Classify with the full few-shot prompt"""
+        
+        self.manipulation_prompt_stats["long"] += 1
+        
+        try:
+            return await self._call_manipulation_tool(MANIPULATION_PROMPT, user_input)
+        except Exception as e:
+            print(f"LLM data manipulation detection error: {e}")
+            return self._fallback_manipulation_analysis(user_input, e)
+    
+    async def _call_manipulation_tool(self, static_prompt: str, user_input: str) -> Dict[str, Any]:
+        # Only the user input varies per call; the static block is cached server-side
+        content = [
+            {"type": "text", "text": static_prompt, "cache_control": {"type": "ephemeral"}},
+            {"type": "text", "text": f'USER INPUT: "{user_input}"\n\nAnalyze the input now:'}
+        ]
+        
+        response = await self.claude_client.messages.create(
+            model=MANIPULATION_MODEL,
+            max_tokens=200,
+            temperature=0.1,
+            tools=[MANIPULATION_TOOL],
+            tool_choice={"type": "tool", "name": MANIPULATION_TOOL["name"]},
+            messages=[{"role": "user", "content": content}],
+            extra_headers={"anthropic-beta": "prompt-caching-2024-07-31"}
+        )
+        
+        return self._tool_input(response)
+    
+    def _needs_long_prompt(self, result: Dict[str, Any]) -> bool:
+        """Whether a short-prompt answer is incomplete or low-confidence"""
+        return (
+            any(field not in result for field in MANIPULATION_SCHEMA["required"])
+            or result["entity_type"] == "unknown"
+        )
+    
+    async def _classify_manipulation_batch(self, user_inputs: List[str]) -> List[Dict[str, Any]]:
+        """Classify several inputs with one Claude call, falling back to per-input calls"""
+        
+        numbered_inputs = "\n".join(f'[{i}] USER INPUT: "{text}"' for i, text in enumerate(user_inputs, 1))
+        content = [
+            {"type": "text", "text": MANIPULATION_SHORT_PROMPT, "cache_control": {"type": "ephemeral"}},
+            {"type": "text", "text": (
+                f"Analyze each of the following {len(user_inputs)} inputs independently. "
+                f"Report exactly {len(user_inputs)} results with the classify_operations tool, "
+                f"one per input, in the same order.\n\n{numbered_inputs}"
+            )}
+        ]
+        
         try:
-            response = self.claude_client.messages.create(
-                model="claude-3-haiku-20240307",
-                max_tokens=800,
+            response = await self.claude_client.messages.create(
+                model=MANIPULATION_MODEL,
+                max_tokens=200 * len(user_inputs),
                 temperature=0.1,
-                messages=[{"role": "user", "content": prompt}]
+                tools=[MANIPULATION_BATCH_TOOL],
+                tool_choice={"type": "tool", "name": MANIPULATION_BATCH_TOOL["name"]},
+                messages=[{"role": "user", "content": content}],
+                extra_headers={"anthropic-beta": "prompt-caching-2024-07-31"}
             )
             
-            # Extract and clean the response
-            result_text = response.content[0].text.strip()
-            
-            # Handle potential markdown code blocks
-            if result_text.startswith("```json"):
-                result_text = result_text.replace("```json", "").replace("```", "").strip()
-            elif result_text.startswith("```"):
-                result_text = result_text.replace("```", "").strip()
-            
-            # Parse JSON response
-            result = json.loads(result_text)
-            
-            return result
+            results = self._tool_input(response)["results"]
+            if len(results) == len(user_inputs):
+                # Re-run only the incomplete answers individually
+                retry = [i for i, result in enumerate(results) if self._needs_long_prompt(result)]
+                self.manipulation_prompt_stats["short"] += len(results) - len(retry)
+                if retry:
+                    retried = await asyncio.gather(*(self._classify_manipulation_long(user_inputs[i]) for i in retry))
+                    for i, result in zip(retry, retried):
+                        results[i] = result
+                return results
+            print(f"LLM batch returned {len(results)} results for {len(user_inputs)} inputs, retrying individually")
             
         except Exception as e:
-            print(f"LLM data manipulation detection error: {e}")
-            # Fallback: assume it's a search if we can't parse
-            return {
-                "is_manipulation": False,
-                "operation_type": "search",
-                "entity_type": "unknown",
-                "entity_identifier": None,
-                "target_field": None,
-                "old_value": None,
-                "new_value": None,
-                "sql_intent": f"Search for: {user_input}",
-                "requires_approval": False,
-                "error": str(e)
-            }
+            print(f"LLM batch manipulation detection error: {e}")
+        
+        return list(await asyncio.gather(*(self._classify_manipulation_single(text) for text in user_inputs)))
+    
+    def _tool_input(self, response) -> Dict[str, Any]:
+        """Return the arguments of the forced tool call in a Claude response"""
+        return next(block.input for block in response.content if block.type == "tool_use")
+    
+    def _fallback_manipulation_analysis(self, user_input: str, error: Exception) -> Dict[str, Any]:
+        # Fallback: assume it's a search if the Claude call fails
+        return {
+            "is_manipulation": False,
+            "operation_type": "search",
+            "entity_type": "unknown",
+            "entity_identifier": None,
+            "target_field": None,
+            "old_value": None,
+            "new_value": None,
+            "sql_intent": f"Search for: {user_input}",
+            "requires_approval": False,
+            "error": str(error)
+        }
     
     async def process_complete_workflow(self, user_input: str, user_id: str) -> Dict[str, Any]:
         """
@@ -242,30 +934,46 @@ Analyze the input now:
         # STEP 1: Intent Classification (Claude)
         print("📊 Step 1: Intent Classification")
         
+        # Manipulation detection only depends on the raw input, so start it
+        # alongside classification instead of after it when it's likely needed
+        classification_task = asyncio.create_task(
+            asyncio.to_thread(self.intent_orchestrator.process_user_input, user_input, user_id)
+        )
+        manipulation_task = None
+        if SPECULATIVE_DETECTION or looks_like_data_query(user_input):
+            manipulation_task = asyncio.create_task(self.detect_data_manipulation_with_llm(user_input))
+        
         try:
-            classification_result = self.intent_orchestrator.process_user_input(user_input, user_id)
+            classification_result = await classification_task
             
             classification = classification_result["classification"]
             analysis = classification_result.get("specialized_analysis")
             
             print(f"   Intent: {classification.intent.value}")
             print(f"   Confidence: {classification.confidence:.2f}")
+        except asyncio.CancelledError:
+            # Abandoned turn (e.g. a caller's timeout): don't leave detection running
+            if manipulation_task is not None:
+                manipulation_task.cancel()
+            raise
         except Exception as e:
             print(f"   Error in intent classification: {e}")
             # Fallback to data query
-            classification = type('obj', (object,), {
-                'intent': IntentType.DATA_QUERY,
-                'confidence': 0.5
-            })()
+            # SimpleNamespace rather than an ad-hoc class so the result pickles (UI result cache)
+            classification = SimpleNamespace(intent=IntentType.DATA_QUERY, confidence=0.5)
             analysis = {"target_system": "database"}
             classification_result = {"classification": classification, "specialized_analysis": analysis}
         
         # STEP 2: Route to appropriate MCP workflow
+        if classification.intent != IntentType.DATA_QUERY and manipulation_task is not None:
+            manipulation_task.cancel()
+        
         if classification.intent == IntentType.SYSTEM_INCIDENT:
             return await self._handle_system_incident_workflow(analysis, user_input, user_id, classification_result)
             
         elif classification.intent == IntentType.DATA_QUERY:
-            return await self._handle_data_query_workflow(analysis, user_input, user_id, classification_result)
+            return await self._handle_data_query_workflow(analysis, user_input, user_id, classification_result,
+                                                          manipulation_task)
             
         elif classification.intent == IntentType.INFORMATION_REQUEST:
             return await self._handle_information_workflow(analysis, user_input, user_id, classification_result)
@@ -301,33 +1009,30 @@ Analyze the input now:
             caller_id=user_id
         )
         
+        severity = analysis.get("severity", "Unknown").upper()
+        impact = analysis.get("business_impact", "System functionality affected")
+        assignment_group = analysis.get("assignment_group", "IT Support")
+        
         if ticket_result.get("success"):
             ticket_data = ticket_result.get("result", {})
+            immediate_actions = analysis.get("immediate_actions")
             
             return {
                 "workflow": "system_incident",
                 "classification_result": classification_result,
                 "mcp_result": ticket_result,
                 "success": True,
-                "message": f"""
-🚨 **Critical System Incident - Ticket Created**
-
-**Analysis Results:**
-• **Severity:** {analysis.get('severity', 'Unknown').upper()}
-• **System:** {analysis.get('affected_system', 'Unknown').title()}
-• **Impact:** {analysis.get('business_impact', 'System functionality affected')}
-
-**Ticket Created:**
-• **Ticket Number:** {ticket_data.get('ticket_number', 'Unknown')}
-• **Priority:** {analysis.get('severity', 'medium').upper()}
-• **Assigned to:** {analysis.get('assignment_group', 'IT Support')}
-• **Expected Response:** {ticket_data.get('sla_response_time', '24 hours')}
-
-**Immediate Actions:**
-{chr(10).join(f"• {action}" for action in analysis.get('immediate_actions', ['Ticket created', 'Team notified']))}
-
-You'll receive email updates as the incident progresses.
-                """.strip()
+                "message": INCIDENT_CREATED_TEMPLATE.format(
+                    severity=severity,
+                    system=analysis.get("affected_system", "Unknown").title(),
+                    impact=impact,
+                    ticket_number=ticket_data.get("ticket_number", "Unknown"),
+                    priority=analysis.get("severity", "medium").upper(),
+                    assignment_group=assignment_group,
+                    sla_response_time=ticket_data.get("sla_response_time", "24 hours"),
+                    immediate_actions="\n".join(f"• {action}" for action in immediate_actions)
+                                      if immediate_actions is not None else DEFAULT_IMMEDIATE_ACTIONS
+                )
             }
         else:
             return {
@@ -335,32 +1040,47 @@ You'll receive email updates as the incident progresses.
                 "classification_result": classification_result,
                 "mcp_result": ticket_result,
                 "success": False,
-                "message": f"""
-❌ **Incident Analysis Complete - Ticket Creation Failed**
-
-**Analysis Results:**
-• **Severity:** {analysis.get('severity', 'Unknown').upper()}
-• **Impact:** {analysis.get('business_impact', 'System functionality affected')}
-
-**Error:** {ticket_result.get('error', 'Unknown error')}
-
-**Manual Steps:**
-• Contact {analysis.get('assignment_group', 'IT Support')} directly
-• Reference this analysis in your communication
-• Escalate if critical: {"Yes" if analysis.get('escalation_needed') else "No"}
-                """.strip()
+                "message": INCIDENT_FAILED_TEMPLATE.format(
+                    severity=severity,
+                    impact=impact,
+                    error=ticket_result.get("error", "Unknown error"),
+                    assignment_group=assignment_group,
+                    escalate="Yes" if analysis.get("escalation_needed") else "No"
+                )
             }
     
     async def _handle_data_query_workflow(self, analysis: Dict[str, Any], user_input: str,
-                                         user_id: str, classification_result: Dict[str, Any]) -> Dict[str, Any]:
+                                         user_id: str, classification_result: Dict[str, Any],
+                                         manipulation_task: Optional["asyncio.Task"] = None) -> Dict[str, Any]:
         """
         Enhanced workflow with LLM-based data manipulation detection
+        
+        manipulation_task may be passed in when detection was already started
+        concurrently with intent classification.
         """
         
         print("🔍 Step 2: Data Query Workflow with LLM Detection")
         
+        table_hint = analysis.get("target_system", "").replace("_db", "") if analysis else None
+        
         # Step 1: Use LLM to analyze the request
-        manipulation_analysis = await self.detect_data_manipulation_with_llm(user_input)
+        if manipulation_task is None:
+            manipulation_task = asyncio.create_task(self.detect_data_manipulation_with_llm(user_input))
+        
+        # The database search is read-only, so start it while detection is still
+        # running and throw it away if the request turns out to be a manipulation
+        search_task = None
+        if SPECULATIVE_SEARCH:
+            search_task = asyncio.create_task(
+                self.mcp_client.search_database(query=user_input, table_hint=table_hint)
+            )
+        
+        try:
+            manipulation_analysis = await manipulation_task
+        except asyncio.CancelledError:
+            if search_task is not None:
+                search_task.cancel()
+            raise
         
         print(f"   🤖 LLM Analysis: {manipulation_analysis['operation_type']} operation")
         print(f"   📝 Is Manipulation: {manipulation_analysis['is_manipulation']}")
@@ -370,36 +1090,30 @@ You'll receive email updates as the incident progresses.
             # This is a data manipulation request - create approval ticket
             print("🎫 Step 3: Data manipulation detected - Creating approval request")
             
+            if search_task is not None:
+                search_task.cancel()
+            
             ticket_result = await self._create_data_manipulation_approval(
                 user_input, user_id, manipulation_analysis
             )
             
-            return {
+            return self._check_ticket({
                 "workflow": "data_manipulation_approval",
                 "classification_result": classification_result,
                 "manipulation_analysis": manipulation_analysis,
                 "ticket_result": ticket_result,
                 "success": True,
-                "message": f"""
-🔒 **Data Manipulation Request - Admin Approval Required**
-
-**Operation:** {manipulation_analysis['operation_type'].upper()}
-**Entity:** {manipulation_analysis['entity_type'].title()} - {manipulation_analysis['entity_identifier']}
-**Change:** {manipulation_analysis['target_field']} from '{manipulation_analysis['old_value']}' to '{manipulation_analysis['new_value']}'
-
-**SQL Intent:** {manipulation_analysis['sql_intent']}
-
-✅ **Approval Request Created:**
-• **Ticket Number:** {ticket_result.get("result", {}).get("request_number", "Unknown")}
-• **Assigned to:** Data Administration Team
-• **Priority:** Medium
-• **Expected Response:** 24-48 hours
-
-**⚠️ Important:** This operation will modify live data and requires admin approval for safety.
-
-You'll receive an email notification once the request is reviewed.
-                """.strip()
-            }
+                "message": MANIPULATION_APPROVAL_TEMPLATE.format(
+                    operation=manipulation_analysis["operation_type"].upper(),
+                    entity_type=manipulation_analysis["entity_type"].title(),
+                    entity_identifier=manipulation_analysis["entity_identifier"],
+                    target_field=manipulation_analysis["target_field"],
+                    old_value=manipulation_analysis["old_value"],
+                    new_value=manipulation_analysis["new_value"],
+                    sql_intent=manipulation_analysis["sql_intent"],
+                    ticket_number=ticket_result.get("result", {}).get("request_number", "Unknown")
+                )
+            })
         
         else:
             # This is a search operation - proceed with normal database search
@@ -408,10 +1122,10 @@ You'll receive an email notification once the request is reviewed.
             # Check if this is a "missing data" query for ticket creation
             is_missing_query = self.is_missing_data_query(user_input)
             
-            search_result = await self.mcp_client.search_database(
-                query=user_input,
-                table_hint=analysis.get("target_system", "").replace("_db", "") if analysis else None
-            )
+            if search_task is not None:
+                search_result = await search_task
+            else:
+                search_result = await self.mcp_client.search_database(query=user_input, table_hint=table_hint)
             
             if search_result.get("success"):
                 results = search_result.get("results", [])
@@ -422,42 +1136,30 @@ You'll receive an email notification once the request is reviewed.
                         "classification_result": classification_result,
                         "mcp_result": search_result,
                         "success": True,
-                        "message": f"""
-🔍 **Database Search Results**
-
-**Query:** {user_input}
-**Results Found:** {len(results)}
-
-**Data Preview:**
-{self._format_search_results(results[:3])}
-
-{"... and " + str(len(results) - 3) + " more results" if len(results) > 3 else ""}
-                        """.strip()
+                        "message": SEARCH_RESULTS_TEMPLATE.format(
+                            query=user_input,
+                            count=len(results),
+                            preview=self._format_search_results(results[:3]),
+                            more=f"... and {len(results) - 3} more results" if len(results) > 3 else ""
+                        ).strip()
                     }
                 
                 elif is_missing_query:
                     # Missing data - create investigation ticket
                     ticket_result = await self._create_missing_data_ticket(user_input, user_id, search_result)
                     
-                    return {
+                    return self._check_ticket({
                         "workflow": "missing_data_investigation", 
                         "classification_result": classification_result,
                         "search_result": search_result,
                         "ticket_result": ticket_result,
                         "success": True,
-                        "message": f"""
-📋 **Missing Data Investigation Initiated**
-
-**Query:** {user_input}
-**Status:** No records found in database
-
-✅ **Investigation Ticket Created:**
-• **Ticket Number:** {ticket_result.get("result", {}).get("request_number", "Unknown")}
-• **Assigned to:** {self._get_assignment_group(user_input)}
-
-The appropriate team will investigate and contact you with findings.
-                        """.strip()
-                    }
+                        "message": MISSING_DATA_TEMPLATE.format(
+                            query=user_input,
+                            ticket_number=ticket_result.get("result", {}).get("request_number", "Unknown"),
+                            assignment_group=self._get_assignment_group(user_input)
+                        )
+                    })
                 
                 else:
                     # Regular search with no results
@@ -466,17 +1168,7 @@ The appropriate team will investigate and contact you with findings.
                         "classification_result": classification_result,
                         "mcp_result": search_result,
                         "success": True,
-                        "message": f"""
-🔍 **Database Search Complete**
-
-**Query:** {user_input}
-**Results Found:** 0
-
-No matching records found. Try:
-• Checking spelling of search terms
-• Using partial names or numbers
-• Broadening your search criteria
-                        """.strip()
+                        "message": NO_RESULTS_TEMPLATE.format(query=user_input)
                     }
             
             else:
@@ -486,14 +1178,10 @@ No matching records found. Try:
                     "classification_result": classification_result,
                     "mcp_result": search_result,
                     "success": False,
-                    "message": f"""
-❌ **Database Search Failed**
-
-**Query:** {user_input}
-**Error:** {search_result.get('error', 'Unknown error')}
-
-Please try again or contact support.
-                    """.strip()
+                    "message": SEARCH_FAILED_TEMPLATE.format(
+                        query=user_input,
+                        error=search_result.get("error", "Unknown error")
+                    )
                 }
     
     # NEW: Research Query Workflow Handler
@@ -530,25 +1218,10 @@ Please try again or contact support.
                 "classification_result": classification_result,
                 "research_result": research_result,
                 "success": False,
-                "message": f"""
-❌ **Research Query Processing Failed**
-
-**Query:** {user_input}
-**Error:** {research_result.get('error', 'Research system unavailable')}
-
-**Alternative Resources:**
-• Academic databases (IEEE, ACM, arXiv)
-• Company knowledge base
-• Technical documentation
-• Subject matter experts
-
-**Next Steps:**
-• Try rephrasing your research question
-• Check if research MCP server is running
-• Contact research support team
-
-Would you like me to help you rephrase your research question?
-                """.strip()
+                "message": RESEARCH_FAILED_TEMPLATE.format(
+                    query=user_input,
+                    error=research_result.get("error", "Research system unavailable")
+                )
             }
     
     async def _create_data_manipulation_approval(self, user_input: str, user_id: str, 
@@ -561,38 +1234,19 @@ Would you like me to help you rephrase your research question?
         entity_type = manipulation_analysis["entity_type"].title()
         entity_id = manipulation_analysis["entity_identifier"]
         
-        return await self.mcp_client.create_service_request(
+        return await self._enqueue_service_request(
             title=f"Data {operation} Approval: {entity_type} {entity_id}",
-            description=f"""
-**Data Manipulation Approval Request**
-
-**Original Request:** {user_input}
-**Requested by:** {user_id}
-**Operation Type:** {operation}
-
-**Entity Details:**
-• Type: {entity_type}
-• Identifier: {entity_id}
-• Field: {manipulation_analysis["target_field"]}
-• Current Value: {manipulation_analysis["old_value"]}
-• New Value: {manipulation_analysis["new_value"]}
-
-**SQL Intent:** 
-{manipulation_analysis["sql_intent"]}
-
-**Risk Assessment:**
-• Data manipulation operation detected
-• Requires admin review for data integrity
-• Backup recommended before execution
-
-**Approval Required:**
-Please review this request and either:
-1. ✅ Approve and execute the change
-2. ❌ Reject with reason
-3. 🔄 Request clarification from user
-
-**Note:** All data manipulation operations require approval for safety and audit compliance.
-            """.strip(),
+            description=APPROVAL_TICKET_TEMPLATE.format(
+                user_input=user_input,
+                user_id=user_id,
+                operation=operation,
+                entity_type=entity_type,
+                entity_identifier=entity_id,
+                target_field=manipulation_analysis["target_field"],
+                old_value=manipulation_analysis["old_value"],
+                new_value=manipulation_analysis["new_value"],
+                sql_intent=manipulation_analysis["sql_intent"]
+            ),
             priority="medium",
             assignment_group="Data Administration Team",
             caller_id=user_id,
@@ -604,29 +1258,15 @@ Please review this request and either:
         
         assignment_group = self._get_assignment_group(user_input)
         
-        return await self.mcp_client.create_service_request(
+        return await self._enqueue_service_request(
             title=f"Missing Data Investigation: {user_input[:60]}{'...' if len(user_input) > 60 else ''}",
-            description=f"""
-**Missing Data Investigation Request**
-
-**Original Query:** {user_input}
-**Reported by:** {user_id}
-**Search Result:** No matching records found
-
-**Database Search Details:**
-• SQL Generated: {search_result.get('sql_generated', 'N/A')}
-• Tables Searched: {', '.join(search_result.get('tables_searched', ['Unknown']))}
-• Search Confidence: {search_result.get('confidence', 'N/A')}
-
-**Investigation Required:**
-Please investigate why the requested data is not available and provide status to the user.
-
-**Possible Actions:**
-• Verify data entry status
-• Check data synchronization
-• Review access permissions
-• Contact source system owners
-            """.strip(),
+            description=MISSING_DATA_TICKET_TEMPLATE.format(
+                user_input=user_input,
+                user_id=user_id,
+                sql_generated=search_result.get("sql_generated", "N/A"),
+                tables_searched=", ".join(search_result.get("tables_searched", ["Unknown"])),
+                confidence=search_result.get("confidence", "N/A")
+            ),
             priority="medium",
             assignment_group=assignment_group,
             caller_id=user_id,
@@ -635,17 +1275,7 @@ Please investigate why the requested data is not available and provide status to
 
     def _get_assignment_group(self, user_input: str) -> str:
         """Determine appropriate assignment group based on query content"""
-        
-        query_lower = user_input.lower()
-        
-        if "claim" in query_lower:
-            return "Brazil Claims Team"
-        elif "engine" in query_lower:
-            return "Engine Data Team"
-        elif "warranty" in query_lower:
-            return "Warranty Support Team"
-        else:
-            return "Data Support Team"
+        return get_assignment_group(user_input)
     
     async def _handle_information_workflow(self, analysis: Dict[str, Any], user_input: str,
                                          user_id: str, classification_result: Dict[str, Any]) -> Dict[str, Any]:
@@ -659,74 +1289,14 @@ Please investigate why the requested data is not available and provide status to
         topic = analysis.get("topic_area", "general") if analysis else "general"
         category = analysis.get("info_category", "general") if analysis else "general"
         
-        knowledge_responses = {
-            "claims": {
-                "process": """
-📋 **Brazil Claims Upload Process**
-
-**Steps:**
-1. **Data Collection:** Gather claim details (customer info, product serial, issue description)
-2. **Validation:** Verify claim meets warranty criteria
-3. **System Entry:** Upload to reliability system via web portal
-4. **Review:** Brazil Claims team reviews within 24-48 hours
-5. **Processing:** Approved claims enter payment workflow
-
-**Required Fields:**
-• Customer Name and Contact
-• Product Serial Number
-• Claim Date and Amount
-• Issue Description
-• Supporting Documentation
-
-**Upload Methods:**
-• Web Portal: https://claims.company.com
-• Bulk Upload: Excel template available
-• API Integration: For automated systems
-                """,
-                "technical": """
-🔧 **Technical Integration Details**
-
-**API Endpoints:**
-• POST /api/claims/create - Create new claim
-• GET /api/claims/{id} - Retrieve claim details
-• PUT /api/claims/{id} - Update claim status
-
-**Database Schema:**
-• claims.claim_id (Primary Key)
-• claims.customer_info (JSON)
-• claims.product_data (Foreign Key)
-• claims.status_history (Audit Trail)
-
-**Data Flow:**
-1. Claims Portal → API Gateway
-2. API Gateway → Validation Service
-3. Validation Service → Database
-4. Database → Reliability System Sync
-                """
-            }
-        }
-        
-        if topic in knowledge_responses and category in knowledge_responses[topic]:
-            knowledge_content = knowledge_responses[topic][category]
+        if topic in KNOWLEDGE_RESPONSES and category in KNOWLEDGE_RESPONSES[topic]:
+            knowledge_content = KNOWLEDGE_RESPONSES[topic][category]
         else:
-            knowledge_content = f"""
-📚 **Information Request: {topic.title()} - {category.title()}**
-
-I understand you're looking for information about {topic} processes. 
-
-**Available Resources:**
-• Internal Documentation Portal
-• Process Wiki Pages  
-• Training Materials
-• Subject Matter Experts
-
-**Recommended Next Steps:**
-• Check the internal knowledge base
-• Contact the {topic} team directly
-• Schedule a training session
-
-For specific technical details, please contact the appropriate team or submit a detailed information request.
-            """.strip()
+            knowledge_content = INFORMATION_FALLBACK_TEMPLATE.format(
+                topic=topic,
+                topic_title=topic.title(),
+                category_title=category.title()
+            )
         
         return {
             "workflow": "information_request",
@@ -741,14 +1311,16 @@ For specific technical details, please contact the appropriate team or submit a
         if not results:
             return "No results found"
         
-        formatted = ""
+        parts = []
         for i, result in enumerate(results, 1):
-            formatted += f"\n**Result {i}:**\n"
-            for key, value in result.items():
-                if key not in ['sys_id', 'last_updated']:  # Skip technical fields
-                    formatted += f"  • {key.replace('_', ' ').title()}: {value}\n"
+            parts.append(f"\n**Result {i}:**")
+            parts.extend(
+                f"  • {key.replace('_', ' ').title()}: {value}"
+                for key, value in result.items()
+                if key not in SKIPPED_RESULT_FIELDS
+            )
         
-        return formatted.strip()
+        return "\n".join(parts).strip()
 
 # Example usage for testing
 async def test_complete_workflow():
@@ -779,6 +1351,9 @@ async def test_complete_workflow():
         print(f"Workflow: {result['workflow']}")
         print(f"Success: {result.get('success', 'N/A')}")
         print(f"Message:\n{result['message']}")
+    
+    await workflow.close()
 
 if __name__ == "__main__":
+    print(f"Event loop: {'uvloop' if use_uvloop() else 'asyncio'}")
     asyncio.run(test_complete_workflow())
\ No newline at end of file
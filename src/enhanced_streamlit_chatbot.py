@@ -1,15 +1,262 @@
 #!/usr/bin/env python3
 """
 Enhanced Chatbot Client - COMPLETE FIXED VERSION
-Uses direct HTTP calls for research server to avoid SSE issues
+Uses direct HTTP tool calls; SSE only for servers without /tools/call
 """
 
 import asyncio
-import json
+import hashlib
+import logging
+import sys
+import time
 import aiohttp
-from typing import Dict, Any, Optional
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Any, List, Optional, Tuple
 from mcp import ClientSession
 from mcp.client.sse import sse_client
+from pydantic import BaseModel, ConfigDict, ValidationError
+from common import (
+    RequestBatcher, bullet_list, configure_logging, use_uvloop,
+    json_dumps, json_dumps_bytes, json_dumps_sorted, json_loads
+)
+
+# Workflow step tracing; %-style arguments so nothing is formatted unless enabled
+logger = logging.getLogger(__name__)
+
+# Read-only tools whose results are cached per (server, tool, arguments),
+# with the TTL in seconds. Mutating tools (update_engine_attribute,
+# create_incident_ticket, create_service_request, ...) are never cached.
+CACHEABLE_TOOL_TTLS = {
+    "verify_claim_exists": 60,
+    "search_research_papers": 600,
+    "analyze_research_topic": 600,
+    "find_paper_relationships": 600
+}
+TOOL_CACHE_SIZE = 1024
+
+# Upper bound on in-flight tool calls per MCP server
+MAX_CONCURRENT_CALLS_PER_SERVER = 32
+
+# Headers for tool-call bodies that are already JSON-encoded
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Default timeout for the pooled HTTP session, built once. The connect
+# limit is sock_connect rather than connect: connect arms a timer around
+# every pool acquisition, sock_connect only when a new socket is opened,
+# so requests on reused keep-alive connections skip it.
+HTTP_TOOL_TIMEOUT = aiohttp.ClientTimeout(total=30, sock_connect=5, sock_read=25)
+
+def batch_timeout(count: int) -> aiohttp.ClientTimeout:
+    """HTTP_TOOL_TIMEOUT scaled for a batch of count queries the server may not fully overlap"""
+    return aiohttp.ClientTimeout(
+        total=HTTP_TOOL_TIMEOUT.total * count,
+        sock_connect=HTTP_TOOL_TIMEOUT.sock_connect,
+        sock_read=HTTP_TOOL_TIMEOUT.sock_read * count
+    )
+
+# ================================
+# Response Templates
+# ================================
+
+# Static message bodies, filled with str.format() per request. Templates that
+# end in a placeholder are stripped after formatting instead of at import.
+MISSING_CLAIM_TICKET_TEMPLATE = """
+Investigation Request for Missing Brazil Claim
+
+Claim Number: {claim_number}
+Reported by: {user_id}
+Search Result: Claim not found in system database
+
+Possible reasons for missing claim:
+{reasons}
+
+Next steps required:
+{next_steps}
+
+Please investigate and update the requestor with findings.
+""".strip()
+
+MISSING_CLAIM_CREATED_TEMPLATE = """
+📋 **Missing Claim Investigation Initiated**
+
+**Claim Number:** {claim_number}
+**Status:** Not found in system database
+
+✅ **Service Request Created:**
+• **Ticket Number:** {ticket_number}
+• **Assigned to:** Brazil Claims Team
+• **Priority:** Medium
+• **Expected Response:** 24-48 hours
+
+The Brazil Claims team will investigate and contact you with findings.
+""".strip()
+
+MISSING_CLAIM_ESCALATION_TEMPLATE = """
+❌ **Automated Process Failed**
+
+Claim {claim_number} not found and ticket creation failed.
+Error: {error}
+
+Please contact Brazil Claims team directly:
+• Email: brazil.claims@company.com
+• Phone: +55 11 1234-5678
+""".strip()
+
+CLAIM_SEARCH_FAILED_TEMPLATE = """
+❌ **Database Search Failed**
+
+Unable to search for claim {claim_number} due to system error.
+Error: {error}
+
+Please try again later or contact IT support.
+""".strip()
+
+ENGINE_UPDATED_TEMPLATE = """
+✅ **Engine Updated Successfully**
+
+**Engine Serial:** {serial_number}
+**Attribute:** {attribute}
+**New Value:** {new_value}
+**Updated:** {updated_at}
+
+The change has been applied immediately as this is a non-sensitive attribute.
+""".strip()
+
+ENGINE_APPROVAL_TEMPLATE = """
+⏳ **Approval Required for Engine Update**
+
+**Engine Serial:** {serial_number}
+**Requested Change:** {change}
+**Approval ID:** {approval_id}
+
+**Status:** {status}
+**Expected Timeline:** {timeline}
+
+An admin has been notified and will review your request. You'll receive an email update once the decision is made.
+
+**Justification Provided:** {justification}
+"""
+
+ENGINE_UPDATE_FAILED_TEMPLATE = """
+❌ **Engine Update Failed**
+
+**Engine Serial:** {serial_number}
+**Requested Change:** {attribute} -> {new_value}
+**Error:** {error}
+
+Please verify the engine serial number and attribute name, then try again.
+""".strip()
+
+RESEARCH_RESULTS_TEMPLATE = """
+    📊 **Research Query Results**
+
+    **Query:** {query}
+
+    **Answer:**
+    {answer}
+
+    **Research Analysis:**
+    • **Entities Found:** {entities_found}
+    • **Reasoning Paths:** {reasoning_paths}
+    • **Knowledge Connections:** {context_triples}
+
+    **Key Research Entities:**
+    {entities}
+
+    **Top Reasoning Paths:**
+    {paths}
+"""
+
+RESEARCH_FAILED_TEMPLATE = """
+    ❌ **Research Query Failed**
+
+    **Query:** {query}
+    **Error:** {error}
+
+    **Debug Info:**
+    • Full result: {debug}...
+
+    **Suggestions:**
+    • Check if research MCP server is running on port 8084
+    • Verify Neo4j database connection
+    • Try rephrasing your research question
+    • Contact research support team
+""".strip()
+
+RESEARCH_ERROR_TEMPLATE = """
+    ❌ **Research Workflow Error**
+
+    **Query:** {query}
+    **Error:** {error}
+
+    Please try again or contact technical support.
+""".strip()
+
+# ================================
+# Tool Argument Models
+# ================================
+
+# Validated, immutable argument sets for each MCP tool; bad arguments are
+# rejected client-side instead of costing a server round trip
+class ToolArgs(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+class SearchDatabaseArgs(ToolArgs):
+    query: str
+    table_hint: Optional[str] = None
+
+class VerifyClaimArgs(ToolArgs):
+    claim_number: str
+
+class UpdateEngineAttributeArgs(ToolArgs):
+    serial_number: str
+    attribute: str
+    new_value: str
+    user_id: str
+    justification: str
+
+class CreateIncidentArgs(ToolArgs):
+    title: str
+    description: str
+    priority: str
+    urgency: str
+    assignment_group: str
+    caller_id: str
+
+class CreateServiceRequestArgs(ToolArgs):
+    title: str
+    description: str
+    priority: str
+    assignment_group: str
+    caller_id: str
+    category: str
+
+class SearchResearchPapersArgs(ToolArgs):
+    query: str
+    max_results: int = 10
+    include_reasoning: bool = True
+    fields: Optional[List[str]] = None
+    allow_refs: Optional[bool] = None  # omitted from the payload unless set
+
+class AnalyzeResearchTopicArgs(ToolArgs):
+    topic: str
+    analysis_type: str = "comprehensive"
+
+class FindPaperRelationshipsArgs(ToolArgs):
+    concept1: str
+    concept2: str
+    max_hops: int = 3
+
+def invalid_arguments(tool_name: str, error: ValidationError) -> Dict[str, Any]:
+    """Error result for arguments that failed validation"""
+    return {"success": False, "error": f"Invalid arguments for {tool_name}: {error}"}
+
+# Concurrent search_research_papers calls arriving within this window are
+# sent to the research server as one search_research_papers_batch request.
+# The batch request's timeout grows with its size, so batches stay small.
+RESEARCH_BATCHING = True
+RESEARCH_BATCH_WINDOW = 0.01
+RESEARCH_BATCH_SIZE = 8
 
 class MultiMCPClient:
     """Client that coordinates multiple MCP servers - FIXED VERSION"""
@@ -21,152 +268,561 @@ class MultiMCPClient:
             "knowledge": "http://localhost:8084/sse",
             "research": "http://localhost:8084"  # FIXED: Use direct HTTP for research
         }
+        
+        # Transport per server, resolved once instead of branching on every call
+        self._urls = {name: sys.intern(url) for name, url in self.servers.items()}
+        self._dispatch = {
+            "servicenow": self._call_http_tool,
+            "database": self._call_http_tool,
+            "knowledge": self._call_sse_tool,
+            "research": self._call_http_tool  # FIXED: Use direct HTTP for research
+        }
+        
+        # Request/response tools go over plain HTTP POST /tools/call, skipping
+        # the SSE session and JSON-RPC framing
+        self._tool_call_urls = {
+            name: sys.intern(f"{self._urls[name].removesuffix('/sse')}/tools/call")
+            for name, call in self._dispatch.items() if call == self._call_http_tool
+        }
+        
+        # Shared keep-alive HTTP session for tool calls (created lazily)
+        self._http_session: Optional[aiohttp.ClientSession] = None
+        self._http_session_loop = None
+        
+        # Persistent initialized MCP sessions, one per SSE server, with a lock
+        # per server so calls to one server are serialized but servers run in parallel.
+        # Each session is opened and closed by its own owner task (anyio cancel
+        # scopes must be exited by the task that entered them); callers get it
+        # through a future.
+        self._sessions: Dict[str, "asyncio.Future[ClientSession]"] = {}
+        self._session_owners: Dict[str, Tuple[asyncio.Task, asyncio.Event]] = {}
+        self._session_locks: Dict[str, asyncio.Lock] = {}
+        self._session_loop = None
+        
+        # Per-server admission control, rebuilt with the sessions on a new loop
+        self._limiters: Dict[str, asyncio.Semaphore] = {}
+        
+        # Single-flight: identical concurrent read-only calls share one in-flight task
+        self._inflight: Dict[str, asyncio.Task] = {}
+        
+        # LRU of cacheable tool results: key -> (expires_at, result)
+        self._cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        
+        # Coalesces concurrent research searches into batched requests
+        self._research_batcher = RequestBatcher(
+            lambda arguments: self._call_mcp_tool("research", "search_research_papers", arguments),
+            self._search_research_papers_many,
+            window=RESEARCH_BATCH_WINDOW,
+            max_batch=RESEARCH_BATCH_SIZE
+        )
     
-    async def _call_mcp_tool(self, server_name: str, tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
-        """Call a tool on a specific MCP server"""
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+    
+    async def close(self):
+        """Close pooled MCP sessions and the HTTP session"""
+        for server_name in list(self._sessions):
+            await self._drop_session(server_name)
         
-        # SPECIAL HANDLING: Use direct HTTP for research server
-        if server_name == "research":
-            return await self._call_research_tool_direct(tool_name, arguments)
+        if self._http_session is not None and not self._http_session.closed:
+            await self._http_session.close()
+        self._http_session = None
+    
+    async def _get_http_session(self) -> aiohttp.ClientSession:
+        """Return the pooled research HTTP session, creating it on first use"""
         
-        # Original SSE implementation for other servers
-        server_url = self.servers.get(server_name)
-        if not server_url:
-            return {"error": f"Server {server_name} not configured"}
+        loop = asyncio.get_running_loop()
+        
+        # aiohttp sessions are tied to the loop that created them; callers that
+        # use a fresh asyncio.run() per request get a new pool for that loop
+        if self._http_session is None or self._http_session.closed or self._http_session_loop is not loop:
+            self._discard_http_session()
+            self._http_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=100,
+                    limit_per_host=MAX_CONCURRENT_CALLS_PER_SERVER,
+                    keepalive_timeout=60
+                ),
+                timeout=HTTP_TOOL_TIMEOUT,
+                json_serialize=json_dumps
+            )
+            self._http_session_loop = loop
+        
+        return self._http_session
+    
+    def _discard_http_session(self):
+        """Close a session left over from another loop before it's replaced"""
+        
+        session, session_loop = self._http_session, self._http_session_loop
+        if session is None or session.closed:
+            return
+        
+        # The session can only be closed on its own loop
+        if session_loop is not None and session_loop.is_running():
+            asyncio.run_coroutine_threadsafe(session.close(), session_loop)
+        else:
+            logger.warning(
+                "Replacing an HTTP session whose event loop has finished; "
+                "await close() before the loop ends to release its connections"
+            )
+    
+    def _bind_loop(self):
+        """Sessions, locks and limiters are bound to the loop that created them; start over on a new loop"""
+        
+        loop = asyncio.get_running_loop()
+        if self._session_loop is not loop:
+            self._sessions = {}
+            self._session_owners = {}
+            self._session_locks = {}
+            self._limiters = {}
+            self._inflight = {}
+            self._session_loop = loop
+    
+    async def _get_session(self, server_name: str, server_url: str) -> ClientSession:
+        """Return an initialized MCP session for a server, connecting on first use"""
+        
+        ready = self._sessions.get(server_name)
+        if ready is None:
+            ready = asyncio.get_running_loop().create_future()
+            stop = asyncio.Event()
+            owner = asyncio.create_task(self._own_session(server_name, server_url, ready, stop))
+            self._sessions[server_name] = ready
+            self._session_owners[server_name] = (owner, stop)
+        
+        # Shielded: a cancelled caller must not cancel the shared future
+        return await asyncio.shield(ready)
+    
+    async def _own_session(self, server_name: str, server_url: str,
+                           ready: "asyncio.Future[ClientSession]", stop: asyncio.Event):
+        """Owner task: open the SSE session, publish it through ready, close it once stop is set"""
         
         try:
             async with sse_client(server_url) as (read_stream, write_stream):
                 async with ClientSession(read_stream, write_stream) as session:
                     await session.initialize()
-                    
-                    result = await session.call_tool(tool_name, arguments=arguments)
-                    
-                    if hasattr(result, 'content') and result.content:
-                        return json.loads(result.content[0].text)
-                    else:
-                        return {"error": "No response from MCP server"}
-                        
+                    ready.set_result(session)
+                    await stop.wait()
         except Exception as e:
-            return {"error": f"MCP call failed: {str(e)}"}
+            if not ready.done():
+                ready.set_exception(e)
+            else:
+                logger.warning("MCP session for %s ended: %s", server_name, e)
+        finally:
+            if not ready.done():
+                ready.cancel()
+    
+    async def _drop_session(self, server_name: str):
+        """Forget a server's session and have its owner task close the connection"""
+        
+        self._sessions.pop(server_name, None)
+        owner = self._session_owners.pop(server_name, None)
+        if owner is not None:
+            task, stop = owner
+            stop.set()
+            await asyncio.gather(task, return_exceptions=True)
+    
+    def _cache_key(self, server_name: str, tool_name: str, arguments: Dict[str, Any]) -> str:
+        raw = f"{server_name}:{tool_name}:".encode() + json_dumps_sorted(arguments)
+        return hashlib.blake2b(raw, digest_size=16).hexdigest()
+    
+    async def _call_mcp_tool(self, server_name: str, tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Call a tool on a specific MCP server
+        
+        Read-only tools are served from the TTL cache; on a miss, identical
+        concurrent calls (e.g. a double-submitted request) share one real call.
+        Mutating tools always make their own call.
+        """
+        
+        ttl = CACHEABLE_TOOL_TTLS.get(tool_name)
+        if ttl is None:
+            return await self._call_mcp_tool_uncached(server_name, tool_name, arguments)
+        
+        key = self._cache_key(server_name, tool_name, arguments)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+        
+        self._bind_loop()
+        task = self._inflight.get(key)
+        if task is None:
+            # The shared call runs as its own task, so cancelling whichever
+            # caller started it doesn't cancel it for the others
+            task = asyncio.create_task(self._shared_call(key, server_name, tool_name, arguments, ttl))
+            self._inflight[key] = task
+            task.add_done_callback(
+                lambda _: self._inflight.pop(key) if self._inflight.get(key) is task else None
+            )
+        
+        # Shielded: a caller that times out leaves the call running for the
+        # others, and its result still lands in the cache
+        return await asyncio.shield(task)
     
-    async def _call_research_tool_direct(self, tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
-        """FIXED: Direct HTTP call to research server to avoid SSE issues"""
+    async def _shared_call(self, key: str, server_name: str, tool_name: str,
+                           arguments: Dict[str, Any], ttl: float) -> Dict[str, Any]:
+        result = await self._call_mcp_tool_uncached(server_name, tool_name, arguments)
+        self._cache_put(key, result, ttl)
+        return result
+    
+    def _cache_get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._cache.get(key)
+        if entry is not None and time.monotonic() < entry[0]:
+            self._cache.move_to_end(key)
+            return entry[1]
+        return None
+    
+    def _cache_put(self, key: str, result: Dict[str, Any], ttl: float):
+        # Only successful results are cached so transient failures are retried
+        if "error" in result or not result.get("success", True):
+            return
+        
+        # answer_url/reasoning_url point into the research server's small LRU
+        # and can be evicted while a cache entry here is still live
+        if "answer_url" in result or "reasoning_url" in result:
+            return
+        
+        # Servers can override caching per result via _meta.cache_hint:
+        # "no-cache" / "private" skip the (shared, not per-user) cache and
+        # {"ttl": N} replaces the default TTL
+        meta = result.get("_meta")
+        hint = meta.get("cache_hint") if isinstance(meta, dict) else None
+        if hint in ("no-cache", "private"):
+            return
+        if isinstance(hint, dict) and "ttl" in hint:
+            ttl = hint["ttl"]
+        
+        self._cache[key] = (time.monotonic() + ttl, result)
+        self._cache.move_to_end(key)
+        if len(self._cache) > TOOL_CACHE_SIZE:
+            self._cache.popitem(last=False)
+    
+    async def _call_mcp_tool_uncached(self, server_name: str, tool_name: str, arguments: Dict[str, Any],
+                                      timeout: Optional[aiohttp.ClientTimeout] = None) -> Dict[str, Any]:
+        """Call a tool on a specific MCP server; timeout overrides HTTP_TOOL_TIMEOUT for HTTP tool calls"""
+        
+        call = self._dispatch.get(server_name)
+        if call is None:
+            return {"error": f"Server {server_name} not configured"}
+        
+        self._bind_loop()
+        
+        limiter = self._limiters.get(server_name)
+        if limiter is None:
+            limiter = self._limiters[server_name] = asyncio.Semaphore(MAX_CONCURRENT_CALLS_PER_SERVER)
+        
+        async with limiter:
+            return await call(server_name, tool_name, arguments, timeout)
+    
+    async def _call_sse_tool(self, server_name: str, tool_name: str, arguments: Dict[str, Any],
+                             timeout: Optional[aiohttp.ClientTimeout] = None) -> Dict[str, Any]:
+        """Call a tool over the server's persistent SSE session (timeout is for HTTP calls only)"""
+        
+        server_url = self._urls[server_name]
+        lock = self._session_locks.setdefault(server_name, asyncio.Lock())
         
         try:
-            research_base_url = self.servers["research"]
+            async with lock:
+                session = await self._get_session(server_name, server_url)
+                result = await session.call_tool(tool_name, arguments=arguments)
             
-            # Prepare the request payload
-            payload = {
+            if hasattr(result, 'content') and result.content:
+                return json_loads(result.content[0].text)
+            else:
+                return {"error": "No response from MCP server"}
+                
+        except Exception as e:
+            # The connection may be broken; reconnect on the next call
+            await self._drop_session(server_name)
+            return {"error": f"MCP call failed: {str(e)}"}
+    
+    async def _call_http_tool(self, server_name: str, tool_name: str, arguments: Dict[str, Any],
+                              timeout: Optional[aiohttp.ClientTimeout] = None) -> Dict[str, Any]:
+        """FIXED: Direct HTTP tool call to avoid SSE issues"""
+        
+        try:
+            # Encode the request payload straight to bytes, skipping aiohttp's
+            # str -> bytes pass over long ticket descriptions
+            body = json_dumps_bytes({
                 "name": tool_name,
                 "arguments": arguments
-            }
+            })
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{research_base_url}/tools/call",
-                    json=payload,
-                    timeout=aiohttp.ClientTimeout(total=30)
-                ) as response:
+            session = await self._get_http_session()
+            async with session.post(
+                self._tool_call_urls[server_name],
+                data=body,
+                headers=JSON_HEADERS,
+                timeout=timeout or HTTP_TOOL_TIMEOUT
+            ) as response:
+                
+                if response.status == 200:
+                    result = json_loads(await response.read())
+                    return result
+                elif response.status == 404 and self._urls[server_name].endswith("/sse"):
+                    # Older server without /tools/call: use its SSE endpoint from now on
+                    self._dispatch[server_name] = self._call_sse_tool
+                else:
+                    error_text = await response.text()
+                    return {
+                        "success": False,
+                        "error": f"HTTP {response.status}: {error_text}"
+                    }
                     
-                    if response.status == 200:
-                        result = await response.json()
-                        return result
-                    else:
-                        error_text = await response.text()
-                        return {
-                            "success": False,
-                            "error": f"HTTP {response.status}: {error_text}"
-                        }
-                        
         except asyncio.TimeoutError:
             return {
                 "success": False,
-                "error": "Research server timeout - query took too long"
+                "error": f"{server_name.title()} server timeout - query took too long"
             }
         except Exception as e:
             return {
                 "success": False,
-                "error": f"Research server call failed: {str(e)}"
+                "error": f"{server_name.title()} server call failed: {str(e)}"
             }
+        
+        return await self._call_sse_tool(server_name, tool_name, arguments)
+    
+    async def map(self, call: Callable[[Any], Awaitable[Dict[str, Any]]], inputs: List[Any],
+                  concurrency: int = MAX_CONCURRENT_CALLS_PER_SERVER) -> List[Dict[str, Any]]:
+        """
+        Run call(item) for every input with at most `concurrency` in flight
+        
+        Items are fed to a fixed pool of workers through a queue, so large
+        fan-outs (e.g. bulk claim verification) don't create one task per
+        input. Results come back in input order; a failing item yields an
+        error dict instead of aborting the rest.
+        """
+        
+        queue: asyncio.Queue = asyncio.Queue()
+        for index, item in enumerate(inputs):
+            queue.put_nowait((index, item))
+        
+        results: List[Optional[Dict[str, Any]]] = [None] * len(inputs)
+        
+        async def worker():
+            while not queue.empty():
+                index, item = queue.get_nowait()
+                try:
+                    results[index] = await call(item)
+                except Exception as e:
+                    results[index] = {"success": False, "error": str(e)}
+        
+        await asyncio.gather(*(worker() for _ in range(min(concurrency, len(inputs)))))
+        return results
+    
+    async def _call_validated(self, server_name: str, tool_name: str, model: type, **values) -> Dict[str, Any]:
+        """Validate arguments against the tool's model, then call the tool"""
+        try:
+            arguments = model(**values).model_dump()
+        except ValidationError as e:
+            return invalid_arguments(tool_name, e)
+        return await self._call_mcp_tool(server_name, tool_name, arguments)
     
     # ===== DATABASE OPERATIONS =====
     
     async def search_database(self, query: str, table_hint: Optional[str] = None) -> Dict[str, Any]:
         """Search database using natural language"""
-        return await self._call_mcp_tool("database", "search_database", {
-            "query": query,
-            "table_hint": table_hint
-        })
+        return await self._call_validated(
+            "database", "search_database", SearchDatabaseArgs,
+            query=query, table_hint=table_hint
+        )
     
     async def verify_claim_exists(self, claim_number: str) -> Dict[str, Any]:
         """Verify if claim exists in database"""
-        return await self._call_mcp_tool("database", "verify_claim_exists", {
-            "claim_number": claim_number
-        })
+        return await self._call_validated(
+            "database", "verify_claim_exists", VerifyClaimArgs,
+            claim_number=claim_number
+        )
     
     async def update_engine_attribute(self, serial_number: str, attribute: str, new_value: str, 
                                     user_id: str, justification: str) -> Dict[str, Any]:
         """Update engine attribute with approval workflow"""
-        return await self._call_mcp_tool("database", "update_engine_attribute", {
-            "serial_number": serial_number,
-            "attribute": attribute,
-            "new_value": new_value,
-            "user_id": user_id,
-            "justification": justification
-        })
+        return await self._call_validated(
+            "database", "update_engine_attribute", UpdateEngineAttributeArgs,
+            serial_number=serial_number,
+            attribute=attribute,
+            new_value=new_value,
+            user_id=user_id,
+            justification=justification
+        )
     
     # ===== SERVICENOW OPERATIONS =====
     
     async def create_incident_ticket(self, title: str, description: str, priority: str, 
                                    assignment_group: str, caller_id: str) -> Dict[str, Any]:
         """Create ServiceNow incident ticket"""
-        return await self._call_mcp_tool("servicenow", "create_incident_ticket", {
-            "title": title,
-            "description": description,
-            "priority": priority,
-            "urgency": priority,
-            "assignment_group": assignment_group,
-            "caller_id": caller_id
-        })
+        return await self._call_validated(
+            "servicenow", "create_incident_ticket", CreateIncidentArgs,
+            title=title,
+            description=description,
+            priority=priority,
+            urgency=priority,
+            assignment_group=assignment_group,
+            caller_id=caller_id
+        )
     
     async def create_service_request(self, title: str, description: str, priority: str,
                                    assignment_group: str, caller_id: str, category: str) -> Dict[str, Any]:
         """Create ServiceNow service request"""
-        return await self._call_mcp_tool("servicenow", "create_service_request", {
-            "title": title,
-            "description": description,
-            "priority": priority,
-            "assignment_group": assignment_group,
-            "caller_id": caller_id,
-            "category": category
-        })
+        return await self._call_validated(
+            "servicenow", "create_service_request", CreateServiceRequestArgs,
+            title=title,
+            description=description,
+            priority=priority,
+            assignment_group=assignment_group,
+            caller_id=caller_id,
+            category=category
+        )
     
     # ===== RESEARCH OPERATIONS (Direct HTTP calls) =====
     
     async def search_research_papers(self, query: str, max_results: int = 10, 
-                                   include_reasoning: bool = True) -> Dict[str, Any]:
-        """Search research papers using multi-hop reasoning"""
-        return await self._call_mcp_tool("research", "search_research_papers", {
-            "query": query,
-            "max_results": max_results,
-            "include_reasoning": include_reasoning
-        })
+                                   include_reasoning: bool = True,
+                                   fields: Optional[List[str]] = None,
+                                   allow_refs: bool = False) -> Dict[str, Any]:
+        """
+        Search research papers using multi-hop reasoning
+        
+        Pass fields (e.g. ["summary"]) to have the server return only those
+        top-level keys plus "success", skipping the large answer/reasoning payload.
+        With allow_refs, oversized answer/reasoning_details come back as
+        answer_url/reasoning_url; see resolve_research_refs().
+        """
+        try:
+            arguments = SearchResearchPapersArgs(
+                query=query,
+                max_results=max_results,
+                include_reasoning=include_reasoning,
+                fields=fields or None,
+                allow_refs=True if allow_refs else None
+            ).model_dump(exclude_none=True)
+        except ValidationError as e:
+            return invalid_arguments("search_research_papers", e)
+        
+        if RESEARCH_BATCHING:
+            return await self._research_batcher.submit(arguments)
+        return await self._call_mcp_tool("research", "search_research_papers", arguments)
+    
+    async def search_research_papers_batch(self, queries: List[str], max_results: int = 10,
+                                         include_reasoning: bool = True,
+                                         fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Search research papers for several queries in one request"""
+        try:
+            requests = [
+                SearchResearchPapersArgs(
+                    query=query,
+                    max_results=max_results,
+                    include_reasoning=include_reasoning,
+                    fields=fields or None
+                ).model_dump(exclude_none=True)
+                for query in queries
+            ]
+        except ValidationError as e:
+            return [invalid_arguments("search_research_papers", e)] * len(queries)
+        return await self._search_research_papers_many(requests)
+    
+    async def _search_research_papers_many(self, requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Answer search_research_papers argument sets from the cache, batching the misses"""
+        
+        ttl = CACHEABLE_TOOL_TTLS["search_research_papers"]
+        keys = [self._cache_key("research", "search_research_papers", arguments) for arguments in requests]
+        results: List[Optional[Dict[str, Any]]] = [self._cache_get(key) for key in keys]
+        
+        # The batch tool takes one max_results/include_reasoning/fields/allow_refs for all queries
+        groups: Dict[Tuple[Any, Any, Any, Any], List[int]] = {}
+        for i, arguments in enumerate(requests):
+            if results[i] is None:
+                fields = tuple(arguments["fields"]) if arguments.get("fields") else None
+                group = (arguments["max_results"], arguments["include_reasoning"], fields, arguments.get("allow_refs", False))
+                groups.setdefault(group, []).append(i)
+        
+        async def search_group(group: Tuple[Any, Any, Any, Any], indexes: List[int]):
+            max_results, include_reasoning, fields, allow_refs = group
+            if len(indexes) == 1:
+                results[indexes[0]] = await self._call_mcp_tool("research", "search_research_papers", requests[indexes[0]])
+                return
+            
+            batch_arguments = {
+                "queries": [requests[i]["query"] for i in indexes],
+                "max_results": max_results,
+                "include_reasoning": include_reasoning
+            }
+            if fields:
+                batch_arguments["fields"] = list(fields)
+            if allow_refs:
+                batch_arguments["allow_refs"] = True
+            
+            batch_result = await self._call_mcp_tool_uncached(
+                "research", "search_research_papers_batch", batch_arguments, timeout=batch_timeout(len(indexes))
+            )
+            answers = batch_result.get("results")
+            
+            if batch_result.get("success") and isinstance(answers, list) and len(answers) == len(indexes):
+                for i, answer in zip(indexes, answers):
+                    results[i] = answer
+                    self._cache_put(keys[i], answer, ttl)
+            else:
+                # Server without the batch tool (or a failed batch): one call per query
+                answers = await asyncio.gather(*(
+                    self._call_mcp_tool("research", "search_research_papers", requests[i]) for i in indexes
+                ))
+                for i, answer in zip(indexes, answers):
+                    results[i] = answer
+        
+        # Groups are independent requests; run them side by side
+        await asyncio.gather(*(search_group(group, indexes) for group, indexes in groups.items()))
+        
+        return results
+    
+    async def _resolve_ref(self, ref: str) -> Any:
+        """Fetch a payload the research server returned by reference"""
+        
+        url = ref if ref.startswith("http") else f"{self.servers['research']}{ref}"
+        session = await self._get_http_session()
+        async with session.get(url) as response:
+            response.raise_for_status()
+            return json_loads(await response.read())
+    
+    async def resolve_research_refs(self, search_result: Dict[str, Any], reasoning: bool = True) -> Dict[str, Any]:
+        """
+        Inline answer_url (and, if requested, reasoning_url) payloads
+        
+        Returns a new dict; the cached search result keeps the references.
+        """
+        
+        refs = {"answer": search_result.get("answer_url")}
+        if reasoning:
+            refs["reasoning_details"] = search_result.get("reasoning_url")
+        refs = {key: ref for key, ref in refs.items() if ref}
+        if not refs:
+            return search_result
+        
+        resolved = dict(search_result)
+        payloads = await asyncio.gather(*(self._resolve_ref(ref) for ref in refs.values()), return_exceptions=True)
+        for key, payload in zip(refs, payloads):
+            if isinstance(payload, Exception):
+                logger.warning("Could not resolve research %s: %s", key, payload)
+            else:
+                resolved[key] = payload
+        
+        return resolved
     
     async def analyze_research_topic(self, topic: str, analysis_type: str = "comprehensive") -> Dict[str, Any]:
         """Deep analysis of a research topic"""
-        return await self._call_mcp_tool("research", "analyze_research_topic", {
-            "topic": topic,
-            "analysis_type": analysis_type
-        })
+        return await self._call_validated(
+            "research", "analyze_research_topic", AnalyzeResearchTopicArgs,
+            topic=topic, analysis_type=analysis_type
+        )
     
     async def find_paper_relationships(self, concept1: str, concept2: str, 
                                      max_hops: int = 3) -> Dict[str, Any]:
         """Find relationships between research concepts"""
-        return await self._call_mcp_tool("research", "find_paper_relationships", {
-            "concept1": concept1,
-            "concept2": concept2,
-            "max_hops": max_hops
-        })
+        return await self._call_validated(
+            "research", "find_paper_relationships", FindPaperRelationshipsArgs,
+            concept1=concept1, concept2=concept2, max_hops=max_hops
+        )
     
     # ===== COMPLEX WORKFLOWS =====
     
@@ -176,10 +832,10 @@ class MultiMCPClient:
         Coordinates database search + ticket creation
         """
         
-        print(f"🔍 Starting missing claim workflow for: {claim_number}")
+        logger.debug("🔍 Starting missing claim workflow for: %s", claim_number)
         
         # Step 1: Search for the claim in database
-        print(f"📊 Step 1: Searching database for claim {claim_number}")
+        logger.debug("📊 Step 1: Searching database for claim %s", claim_number)
         verification_result = await self.verify_claim_exists(claim_number)
         
         if verification_result.get("success") and verification_result.get("found"):
@@ -209,25 +865,16 @@ class MultiMCPClient:
                 }
             
             # No similar claims - create ticket to Brazil Claims team
-            print(f"🎫 Step 2: Creating ticket to Brazil Claims team")
+            logger.debug("🎫 Step 2: Creating ticket to Brazil Claims team")
             
             ticket_result = await self.create_service_request(
                 title=f"Missing Brazil Claim Investigation: {claim_number}",
-                description=f"""
-Investigation Request for Missing Brazil Claim
-
-Claim Number: {claim_number}
-Reported by: {user_id}
-Search Result: Claim not found in system database
-
-Possible reasons for missing claim:
-{chr(10).join(f"• {reason}" for reason in verification_result.get("possible_reasons", []))}
-
-Next steps required:
-{chr(10).join(f"• {step}" for step in verification_result.get("next_steps", []))}
-
-Please investigate and update the requestor with findings.
-                """.strip(),
+                description=MISSING_CLAIM_TICKET_TEMPLATE.format(
+                    claim_number=claim_number,
+                    user_id=user_id,
+                    reasons=bullet_list(verification_result.get("possible_reasons", [])),
+                    next_steps=bullet_list(verification_result.get("next_steps", []))
+                ),
                 priority="medium",
                 assignment_group="Brazil Claims Team",
                 caller_id=user_id,
@@ -241,20 +888,10 @@ Please investigate and update the requestor with findings.
                     "action": "investigation_ticket_created",
                     "search_result": verification_result,
                     "ticket_result": ticket_result,
-                    "message": f"""
-📋 **Missing Claim Investigation Initiated**
-
-**Claim Number:** {claim_number}
-**Status:** Not found in system database
-
-✅ **Service Request Created:**
-• **Ticket Number:** {ticket_result.get("result", {}).get("request_number", "Unknown")}
-• **Assigned to:** Brazil Claims Team
-• **Priority:** Medium
-• **Expected Response:** 24-48 hours
-
-The Brazil Claims team will investigate and contact you with findings.
-                    """.strip()
+                    "message": MISSING_CLAIM_CREATED_TEMPLATE.format(
+                        claim_number=claim_number,
+                        ticket_number=ticket_result.get("result", {}).get("request_number", "Unknown")
+                    )
                 }
             else:
                 return {
@@ -263,16 +900,10 @@ The Brazil Claims team will investigate and contact you with findings.
                     "action": "manual_escalation_required",
                     "search_result": verification_result,
                     "ticket_error": ticket_result.get("error"),
-                    "message": f"""
-❌ **Automated Process Failed**
-
-Claim {claim_number} not found and ticket creation failed.
-Error: {ticket_result.get("error")}
-
-Please contact Brazil Claims team directly:
-• Email: brazil.claims@company.com
-• Phone: +55 11 1234-5678
-                    """.strip()
+                    "message": MISSING_CLAIM_ESCALATION_TEMPLATE.format(
+                        claim_number=claim_number,
+                        error=ticket_result.get("error")
+                    )
                 }
         
         else:
@@ -282,14 +913,10 @@ Please contact Brazil Claims team directly:
                 "step": "search_failed",
                 "action": "manual_verification_required",
                 "error": verification_result.get("error"),
-                "message": f"""
-❌ **Database Search Failed**
-
-Unable to search for claim {claim_number} due to system error.
-Error: {verification_result.get("error")}
-
-Please try again later or contact IT support.
-                """.strip()
+                "message": CLAIM_SEARCH_FAILED_TEMPLATE.format(
+                    claim_number=claim_number,
+                    error=verification_result.get("error")
+                )
             }
     
     async def handle_engine_update_workflow(self, serial_number: str, attribute: str, 
@@ -298,7 +925,7 @@ Please try again later or contact IT support.
         Complex workflow: Update engine attribute with approval process
         """
         
-        print(f"🔧 Starting engine update workflow: {serial_number} {attribute} -> {new_value}")
+        logger.debug("🔧 Starting engine update workflow: %s %s -> %s", serial_number, attribute, new_value)
         
         # Step 1: Attempt the update (will trigger approval process if needed)
         update_result = await self.update_engine_attribute(
@@ -318,16 +945,12 @@ Please try again later or contact IT support.
                     "step": "completed",
                     "action": "updated_directly",
                     "result": update_result,
-                    "message": f"""
-✅ **Engine Updated Successfully**
-
-**Engine Serial:** {serial_number}
-**Attribute:** {attribute}
-**New Value:** {new_value}
-**Updated:** {update_result.get("details", {}).get("updated_at", "Now")}
-
-The change has been applied immediately as this is a non-sensitive attribute.
-                    """.strip()
+                    "message": ENGINE_UPDATED_TEMPLATE.format(
+                        serial_number=serial_number,
+                        attribute=attribute,
+                        new_value=new_value,
+                        updated_at=update_result.get("details", {}).get("updated_at", "Now")
+                    )
                 }
             
             elif update_result.get("action") == "approval_required":
@@ -339,20 +962,14 @@ The change has been applied immediately as this is a non-sensitive attribute.
                     "step": "approval_pending",
                     "action": "approval_required",
                     "result": update_result,
-                    "message": f"""
-⏳ **Approval Required for Engine Update**
-
-**Engine Serial:** {serial_number}
-**Requested Change:** {approval_details.get("change", f"{attribute} -> {new_value}")}
-**Approval ID:** {update_result.get("approval_id")}
-
-**Status:** {approval_details.get("status", "Pending admin approval")}
-**Expected Timeline:** {approval_details.get("estimated_approval_time", "24-48 hours")}
-
-An admin has been notified and will review your request. You'll receive an email update once the decision is made.
-
-**Justification Provided:** {justification}
-                    """.strip()
+                    "message": ENGINE_APPROVAL_TEMPLATE.format(
+                        serial_number=serial_number,
+                        change=approval_details.get("change", f"{attribute} -> {new_value}"),
+                        approval_id=update_result.get("approval_id"),
+                        status=approval_details.get("status", "Pending admin approval"),
+                        timeline=approval_details.get("estimated_approval_time", "24-48 hours"),
+                        justification=justification
+                    ).strip()
                 }
         
         else:
@@ -362,108 +979,92 @@ An admin has been notified and will review your request. You'll receive an email
                 "step": "failed",
                 "action": update_result.get("action", "update_failed"),
                 "error": update_result.get("error"),
-                "message": f"""
-❌ **Engine Update Failed**
-
-**Engine Serial:** {serial_number}
-**Requested Change:** {attribute} -> {new_value}
-**Error:** {update_result.get("error", "Unknown error")}
-
-Please verify the engine serial number and attribute name, then try again.
-                """.strip()
+                "message": ENGINE_UPDATE_FAILED_TEMPLATE.format(
+                    serial_number=serial_number,
+                    attribute=attribute,
+                    new_value=new_value,
+                    error=update_result.get("error", "Unknown error")
+                )
             }
 
     # ===== RESEARCH WORKFLOWS =====
     
     async def handle_research_query_workflow(self, query: str, user_id: str, 
-                                        analysis_type: str = "comprehensive") -> Dict[str, Any]:
+                                        analysis_type: str = "comprehensive",
+                                        show_reasoning: bool = True) -> Dict[str, Any]:
         """
         FIXED: Complex workflow for research queries using real RAG system
+        
+        Large payloads are fetched by reference; reasoning details are only
+        downloaded when show_reasoning is set.
         """
         
-        print(f"📊 Starting research query workflow: {query}")
+        logger.debug("📊 Starting research query workflow: %s", query)
         
         try:
             # Step 1: Search for research papers
-            print("🔍 Step 1: Searching research papers")
+            logger.debug("🔍 Step 1: Searching research papers")
             search_result = await self.search_research_papers(
                 query=query,
                 max_results=10,
-                include_reasoning=True
+                include_reasoning=show_reasoning,
+                allow_refs=True
             )
             
-            print(f"🔍 Search result received: {search_result.get('success', 'Unknown')}")
+            logger.debug("🔍 Search result received: %s", search_result.get("success", "Unknown"))
             
             # FIXED: Check for success properly
             if search_result.get("success") == True:
+                search_result = await self.resolve_research_refs(search_result, reasoning=show_reasoning)
+                summary = search_result.get("summary", {})
+                reasoning_details = search_result.get("reasoning_details", {})
+                
                 return {
                     "workflow": "research_query",
                     "step": "completed",
                     "action": "research_found",
                     "result": search_result,
                     "success": True,  # IMPORTANT: Set this explicitly
-                    "message": f"""
-    📊 **Research Query Results**
-
-    **Query:** {query}
-
-    **Answer:**
-    {search_result.get("answer", "No answer available")}
-
-    **Research Analysis:**
-    • **Entities Found:** {search_result.get("summary", {}).get("entities_found", 0)}
-    • **Reasoning Paths:** {search_result.get("summary", {}).get("reasoning_paths", 0)}
-    • **Knowledge Connections:** {search_result.get("summary", {}).get("context_triples", 0)}
-
-    **Key Research Entities:**
-    {chr(10).join(f"• {entity}" for entity in search_result.get("reasoning_details", {}).get("entities_used", [])[:5])}
-
-    **Top Reasoning Paths:**
-    {chr(10).join(f"• {path.get('path_string', 'Unknown path')}" for path in search_result.get("reasoning_details", {}).get("top_reasoning_paths", [])[:3])}
-                    """.strip()
+                    "message": RESEARCH_RESULTS_TEMPLATE.format(
+                        query=query,
+                        answer=search_result.get("answer", "No answer available"),
+                        entities_found=summary.get("entities_found", 0),
+                        reasoning_paths=summary.get("reasoning_paths", 0),
+                        context_triples=summary.get("context_triples", 0),
+                        entities=bullet_list(reasoning_details.get("entities_used", [])[:5]),
+                        paths=bullet_list(
+                            path.get('path_string', 'Unknown path')
+                            for path in reasoning_details.get("top_reasoning_paths", [])[:3]
+                        )
+                    ).strip()
                 }
             else:
                 # FIXED: Better error handling
-                print(f"❌ Search failed with result: {search_result}")
+                logger.warning("❌ Research search failed: %s", search_result.get("error", "Unknown error"))
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Full search result: %s", search_result)
                 return {
                     "workflow": "research_query",
                     "step": "failed",
                     "action": "research_unavailable",
                     "success": False,
                     "error": search_result.get("error", "Unknown error"),
-                    "message": f"""
-    ❌ **Research Query Failed**
-
-    **Query:** {query}
-    **Error:** {search_result.get("error", "Research system unavailable")}
-
-    **Debug Info:**
-    • Full result: {str(search_result)[:200]}...
-
-    **Suggestions:**
-    • Check if research MCP server is running on port 8084
-    • Verify Neo4j database connection
-    • Try rephrasing your research question
-    • Contact research support team
-                    """.strip()
+                    "message": RESEARCH_FAILED_TEMPLATE.format(
+                        query=query,
+                        error=search_result.get("error", "Research system unavailable"),
+                        debug=str(search_result)[:200]
+                    )
                 }
         
         except Exception as e:
-            print(f"❌ Exception in research workflow: {e}")
+            logger.error("❌ Exception in research workflow: %s", e)
             return {
                 "workflow": "research_query",
                 "step": "error", 
                 "action": "exception_occurred",
                 "success": False,
                 "error": str(e),
-                "message": f"""
-    ❌ **Research Workflow Error**
-
-    **Query:** {query}
-    **Error:** {str(e)}
-
-    Please try again or contact technical support.
-                """.strip()
+                "message": RESEARCH_ERROR_TEMPLATE.format(query=query, error=str(e))
             }
 # Example usage functions for testing
 async def test_missing_claim_workflow():
@@ -474,17 +1075,24 @@ async def test_missing_claim_workflow():
     print("Testing Missing Claim Workflow")
     print("=" * 40)
     
+    # Both lookups are independent, so run them concurrently; if one raises,
+    # the TaskGroup cancels the other instead of leaving it running
+    async with asyncio.TaskGroup() as tg:
+        task1 = tg.create_task(client.handle_missing_claim_workflow("1-AAAA", "test.user@company.com"))
+        task2 = tg.create_task(client.handle_missing_claim_workflow("1-ABCD", "test.user@company.com"))
+    result1, result2 = task1.result(), task2.result()
+    
     # Test 1: Existing claim
     print("\n1. Testing existing claim (1-AAAA):")
-    result1 = await client.handle_missing_claim_workflow("1-AAAA", "test.user@company.com")
     print(f"Action: {result1['action']}")
     print(f"Message: {result1['message']}")
     
     # Test 2: Non-existing claim
     print("\n2. Testing non-existing claim (1-ABCD):")
-    result2 = await client.handle_missing_claim_workflow("1-ABCD", "test.user@company.com")
     print(f"Action: {result2['action']}")
     print(f"Message: {result2['message']}")
+    
+    await client.close()
 
 async def test_engine_update_workflow():
     """Test the engine update workflow"""
@@ -517,6 +1125,8 @@ async def test_engine_update_workflow():
     )
     print(f"Action: {result2['action']}")
     print(f"Message: {result2['message']}")
+    
+    await client.close()
 
 async def test_research_workflow():
     """Test the research workflow with real RAG system"""
@@ -526,13 +1136,28 @@ async def test_research_workflow():
     print("Testing Research Query Workflow")
     print("=" * 40)
     
+    # The three queries are independent, so run them concurrently; if one raises,
+    # the TaskGroup cancels the others instead of leaving them running
+    async with asyncio.TaskGroup() as tg:
+        workflow_task = tg.create_task(client.handle_research_query_workflow(
+            query="What are transformer models and how do they work?",
+            user_id="test.user@company.com",
+            analysis_type="technical"
+        ))
+        search_task = tg.create_task(client.search_research_papers(
+            query="attention mechanisms in neural networks",
+            max_results=5,
+            include_reasoning=True,
+            fields=["answer", "summary"]
+        ))
+        analysis_task = tg.create_task(client.analyze_research_topic(
+            topic="neural machine translation",
+            analysis_type="comprehensive"
+        ))
+    result1, search_result, analysis_result = workflow_task.result(), search_task.result(), analysis_task.result()
+    
     # Test 1: Transformer query
     print("\n1. Testing transformer research query:")
-    result1 = await client.handle_research_query_workflow(
-        query="What are transformer models and how do they work?",
-        user_id="test.user@company.com",
-        analysis_type="technical"
-    )
     print(f"Action: {result1['action']}")
     print(f"Success: {result1.get('result', {}).get('success', 'Unknown')}")
     if result1.get('result', {}).get('success'):
@@ -542,11 +1167,6 @@ async def test_research_workflow():
     
     # Test 2: Direct research paper search
     print("\n2. Testing direct research paper search:")
-    search_result = await client.search_research_papers(
-        query="attention mechanisms in neural networks",
-        max_results=5,
-        include_reasoning=True
-    )
     print(f"Search success: {search_result.get('success', False)}")
     if search_result.get('success'):
         print(f"Answer preview: {search_result['answer'][:200]}...")
@@ -556,21 +1176,22 @@ async def test_research_workflow():
     
     # Test 3: Research topic analysis
     print("\n3. Testing research topic analysis:")
-    analysis_result = await client.analyze_research_topic(
-        topic="neural machine translation",
-        analysis_type="comprehensive"
-    )
     print(f"Analysis success: {analysis_result.get('success', False)}")
     if analysis_result.get('success'):
         print(f"Key entities: {analysis_result.get('key_entities', [])[:3]}")
         print(f"Research depth: {analysis_result.get('research_depth', {})}")
     else:
         print(f"Error: {analysis_result.get('error', 'Unknown error')}")
+    
+    await client.close()
 
 if __name__ == "__main__":
     import sys
     
     if len(sys.argv) > 1:
+        use_uvloop()
+        listener = configure_logging(logger)
+        
         if sys.argv[1] == "test_claim":
             asyncio.run(test_missing_claim_workflow())
         elif sys.argv[1] == "test_engine":
@@ -579,6 +1200,8 @@ if __name__ == "__main__":
             asyncio.run(test_research_workflow())
         else:
             print("Usage: python enhanced_chatbot_client.py [test_claim|test_engine|test_research]")
+        
+        listener.stop()
     else:
         print("Enhanced Multi-MCP Client loaded. Use in Streamlit app.")
         print("Available methods:")
@@ -1,8 +1,82 @@
 import anthropic
+import asyncio
+import atexit
+import httpx
 import json
-from typing import Dict, List, Optional, Tuple
-from dataclasses import dataclass
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple, Type
+from dataclasses import asdict, dataclass
 from enum import Enum
+from pydantic import BaseModel, Field
+from common import HTTP2_AVAILABLE, bullet_list, configure_logging, json_loads
+
+# Routing diagnostics; %-style arguments so nothing is formatted unless enabled
+logger = logging.getLogger(__name__)
+
+# Local sentence embeddings for the semantic cache (optional)
+try:
+    import numpy as np
+    from sentence_transformers import SentenceTransformer
+    SEMANTIC_CACHE_AVAILABLE = True
+except ImportError:
+    SEMANTIC_CACHE_AVAILABLE = False
+
+# sqlite-vec turns the semantic cache into a SQLite file shared by every
+# worker process (optional; otherwise each process keeps its own matrix)
+try:
+    import sqlite_vec
+    SQLITE_VEC_AVAILABLE = SEMANTIC_CACHE_AVAILABLE
+except ImportError:
+    SQLITE_VEC_AVAILABLE = False
+
+# Per-instance LRU size for Claude results keyed on the raw user input.
+# temperature=0.1 makes repeat answers near-identical, so repeats skip the API.
+ANALYSIS_CACHE_SIZE = 10000
+ANALYSIS_CACHE_TTL = 3600  # seconds
+
+# Classifications below this confidence get a clarification reply. They are
+# kept apart, keyed on the normalized input, so a repeated ambiguous message
+# doesn't go back to Claude only to come out "unclear" again.
+LOW_CONFIDENCE_THRESHOLD = 0.5
+NEGATIVE_CACHE_SIZE = 10000
+NEGATIVE_CACHE_TTL = 3600  # seconds
+
+# Near-duplicate inputs ("system is down" / "system not working") reuse a
+# stored result when cosine similarity of their embeddings clears the threshold
+SEMANTIC_CACHE_MODEL = "all-MiniLM-L6-v2"
+SEMANTIC_CACHE_THRESHOLD = 0.92
+SEMANTIC_CACHE_SIZE = 10000
+SEMANTIC_CACHE_DIR = os.path.expanduser("~/.cache/intelliflow/semantic")
+SEMANTIC_CACHE_DIM = 384  # all-MiniLM-L6-v2 output size
+SEMANTIC_CACHE_DB = os.path.join(SEMANTIC_CACHE_DIR, "semantic_cache.db")
+SEMANTIC_CACHE_TTL = 86400  # seconds; SQLite store only
+# SQLite store: neighbours checked per lookup (so an expired nearest row
+# doesn't hide a live one just behind it), and seconds between purges of
+# expired rows, run from add()
+SEMANTIC_CACHE_KNN = 8
+SEMANTIC_CACHE_PURGE_INTERVAL = 3600
+
+# Seconds between status polls of a Message Batches job
+BATCH_POLL_INTERVAL = 30
+
+# Recent usage.output_tokens values kept per component for sizing MAX_TOKENS
+OUTPUT_TOKEN_SAMPLES = 1000
+
+# The SDK retries rate limits (429), overload (529), 5xx and connection errors
+# itself with exponential backoff and jitter; 2 retries = 3 attempts
+CLAUDE_MAX_RETRIES = 2
+
+# After this many consecutive failed Claude calls, skip Claude and use the
+# fallbacks for CIRCUIT_RESET_TIMEOUT seconds so an outage doesn't stall turns
+CIRCUIT_FAIL_MAX = 10
+CIRCUIT_RESET_TIMEOUT = 30
 
 class IntentType(Enum):
     SYSTEM_INCIDENT = "system_incident"      # System down, not working, broken
@@ -19,25 +93,723 @@ class IntentClassification:
     keywords_matched: List[str]
     urgency_indicators: List[str]
 
-class IntentClassifier:
-    def __init__(self, claude_api_key: str):
-        self.client = anthropic.Anthropic(api_key=claude_api_key)
+# ================================
+# Response Schemas
+# ================================
+
+# Expected shape of each Claude reply, validated straight from the JSON text;
+# a reply missing fields or with the wrong types takes the fallback path
+# instead of failing later in the response formatters
+class ClassificationSchema(BaseModel):
+    intent: IntentType
+    confidence: float = Field(ge=0, le=1)
+    reasoning: str
+    keywords_matched: List[str]
+    urgency_indicators: List[str]
+
+class IncidentAnalysis(BaseModel):
+    severity: str
+    affected_system: str
+    business_impact: str
+    urgency_justification: str
+    immediate_actions: List[str]
+    assignment_group: str
+    escalation_needed: bool
+    estimated_downtime: str
+    ticket_summary: str
+    ticket_description: str
+
+class DataQueryAnalysis(BaseModel):
+    query_type: str
+    target_system: str
+    data_elements: List[str]
+    search_criteria: Dict[str, Any]
+    requires_approval: bool
+    risk_level: str
+    sql_intent: str
+    business_justification: str
+    next_steps: List[str]
+    estimated_complexity: str
+
+class InfoRequestAnalysis(BaseModel):
+    info_category: str
+    topic_area: str
+    specificity: str
+    knowledge_sources: List[str]
+    urgency: str
+    response_format: str
+    estimated_response_time: str
+    follow_up_likely: bool
+    suggested_resources: List[str]
+    complexity_level: str
+
+class ResearchQueryAnalysis(BaseModel):
+    research_type: str
+    subject_area: str
+    analysis_depth: str
+    query_complexity: str
+    expected_output: str
+    knowledge_graph_needed: bool
+    multi_hop_reasoning: bool
+    academic_level: str
+    time_sensitivity: str
+    follow_up_questions: List[str] = []
+    suggested_approach: str
+
+_embedder = None
+_embedder_lock = threading.Lock()
+
+def get_embedder():
+    """Load the shared sentence-transformer on first use"""
+    global _embedder
+    with _embedder_lock:
+        if _embedder is None:
+            _embedder = SentenceTransformer(SEMANTIC_CACHE_MODEL)
+        return _embedder
+
+def quantize_embedding(embedding):
+    """Map a unit-norm float embedding onto int8 (-127..127)"""
+    return np.clip(np.round(embedding * 127), -127, 127).astype(np.int8)
+
+class SemanticCache:
+    """
+    Embedding-similarity cache of JSON-able Claude results, one namespace per
+    handler. Rows are L2-normalised so the dot product is cosine similarity,
+    and stored as int8 (x127), a quarter of the float32 footprint.
+    Saved to SEMANTIC_CACHE_DIR at exit for warm starts. Every method is a
+    no-op when numpy/sentence-transformers are not installed.
+    """
+    
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._emb = None
+        self._values: List[Dict[str, Any]] = []
         
-    def classify_intent(self, user_input: str) -> IntentClassification:
+        if SEMANTIC_CACHE_AVAILABLE:
+            self._emb_path = os.path.join(SEMANTIC_CACHE_DIR, f"{namespace}.npy")
+            self._values_path = os.path.join(SEMANTIC_CACHE_DIR, f"{namespace}.json")
+            self._load()
+            atexit.register(self.save)
+    
+    def embed(self, text: str):
+        """Normalised embedding for text, or None without the optional deps"""
+        if not SEMANTIC_CACHE_AVAILABLE:
+            return None
+        return get_embedder().encode(text, normalize_embeddings=True)
+    
+    def lookup(self, embedding) -> Optional[Dict[str, Any]]:
+        """Closest stored result above SEMANTIC_CACHE_THRESHOLD, if any"""
+        if embedding is None:
+            return None
+        with self._lock:
+            emb, values = self._emb, self._values
+        if emb is None:
+            return None
+        
+        # int8 x int8 dot products overflow int16, so score in float32 (BLAS)
+        sims = emb.astype(np.float32) @ quantize_embedding(embedding).astype(np.float32)
+        best = int(sims.argmax())
+        if sims[best] > SEMANTIC_CACHE_THRESHOLD * 127 * 127:
+            return values[best]
+        return None
+    
+    def add(self, embedding, value: Dict[str, Any]):
+        """Store a result, evicting the oldest rows past SEMANTIC_CACHE_SIZE"""
+        if embedding is None:
+            return
+        with self._lock:
+            row = quantize_embedding(embedding).reshape(1, -1)
+            emb = row if self._emb is None else np.vstack([self._emb, row])
+            values = self._values + [value]
+            if len(values) > SEMANTIC_CACHE_SIZE:
+                emb, values = emb[-SEMANTIC_CACHE_SIZE:], values[-SEMANTIC_CACHE_SIZE:]
+            self._emb, self._values = emb, values
+    
+    def clear(self):
+        with self._lock:
+            self._emb, self._values = None, []
+    
+    def _load(self):
+        try:
+            emb = np.load(self._emb_path)
+            with open(self._values_path, "rb") as f:
+                values = json_loads(f.read())
+        except (OSError, ValueError):
+            return
+        if len(emb) == len(values):
+            # Files written before quantization hold float32 rows
+            self._emb = emb if emb.dtype == np.int8 else quantize_embedding(emb)
+            self._values = values
+    
+    def save(self):
+        """Persist embeddings and results for the next process"""
+        with self._lock:
+            emb, values = self._emb, self._values
+        if emb is None:
+            return
+        try:
+            os.makedirs(SEMANTIC_CACHE_DIR, exist_ok=True)
+            np.save(self._emb_path, emb)
+            with open(self._values_path, "w") as f:
+                json.dump(values, f)
+        except OSError as e:
+            logger.warning("Could not save semantic cache '%s': %s", self.namespace, e)
+
+_semantic_db = None
+_semantic_db_lock = threading.Lock()
+
+def get_semantic_db() -> sqlite3.Connection:
+    """Open the shared sqlite-vec cache database on first use"""
+    global _semantic_db
+    with _semantic_db_lock:
+        if _semantic_db is None:
+            os.makedirs(SEMANTIC_CACHE_DIR, exist_ok=True)
+            db = sqlite3.connect(SEMANTIC_CACHE_DB, check_same_thread=False, timeout=5)
+            db.enable_load_extension(True)
+            sqlite_vec.load(db)
+            db.enable_load_extension(False)
+            # WAL lets other worker processes read while one writes
+            db.execute("PRAGMA journal_mode=WAL")
+            _semantic_db = db
+        return _semantic_db
+
+class SqliteSemanticCache(SemanticCache):
+    """
+    SemanticCache stored in SQLite with a sqlite-vec index, so every worker
+    process shares one cache and warm starts need no load step. Entries
+    expire after SEMANTIC_CACHE_TTL seconds.
+    """
+    
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+        self._vec_table = f"{namespace}_vec"
+        self._data_table = f"{namespace}_data"
+        
+        db = get_semantic_db()
+        with _semantic_db_lock:
+            db.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {self._vec_table} "
+                f"USING vec0(embedding float[{SEMANTIC_CACHE_DIM}])"
+            )
+            db.execute(
+                f"CREATE TABLE IF NOT EXISTS {self._data_table} "
+                "(rowid INTEGER PRIMARY KEY, value TEXT NOT NULL, ts REAL NOT NULL)"
+            )
+            db.commit()
+        self._purge_expired()
+    
+    def lookup(self, embedding) -> Optional[Dict[str, Any]]:
+        if embedding is None:
+            return None
+        
+        db = get_semantic_db()
+        with _semantic_db_lock:
+            # Nearest unexpired row among the k nearest
+            nearest = db.execute(
+                f"SELECT knn.distance, data.value FROM "
+                f"(SELECT rowid, distance FROM {self._vec_table} WHERE embedding MATCH ? AND k = ?) AS knn "
+                f"JOIN {self._data_table} AS data ON data.rowid = knn.rowid "
+                "WHERE data.ts >= ? ORDER BY knn.distance LIMIT 1",
+                (embedding.astype(np.float32).tobytes(), SEMANTIC_CACHE_KNN, time.time() - SEMANTIC_CACHE_TTL)
+            ).fetchone()
+        if nearest is None:
+            return None
+        # vec0 reports L2 distance; for unit vectors cos = 1 - d^2 / 2
+        distance, value = nearest
+        if 1 - distance * distance / 2 <= SEMANTIC_CACHE_THRESHOLD:
+            return None
+        return json_loads(value)
+    
+    def add(self, embedding, value: Dict[str, Any]):
+        if embedding is None:
+            return
+        
+        db = get_semantic_db()
+        with _semantic_db_lock:
+            cursor = db.execute(
+                f"INSERT INTO {self._data_table} (value, ts) VALUES (?, ?)",
+                (json.dumps(value), time.time())
+            )
+            db.execute(
+                f"INSERT INTO {self._vec_table} (rowid, embedding) VALUES (?, ?)",
+                (cursor.lastrowid, embedding.astype(np.float32).tobytes())
+            )
+            db.commit()
+        
+        if time.monotonic() - self._last_purge > SEMANTIC_CACHE_PURGE_INTERVAL:
+            self._purge_expired()
+    
+    def clear(self):
+        db = get_semantic_db()
+        with _semantic_db_lock:
+            db.execute(f"DELETE FROM {self._vec_table}")
+            db.execute(f"DELETE FROM {self._data_table}")
+            db.commit()
+    
+    def save(self):
+        """Rows are committed as they are added"""
+    
+    def _purge_expired(self):
+        self._last_purge = time.monotonic()
+        cutoff = time.time() - SEMANTIC_CACHE_TTL
+        db = get_semantic_db()
+        with _semantic_db_lock:
+            db.execute(
+                f"DELETE FROM {self._vec_table} WHERE rowid IN "
+                f"(SELECT rowid FROM {self._data_table} WHERE ts < ?)",
+                (cutoff,)
+            )
+            db.execute(f"DELETE FROM {self._data_table} WHERE ts < ?", (cutoff,))
+            db.commit()
+
+def make_semantic_cache(namespace: str) -> SemanticCache:
+    """Shared SQLite store when sqlite-vec is installed, else per-process"""
+    global SQLITE_VEC_AVAILABLE
+    if SQLITE_VEC_AVAILABLE:
+        try:
+            return SqliteSemanticCache(namespace)
+        except (sqlite3.Error, AttributeError, OSError) as e:
+            # AttributeError: Python built without loadable SQLite extensions
+            logger.warning("sqlite-vec cache unavailable, using in-memory cache: %s", e)
+            SQLITE_VEC_AVAILABLE = False
+    return SemanticCache(namespace)
+
+class TTLCache:
+    """Thread-safe LRU whose entries also expire ttl seconds after insertion"""
+    
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return entry[1]
+    
+    def put(self, key: str, value: Any):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker. While open, allow() is False;
+    after reset_timeout one trial call is let through per window, and a
+    success closes the circuit again.
+    """
+    
+    def __init__(self, fail_max: int, reset_timeout: float):
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._lock = threading.Lock()
+    
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._opened_at = time.monotonic()
+                return True
+            return False
+    
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+    
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.fail_max:
+                self._opened_at = time.monotonic()
+
+def claude_error_kind(error: Exception) -> str:
+    """Short label separating rate limits, auth, server and network failures"""
+    if isinstance(error, anthropic.RateLimitError):
+        return "rate limit"
+    if isinstance(error, (anthropic.AuthenticationError, anthropic.PermissionDeniedError)):
+        return "auth"
+    if isinstance(error, anthropic.InternalServerError):
+        return "server"
+    if isinstance(error, anthropic.APIConnectionError):
+        return "connection"
+    return type(error).__name__
+
+class JsonObjectScanner:
+    """
+    Collects streamed text from the first "{" until that JSON object is
+    closed, tracking string literals so braces inside values don't count
+    """
+    
+    def __init__(self):
+        self._parts: List[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+    
+    @property
+    def text(self) -> str:
+        return "".join(self._parts)
+    
+    def feed(self, chunk: str) -> bool:
+        """Add a chunk; True once the object is complete (surrounding text dropped)"""
+        begin = 0 if self._depth else None
+        for i, char in enumerate(chunk):
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == "{":
+                if self._depth == 0:
+                    begin = i
+                self._depth += 1
+            elif self._depth == 0:
+                continue
+            elif char == '"':
+                self._in_string = True
+            elif char == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._parts.append(chunk[begin:i + 1])
+                    return True
+        
+        if begin is not None:
+            self._parts.append(chunk[begin:])
+        return False
+
+class ClaudeAnalyzer(ABC):
+    """
+    Shared Claude call path for the classifier and specialized handlers:
+    exact-match/negative TTL caches -> semantic cache -> Claude, with sync
+    and async entry points over the same caches. Subclasses supply the
+    prompt and fallback.
+    """
+    
+    namespace = "default"
+    SCHEMA: Type[BaseModel] = BaseModel
+    
+    # Only results that are the same for every paraphrase may be served to a
+    # near-duplicate input. Handler analyses carry input-specific fields
+    # (ticket text, search criteria), so they stay exact-match only.
+    SEMANTIC_CACHE = False
+    
+    # Haiku is ~4x faster than Sonnet and these are short structured-JSON
+    # extractions where its accuracy holds up. Each subclass can move to a
+    # larger model on its own if its quality metrics call for it.
+    MODEL = "claude-3-haiku-20240307"
+    # Handler analyses run ~200-300 output tokens. Re-tune to p99 + 20% from
+    # output_token_p99() once there is traffic to measure.
+    MAX_TOKENS = 400
+    
+    # Static instructions, sent as a cached system prompt; only the user
+    # message changes between calls
+    SYSTEM_PROMPT = ""
+    
+    # The user message wraps the input in quotes between these constants
+    USER_PROMPT_HEAD = '**User Input:** "'
+    USER_PROMPT_TAIL = '"'
+    
+    def __init__(self, client: anthropic.Anthropic, async_client: anthropic.AsyncAnthropic,
+                 breaker: Optional[CircuitBreaker] = None):
+        self.client = client
+        self.async_client = async_client
+        # Tracks the health of this client (and its API key); analyzers that
+        # share a client pass in one shared breaker
+        self.breaker = breaker or CircuitBreaker(CIRCUIT_FAIL_MAX, CIRCUIT_RESET_TIMEOUT)
+        self._cache = TTLCache(ANALYSIS_CACHE_SIZE, ANALYSIS_CACHE_TTL)
+        self._negative_cache = TTLCache(NEGATIVE_CACHE_SIZE, NEGATIVE_CACHE_TTL)
+        self._semantic_cache = make_semantic_cache(self.namespace) if self.SEMANTIC_CACHE else None
+        # Lookups answered by each tier; "claude" counts inputs sent to the API
+        self._tier_hits = {"exact": 0, "negative": 0, "semantic": 0, "claude": 0}
+        self._output_tokens: Deque[int] = deque(maxlen=OUTPUT_TOKEN_SAMPLES)
+        
+    def cache_clear(self):
+        """Drop cached results"""
+        self._cache.clear()
+        self._negative_cache.clear()
+        if self._semantic_cache is not None:
+            self._semantic_cache.clear()
+    
+    def cache_stats(self) -> Dict[str, int]:
+        """Per-tier hit counts since startup"""
+        return dict(self._tier_hits)
+    
+    def _build_prompt(self, user_input: str) -> str:
+        # Escape embedded quotes so the input can't close the quoted block early
+        return self.USER_PROMPT_HEAD + user_input.replace('"', '\\"') + self.USER_PROMPT_TAIL
+    
+    @abstractmethod
+    def _fallback(self, user_input: str) -> Any:
+        """Result to return when Claude can't produce one"""
+    
+    def _on_error(self, user_input: str, error: Exception) -> Any:
+        return self._fallback(user_input)
+    
+    def _parse(self, text: str) -> Any:
+        return self.SCHEMA.model_validate_json(text).model_dump()
+    
+    def _to_cache_value(self, result: Any) -> Dict[str, Any]:
+        """JSON-able form of a result for the semantic cache"""
+        return result
+    
+    def _from_cache_value(self, value: Dict[str, Any]) -> Any:
+        return value
+    
+    def _request(self, user_input: str) -> Dict[str, Any]:
+        """Keyword arguments for messages.create()"""
+        return self._request_for_prompt(self._build_prompt(user_input))
+    
+    def _request_for_prompt(self, prompt: str, max_tokens: Optional[int] = None,
+                            system: Optional[str] = None) -> Dict[str, Any]:
+        return {
+            "model": self.MODEL,
+            "max_tokens": max_tokens or self.MAX_TOKENS,
+            "temperature": 0.1,
+            "system": [{
+                "type": "text",
+                "text": system or self.SYSTEM_PROMPT,
+                "cache_control": {"type": "ephemeral"}
+            }],
+            "messages": [{"role": "user", "content": prompt}]
+        }
+    
+    def _complete(self, request: Dict[str, Any]) -> str:
+        """Stream the response and stop reading once the JSON object closes"""
+        scanner = JsonObjectScanner()
+        with self.client.messages.stream(**request) as stream:
+            for chunk in stream.text_stream:
+                if scanner.feed(chunk):
+                    break
+        return scanner.text
+    
+    async def _acomplete(self, request: Dict[str, Any]) -> str:
+        scanner = JsonObjectScanner()
+        async with self.async_client.messages.stream(**request) as stream:
+            async for chunk in stream.text_stream:
+                if scanner.feed(chunk):
+                    break
+        return scanner.text
+    
+    def _record_usage(self, message: Any):
+        usage = getattr(message, "usage", None)
+        if usage is not None:
+            self._output_tokens.append(usage.output_tokens)
+    
+    def output_token_p99(self) -> Optional[int]:
         """
-        Enhanced intent classification with research query support
+        99th percentile of recorded output tokens, for re-tuning MAX_TOKENS.
+        Only complete responses (batch and multi-input) carry final usage;
+        streamed calls stop at the closing brace before it arrives.
+        """
+        samples = sorted(self._output_tokens)
+        if not samples:
+            return None
+        return samples[int(0.99 * (len(samples) - 1))]
+    
+    @staticmethod
+    def _normalize(user_input: str) -> str:
+        return " ".join(user_input.lower().split())
+    
+    def _is_negative(self, result: Any) -> bool:
+        """Results kept only in the negative cache"""
+        return False
+    
+    def _cache_get(self, user_input: str) -> Any:
+        """Exact-match tier, then the negative tier; both skip the embedding"""
+        result = self._cache.get(user_input)
+        if result is not None:
+            self._tier_hits["exact"] += 1
+            return result
+        result = self._negative_cache.get(self._normalize(user_input))
+        if result is not None:
+            self._tier_hits["negative"] += 1
+        return result
+    
+    def _cache_put(self, user_input: str, result: Any):
+        self._cache.put(user_input, result)
+    
+    def _semantic_lookup(self, user_input: str) -> Tuple[Any, Any]:
+        """(cached result or None, embedding to store a fresh result under)"""
+        if self._semantic_cache is None:
+            return None, None
+        embedding = self._semantic_cache.embed(user_input)
+        cached = self._semantic_cache.lookup(embedding)
+        if cached is None:
+            return None, embedding
+        self._tier_hits["semantic"] += 1
+        return self._from_cache_value(cached), embedding
+    
+    def _store(self, user_input: str, result: Any, embedding: Any = None):
+        # Negative results stay out of the semantic cache so one unclear
+        # message can't answer its near-duplicates
+        if self._is_negative(result):
+            self._negative_cache.put(self._normalize(user_input), result)
+            return
+        if embedding is not None:
+            self._semantic_cache.add(embedding, self._to_cache_value(result))
+        self._cache_put(user_input, result)
+    
+    def _analyze(self, user_input: str) -> Any:
+        result = self._cache_get(user_input)
+        if result is not None:
+            return result
+        
+        result, embedding = self._semantic_lookup(user_input)
+        if result is not None:
+            self._cache_put(user_input, result)
+            return result
+        
+        # Failures return the fallback without caching it
+        if not self.breaker.allow():
+            return self._on_error(user_input, RuntimeError("Claude circuit open"))
+        self._tier_hits["claude"] += 1
+        try:
+            text = self._complete(self._request(user_input))
+        except Exception as e:
+            return self._on_claude_error(user_input, e)
+        self.breaker.record_success()
+        
+        try:
+            result = self._parse(text)
+        except Exception as e:
+            return self._on_error(user_input, e)
+        
+        self._store(user_input, result, embedding)
+        return result
+    
+    async def _aanalyze(self, user_input: str) -> Any:
+        result = self._cache_get(user_input)
+        if result is not None:
+            return result
+        
+        # Embedding is CPU-bound (and loads the model on first use)
+        result, embedding = None, None
+        if self._semantic_cache is not None:
+            result, embedding = await asyncio.to_thread(self._semantic_lookup, user_input)
+        if result is not None:
+            self._cache_put(user_input, result)
+            return result
+        
+        if not self.breaker.allow():
+            return self._on_error(user_input, RuntimeError("Claude circuit open"))
+        self._tier_hits["claude"] += 1
+        try:
+            text = await self._acomplete(self._request(user_input))
+        except Exception as e:
+            return self._on_claude_error(user_input, e)
+        self.breaker.record_success()
+        
+        try:
+            result = self._parse(text)
+        except Exception as e:
+            return self._on_error(user_input, e)
+        
+        self._store(user_input, result, embedding)
+        return result
+    
+    def _on_claude_error(self, user_input: str, error: Exception) -> Any:
+        """The call itself failed after the SDK's retries"""
+        self.breaker.record_failure()
+        logger.warning("Claude %s error (%s): %s", claude_error_kind(error), self.namespace, error)
+        return self._on_error(user_input, error)
+    
+    def analyze_batch(self, inputs: List[str]) -> List[Any]:
         """
+        Offline bulk analysis through the Message Batches API: half the token
+        price, but results can take hours, so never use it on a user's turn.
+        Cached inputs are not resubmitted; failed requests get the fallback.
+        """
+        results = [self._cache_get(user_input) for user_input in inputs]
+        requests = [
+            {"custom_id": f"{self.namespace}-{i}", "params": self._request(user_input)}
+            for i, user_input in enumerate(inputs) if results[i] is None
+        ]
+        
+        if requests and not self.breaker.allow():
+            logger.warning("Claude circuit open (%s): %d batch requests get the fallback", self.namespace, len(requests))
+            requests = []
         
-        classification_prompt = f"""
-        You are an expert intent classifier for enterprise IT support and research assistance. Classify the user input into one of these categories:
+        if requests:
+            self._tier_hits["claude"] += len(requests)
+            try:
+                batch = self.client.messages.batches.create(requests=requests)
+            except Exception:
+                self.breaker.record_failure()
+                raise
+            self.breaker.record_success()
+            while batch.processing_status != "ended":
+                time.sleep(BATCH_POLL_INTERVAL)
+                batch = self.client.messages.batches.retrieve(batch.id)
+            
+            # Results stream back in any order; custom_id carries the input index
+            for entry in self.client.messages.batches.results(batch.id):
+                i = int(entry.custom_id.rsplit("-", 1)[1])
+                user_input = inputs[i]
+                try:
+                    if entry.result.type != "succeeded":
+                        raise RuntimeError(f"batch request {entry.result.type}")
+                    self._record_usage(entry.result.message)
+                    result = self._parse(entry.result.message.content[0].text)
+                except Exception as e:
+                    results[i] = self._on_error(user_input, e)
+                    continue
+                self._store(user_input, result)
+                results[i] = result
+        
+        return [
+            result if result is not None else self._fallback(user_input)
+            for result, user_input in zip(results, inputs)
+        ]
 
-        **Categories:**
+class IntentClassifier(ClaudeAnalyzer):
+    namespace = "intent"
+    SCHEMA = ClassificationSchema
+    SEMANTIC_CACHE = True
+    # Classifications run ~150 output tokens
+    MAX_TOKENS = 250
+    MULTI_BATCH_SIZE = 8
+    
+    # Shared by the single- and multi-input prompts
+    CATEGORIES = """**Categories:**
         1. **SYSTEM_INCIDENT**: System outages, not working, broken, down, failed, critical issues
         2. **DATA_QUERY**: Missing data, database queries, updates, specific record searches, attribute changes  
         3. **INFORMATION_REQUEST**: Documentation, process questions, how-to guides, design details
-        4. **RESEARCH_QUERY**: Academic papers, machine learning, algorithms, technical research, literature analysis
+        4. **RESEARCH_QUERY**: Academic papers, machine learning, algorithms, technical research, literature analysis"""
+    
+    GUIDELINES = """**Classification Guidelines:**
+        - "not working", "down", "broken", "failed", "critical" → SYSTEM_INCIDENT (high confidence)
+        - "missing", "update", "search", "claim number", "serial number" → DATA_QUERY (high confidence)  
+        - "how", "what is", "information on", "design", "process" → INFORMATION_REQUEST (high confidence)
+        - "research", "paper", "machine learning", "algorithm", "neural network", "transformer", "analysis of", "compare algorithms" → RESEARCH_QUERY (high confidence)
+        - Mixed signals → lower confidence score
+        - Confidence > 0.8 = high confidence routing
+        - Confidence 0.5-0.8 = medium confidence, may need clarification
+        - Confidence < 0.5 = low confidence, ask for clarification"""
+    
+    SYSTEM_PROMPT = f"""
+        You are an expert intent classifier for enterprise IT support and research assistance. Classify the user input in the user message into one of these categories:
 
-        **User Input:** "{user_input}"
+        {CATEGORIES}
 
         Analyze and return ONLY valid JSON:
         {{
@@ -48,61 +820,169 @@ class IntentClassifier:
             "urgency_indicators": ["indicator1", "indicator2"]
         }}
 
-        **Classification Guidelines:**
-        - "not working", "down", "broken", "failed", "critical" → SYSTEM_INCIDENT (high confidence)
-        - "missing", "update", "search", "claim number", "serial number" → DATA_QUERY (high confidence)  
-        - "how", "what is", "information on", "design", "process" → INFORMATION_REQUEST (high confidence)
-        - "research", "paper", "machine learning", "algorithm", "neural network", "transformer", "analysis of", "compare algorithms" → RESEARCH_QUERY (high confidence)
-        - Mixed signals → lower confidence score
-        - Confidence > 0.8 = high confidence routing
-        - Confidence 0.5-0.8 = medium confidence, may need clarification
-        - Confidence < 0.5 = low confidence, ask for clarification
+        {GUIDELINES}
         """
+    
+    # Unambiguous trigger phrases from GUIDELINES. An input with at least
+    # FAST_PATH_MIN_HITS matches for exactly one intent (and none for the
+    # others) is classified locally without a Claude call.
+    FAST_PATH_MIN_HITS = 2
+    FAST_PATH_PATTERNS = {
+        IntentType.SYSTEM_INCIDENT: re.compile(r"\b(not working|down|broken|failed|failing|critical|outage)\b", re.I),
+        IntentType.DATA_QUERY: re.compile(r"\b(missing|claim number|serial number|update|lookup)\b", re.I),
+        IntentType.INFORMATION_REQUEST: re.compile(r"\b(how to|information on|design|process|documentation)\b", re.I),
+        IntentType.RESEARCH_QUERY: re.compile(r"\b(research|papers?|machine learning|algorithms?|neural networks?|transformers?|compare)\b", re.I)
+    }
+    
+    MULTI_SYSTEM_PROMPT = f"""
+        You are an expert intent classifier for enterprise IT support and research assistance. Classify EACH numbered user input in the user message into one of these categories:
 
-        try:
-            response = self.client.messages.create(
-                model="claude-3-haiku-20240307",
-                max_tokens=500,
-                temperature=0.1,
-                messages=[{"role": "user", "content": classification_prompt}]
-            )
-            
-            result = json.loads(response.content[0].text)
-            
-            return IntentClassification(
-                intent=IntentType(result["intent"]),
-                confidence=result["confidence"],
-                reasoning=result["reasoning"],
-                keywords_matched=result["keywords_matched"],
-                urgency_indicators=result["urgency_indicators"]
-            )
-            
-        except Exception as e:
-            print(f"Classification error: {e}")
-            return IntentClassification(
-                intent=IntentType.UNKNOWN,
-                confidence=0.3,
-                reasoning="Classification failed",
-                keywords_matched=[],
-                urgency_indicators=[]
-            )
+        {CATEGORIES}
 
-class SystemIncidentHandler:
-    def __init__(self, claude_api_key: str):
-        self.client = anthropic.Anthropic(api_key=claude_api_key)
+        Analyze and return ONLY a valid JSON array with one object per input, in the same order:
+        [
+            {{
+                "intent": "system_incident|data_query|information_request|research_query|unknown",
+                "confidence": 0.0-1.0,
+                "reasoning": "Brief explanation of classification",
+                "keywords_matched": ["keyword1", "keyword2"],
+                "urgency_indicators": ["indicator1", "indicator2"]
+            }}
+        ]
+
+        {GUIDELINES}
+        """
+    
+    def classify_intent(self, user_input: str) -> IntentClassification:
+        """
+        Enhanced intent classification with research query support
+        """
+        return self._fast_classify(user_input) or self._analyze(user_input)
+    
+    async def aclassify_intent(self, user_input: str) -> IntentClassification:
+        """Async classify_intent, for overlapping many classifications"""
+        return self._fast_classify(user_input) or await self._aanalyze(user_input)
+    
+    def _fast_classify(self, user_input: str) -> Optional[IntentClassification]:
+        """Keyword pre-classifier; None when the input isn't clear-cut"""
+        hits = {
+            intent: pattern.findall(user_input)
+            for intent, pattern in self.FAST_PATH_PATTERNS.items()
+        }
+        matched = [intent for intent, keywords in hits.items() if keywords]
+        if len(matched) != 1 or len(hits[matched[0]]) < self.FAST_PATH_MIN_HITS:
+            return None
         
-    def analyze_incident(self, user_input: str) -> Dict:
+        intent = matched[0]
+        return IntentClassification(
+            intent=intent,
+            confidence=0.9,
+            reasoning="Matched unambiguous keywords",
+            keywords_matched=[keyword.lower() for keyword in hits[intent]],
+            urgency_indicators=[]
+        )
+    
+    def classify_intent_batch(self, inputs: List[str]) -> List[IntentClassification]:
+        """Offline re-classification/eval runs at Batches API pricing"""
+        return self.analyze_batch(inputs)
+    
+    def classify_intent_multi(self, inputs: List[str], batch_size: int = MULTI_BATCH_SIZE) -> List[IntentClassification]:
         """
-        Specialized analysis for system incidents - focus on criticality and impact
+        Classify several inputs per Claude call, sharing the prompt overhead.
+        Chunks stay small to keep the JSON array reliable; a chunk whose
+        response doesn't parse is retried one input at a time. A failed call
+        or an open circuit gives the chunk the fallback.
         """
+        results = [self._cache_get(user_input) for user_input in inputs]
+        pending = [i for i, result in enumerate(results) if result is None]
         
-        incident_prompt = f"""
-        You are a critical incident analyzer. Analyze this system incident report:
+        for start in range(0, len(pending), batch_size):
+            chunk = pending[start:start + batch_size]
+            chunk_inputs = [inputs[i] for i in chunk]
+            
+            if not self.breaker.allow():
+                for i, user_input in zip(chunk, chunk_inputs):
+                    results[i] = self._on_error(user_input, RuntimeError("Claude circuit open"))
+                continue
+            
+            self._tier_hits["claude"] += len(chunk)
+            try:
+                response = self.client.messages.create(**self._request_for_prompt(
+                    self._build_multi_prompt(chunk_inputs),
+                    max_tokens=self.MAX_TOKENS * len(chunk),
+                    system=self.MULTI_SYSTEM_PROMPT
+                ))
+            except Exception as e:
+                # Fallback for the whole chunk; retrying input by input would
+                # just repeat the failing call
+                self.breaker.record_failure()
+                logger.warning("Claude %s error (multi-input %s): %s", claude_error_kind(e), self.namespace, e)
+                for i, user_input in zip(chunk, chunk_inputs):
+                    results[i] = self._on_error(user_input, e)
+                continue
+            self.breaker.record_success()
+            
+            try:
+                self._record_usage(response)
+                items = json_loads(response.content[0].text)
+                if not isinstance(items, list) or len(items) != len(chunk):
+                    raise ValueError(f"expected {len(chunk)} classifications")
+                classifications = [self._from_result(item) for item in items]
+            except Exception as e:
+                logger.warning("Multi-input classification error: %s", e)
+                for i, user_input in zip(chunk, chunk_inputs):
+                    results[i] = self.classify_intent(user_input)
+                continue
+            
+            for i, user_input, classification in zip(chunk, chunk_inputs, classifications):
+                self._store(user_input, classification)
+                results[i] = classification
+        
+        return results
+    
+    def _build_multi_prompt(self, inputs: List[str]) -> str:
+        numbered_inputs = "\n".join(
+            f'{i}. "' + user_input.replace('"', '\\"') + '"' for i, user_input in enumerate(inputs, 1)
+        )
+        return f"**User Inputs:**\n{numbered_inputs}"
+    
+    def _parse(self, text: str) -> IntentClassification:
+        return IntentClassification(**ClassificationSchema.model_validate_json(text).model_dump())
+    
+    def _from_result(self, result: Dict[str, Any]) -> IntentClassification:
+        return IntentClassification(**ClassificationSchema.model_validate(result).model_dump())
+    
+    def _to_cache_value(self, result: IntentClassification) -> Dict[str, Any]:
+        return {**asdict(result), "intent": result.intent.value}
+    
+    def _from_cache_value(self, value: Dict[str, Any]) -> IntentClassification:
+        return IntentClassification(**{**value, "intent": IntentType(value["intent"])})
+    
+    def _is_negative(self, result: IntentClassification) -> bool:
+        return result.confidence < LOW_CONFIDENCE_THRESHOLD
+    
+    def _on_error(self, user_input: str, error: Exception) -> IntentClassification:
+        logger.warning("Classification error: %s", error)
+        return self._fallback(user_input)
+    
+    def _fallback(self, user_input: str) -> IntentClassification:
+        return IntentClassification(
+            intent=IntentType.UNKNOWN,
+            confidence=0.3,
+            reasoning="Classification failed",
+            keywords_matched=[],
+            urgency_indicators=[]
+        )
 
-        **User Input:** "{user_input}"
+class SystemIncidentHandler(ClaudeAnalyzer):
+    namespace = "incident"
+    SCHEMA = IncidentAnalysis
+    
+    SYSTEM_PROMPT = """
+        You are a critical incident analyzer. Analyze the system incident report in the user message.
 
         Return JSON analysis:
-        {{
+        {
             "severity": "critical|high|medium|low",
             "affected_system": "warranty|claims|engine|integration|general",
             "business_impact": "Brief impact description",
@@ -113,7 +993,7 @@ class SystemIncidentHandler:
             "estimated_downtime": "time estimate or unknown",
             "ticket_summary": "Concise ticket title",
             "ticket_description": "Detailed technical description"
-        }}
+        }
 
         **Severity Guidelines:**
         - CRITICAL: Complete system down, all users affected, business-critical
@@ -123,21 +1003,17 @@ class SystemIncidentHandler:
 
         Focus on business impact and technical details for ServiceNow ticket creation.
         """
-
-        try:
-            response = self.client.messages.create(
-                model="claude-3-haiku-20240307",
-                max_tokens=800,
-                temperature=0.1,
-                messages=[{"role": "user", "content": incident_prompt}]
-            )
-            
-            return json.loads(response.content[0].text)
-            
-        except Exception as e:
-            return self._fallback_incident_analysis(user_input)
     
-    def _fallback_incident_analysis(self, user_input: str) -> Dict:
+    def analyze_incident(self, user_input: str) -> Dict:
+        """
+        Specialized analysis for system incidents - focus on criticality and impact
+        """
+        return self._analyze(user_input)
+    
+    async def aanalyze_incident(self, user_input: str) -> Dict:
+        return await self._aanalyze(user_input)
+    
+    def _fallback(self, user_input: str) -> Dict:
         return {
             "severity": "high",
             "affected_system": "general", 
@@ -151,33 +1027,26 @@ class SystemIncidentHandler:
             "ticket_description": f"User reported: {user_input}"
         }
 
-class DataQueryHandler:
-    def __init__(self, claude_api_key: str):
-        self.client = anthropic.Anthropic(api_key=claude_api_key)
-        
-    def analyze_data_query(self, user_input: str) -> Dict:
-        """
-        Specialized analysis for data queries - focus on DB operations and missing data
-        """
-        
-        data_query_prompt = f"""
-        You are a data query analyzer. Analyze this data-related request:
-
-        **User Input:** "{user_input}"
+class DataQueryHandler(ClaudeAnalyzer):
+    namespace = "data_query"
+    SCHEMA = DataQueryAnalysis
+    
+    SYSTEM_PROMPT = """
+        You are a data query analyzer. Analyze the data-related request in the user message.
 
         Return JSON analysis:
-        {{
+        {
             "query_type": "search|update|insert|delete|verification",
             "target_system": "claims_db|warranty_db|engine_db|general_db",
             "data_elements": ["element1", "element2"],
-            "search_criteria": {{"field": "value"}},
+            "search_criteria": {"field": "value"},
             "requires_approval": true|false,
             "risk_level": "low|medium|high",
             "sql_intent": "Brief description of what SQL operation would be needed",
             "business_justification": "Why this data operation is needed",
             "next_steps": ["step1", "step2"],
             "estimated_complexity": "simple|moderate|complex"
-        }}
+        }
 
         **Query Type Guidelines:**
         - SEARCH: "missing", "find", "lookup", "where is"
@@ -187,21 +1056,17 @@ class DataQueryHandler:
 
         Focus on data accuracy, approval requirements, and operational impact.
         """
-
-        try:
-            response = self.client.messages.create(
-                model="claude-3-haiku-20240307",
-                max_tokens=800,
-                temperature=0.1,
-                messages=[{"role": "user", "content": data_query_prompt}]
-            )
-            
-            return json.loads(response.content[0].text)
-            
-        except Exception as e:
-            return self._fallback_data_analysis(user_input)
     
-    def _fallback_data_analysis(self, user_input: str) -> Dict:
+    def analyze_data_query(self, user_input: str) -> Dict:
+        """
+        Specialized analysis for data queries - focus on DB operations and missing data
+        """
+        return self._analyze(user_input)
+    
+    async def aanalyze_data_query(self, user_input: str) -> Dict:
+        return await self._aanalyze(user_input)
+    
+    def _fallback(self, user_input: str) -> Dict:
         return {
             "query_type": "search",
             "target_system": "general_db",
@@ -215,22 +1080,15 @@ class DataQueryHandler:
             "estimated_complexity": "moderate"
         }
 
-class InformationRequestHandler:
-    def __init__(self, claude_api_key: str):
-        self.client = anthropic.Anthropic(api_key=claude_api_key)
-        
-    def analyze_info_request(self, user_input: str) -> Dict:
-        """
-        Specialized analysis for information requests - focus on knowledge base and documentation
-        """
-        
-        info_request_prompt = f"""
-        You are a knowledge base analyzer. Analyze this information request:
-
-        **User Input:** "{user_input}"
+class InformationRequestHandler(ClaudeAnalyzer):
+    namespace = "info_request"
+    SCHEMA = InfoRequestAnalysis
+    
+    SYSTEM_PROMPT = """
+        You are a knowledge base analyzer. Analyze the information request in the user message.
 
         Return JSON analysis:
-        {{
+        {
             "info_category": "process|technical|policy|training|troubleshooting",
             "topic_area": "claims|warranty|engine|integration|general",
             "specificity": "general|specific|detailed",
@@ -241,7 +1099,7 @@ class InformationRequestHandler:
             "follow_up_likely": true|false,
             "suggested_resources": ["resource1", "resource2"],
             "complexity_level": "basic|intermediate|advanced"
-        }}
+        }
 
         **Category Guidelines:**
         - PROCESS: "how to", "steps", "procedure", "workflow"
@@ -251,21 +1109,17 @@ class InformationRequestHandler:
 
         Focus on finding the right knowledge source and response format.
         """
-
-        try:
-            response = self.client.messages.create(
-                model="claude-3-haiku-20240307",
-                max_tokens=800,
-                temperature=0.1,
-                messages=[{"role": "user", "content": info_request_prompt}]
-            )
-            
-            return json.loads(response.content[0].text)
-            
-        except Exception as e:
-            return self._fallback_info_analysis(user_input)
     
-    def _fallback_info_analysis(self, user_input: str) -> Dict:
+    def analyze_info_request(self, user_input: str) -> Dict:
+        """
+        Specialized analysis for information requests - focus on knowledge base and documentation
+        """
+        return self._analyze(user_input)
+    
+    async def aanalyze_info_request(self, user_input: str) -> Dict:
+        return await self._aanalyze(user_input)
+    
+    def _fallback(self, user_input: str) -> Dict:
         return {
             "info_category": "general",
             "topic_area": "general",
@@ -279,24 +1133,17 @@ class InformationRequestHandler:
             "complexity_level": "basic"
         }
 
-class ResearchQueryHandler:
+class ResearchQueryHandler(ClaudeAnalyzer):
     """NEW: Handler for research paper queries"""
     
-    def __init__(self, claude_api_key: str):
-        self.client = anthropic.Anthropic(api_key=claude_api_key)
-        
-    def analyze_research_query(self, user_input: str) -> Dict:
-        """
-        Specialized analysis for research queries - focus on academic content and analysis type
-        """
-        
-        research_prompt = f"""
-        You are a research query analyzer. Analyze this research-related request:
-
-        **User Input:** "{user_input}"
+    namespace = "research_query"
+    SCHEMA = ResearchQueryAnalysis
+    
+    SYSTEM_PROMPT = """
+        You are a research query analyzer. Analyze the research-related request in the user message.
 
         Return JSON analysis:
-        {{
+        {
             "research_type": "paper_search|topic_analysis|comparison|methodology|survey",
             "subject_area": "machine_learning|nlp|computer_vision|ai|general_cs|other",
             "analysis_depth": "overview|detailed|comprehensive|technical",
@@ -308,7 +1155,7 @@ class ResearchQueryHandler:
             "time_sensitivity": "immediate|routine|background_research",
             "follow_up_questions": ["question1", "question2"],
             "suggested_approach": "direct_search|multi_source_analysis|concept_mapping"
-        }}
+        }
 
         **Research Type Guidelines:**
         - PAPER_SEARCH: "find papers", "literature on", "research about"
@@ -319,21 +1166,17 @@ class ResearchQueryHandler:
 
         Focus on academic rigor and research methodology.
         """
-
-        try:
-            response = self.client.messages.create(
-                model="claude-3-haiku-20240307",
-                max_tokens=800,
-                temperature=0.1,
-                messages=[{"role": "user", "content": research_prompt}]
-            )
-            
-            return json.loads(response.content[0].text)
-            
-        except Exception as e:
-            return self._fallback_research_analysis(user_input)
     
-    def _fallback_research_analysis(self, user_input: str) -> Dict:
+    def analyze_research_query(self, user_input: str) -> Dict:
+        """
+        Specialized analysis for research queries - focus on academic content and analysis type
+        """
+        return self._analyze(user_input)
+    
+    async def aanalyze_research_query(self, user_input: str) -> Dict:
+        return await self._aanalyze(user_input)
+    
+    def _fallback(self, user_input: str) -> Dict:
         return {
             "research_type": "topic_analysis",
             "subject_area": "general_cs",
@@ -348,76 +1191,14 @@ class ResearchQueryHandler:
             "suggested_approach": "direct_search"
         }
 
-class SmartChatbotOrchestrator:
-    def __init__(self, claude_api_key: str):
-        self.intent_classifier = IntentClassifier(claude_api_key)
-        self.incident_handler = SystemIncidentHandler(claude_api_key)
-        self.data_handler = DataQueryHandler(claude_api_key)
-        self.info_handler = InformationRequestHandler(claude_api_key)
-        self.research_handler = ResearchQueryHandler(claude_api_key)  # NEW
-        
-        self.CONFIDENCE_THRESHOLD = 0.7
-        
-    def process_user_input(self, user_input: str, user_id: str) -> Dict:
-        """
-        Enhanced orchestrator - now handles research queries too
-        """
-        
-        print(f"🎯 Classifying intent for: '{user_input}'")
-        
-        # Step 1: Intent Classification
-        classification = self.intent_classifier.classify_intent(user_input)
-        
-        print(f"📊 Intent: {classification.intent.value} | Confidence: {classification.confidence:.2f}")
-        print(f"🔍 Keywords: {classification.keywords_matched}")
-        
-        result = {
-            "user_input": user_input,
-            "classification": classification,
-            "specialized_analysis": None,
-            "action_taken": None,
-            "response_message": "",
-            "confidence_level": "high" if classification.confidence > 0.8 else "medium" if classification.confidence > 0.5 else "low"
-        }
-        
-        # Step 2: Route to specialized handler based on confidence
-        if classification.confidence < 0.5:
-            result["response_message"] = self._handle_low_confidence(user_input, classification)
-            result["action_taken"] = "clarification_requested"
-            
-        elif classification.intent == IntentType.SYSTEM_INCIDENT:
-            analysis = self.incident_handler.analyze_incident(user_input)
-            result["specialized_analysis"] = analysis
-            result["response_message"] = self._format_incident_response(analysis)
-            result["action_taken"] = "incident_ticket_created"
-            
-        elif classification.intent == IntentType.DATA_QUERY:
-            analysis = self.data_handler.analyze_data_query(user_input)
-            result["specialized_analysis"] = analysis
-            result["response_message"] = self._format_data_query_response(analysis)
-            result["action_taken"] = "data_operation_initiated"
-            
-        elif classification.intent == IntentType.INFORMATION_REQUEST:
-            analysis = self.info_handler.analyze_info_request(user_input)
-            result["specialized_analysis"] = analysis
-            result["response_message"] = self._format_info_response(analysis)
-            result["action_taken"] = "knowledge_search_performed"
-            
-        elif classification.intent == IntentType.RESEARCH_QUERY:  # NEW
-            analysis = self.research_handler.analyze_research_query(user_input)
-            result["specialized_analysis"] = analysis
-            result["response_message"] = self._format_research_response(analysis)
-            result["action_taken"] = "research_analysis_initiated"
-            
-        else:
-            result["response_message"] = "I'm not sure how to help with that. Can you provide more details?"
-            result["action_taken"] = "general_fallback"
-        
-        return result
-    
-    def _handle_low_confidence(self, user_input: str, classification: IntentClassification) -> str:
-        return f"""
-        I'm not entirely sure how to categorize your request (confidence: {classification.confidence:.1f}).
+# ================================
+# Response Templates
+# ================================
+
+# Static response bodies, filled with str.format_map() per turn so the
+# message text isn't re-parsed as an f-string on every call
+LOW_CONFIDENCE_TEMPLATE = """
+        I'm not entirely sure how to categorize your request (confidence: {confidence:.1f}).
         
         Could you help me understand if you're asking about:
         1. 🚨 A **system issue** (something not working/broken)
@@ -427,98 +1208,292 @@ class SmartChatbotOrchestrator:
         
         This will help me assist you better!
         """
-    
-    def _format_incident_response(self, analysis: Dict) -> str:
-        return f"""
+
+INCIDENT_RESPONSE_TEMPLATE = """
         🚨 **Critical System Incident Detected**
         
-        **Severity:** {analysis['severity'].upper()}
-        **System:** {analysis['affected_system'].title()}
-        **Impact:** {analysis['business_impact']}
+        **Severity:** {severity_upper}
+        **System:** {affected_system_title}
+        **Impact:** {business_impact}
         
         ✅ **Immediate Actions Taken:**
-        • Created {analysis['severity']} priority incident ticket
-        • Assigned to: {analysis['assignment_group']}
-        • {"Escalated to management" if analysis['escalation_needed'] else "Standard response process"}
+        • Created {severity} priority incident ticket
+        • Assigned to: {assignment_group}
+        • {escalation}
         
         📋 **Ticket Details:**
-        • **Title:** {analysis['ticket_summary']}
-        • **Estimated Response:** {self._get_sla_time(analysis['severity'])}
+        • **Title:** {ticket_summary}
+        • **Estimated Response:** {sla_time}
         
         You'll receive updates as the incident progresses. Is there additional context you can provide?
         """
-    
-    def _format_data_query_response(self, analysis: Dict) -> str:
-        approval_msg = "⚠️ **Admin approval required**" if analysis['requires_approval'] else "✅ **No approval needed**"
-        
-        return f"""
+
+DATA_QUERY_RESPONSE_TEMPLATE = """
         🔍 **Data Query Request**
         
-        **Operation:** {analysis['query_type'].title()}
-        **Target System:** {analysis['target_system'].replace('_', ' ').title()}
-        **Complexity:** {analysis['estimated_complexity'].title()}
+        **Operation:** {query_type_title}
+        **Target System:** {target_system_title}
+        **Complexity:** {complexity_title}
         
         {approval_msg}
         
         📋 **Next Steps:**
-        {chr(10).join(f"• {step}" for step in analysis['next_steps'])}
+        {next_steps_list}
         
-        **Business Justification:** {analysis['business_justification']}
+        **Business Justification:** {business_justification}
         
         Would you like me to proceed with this data operation?
         """
-    
-    def _format_info_response(self, analysis: Dict) -> str:
-        return f"""
+
+INFO_RESPONSE_TEMPLATE = """
         📚 **Information Request**
         
-        **Category:** {analysis['info_category'].title()}
-        **Topic:** {analysis['topic_area'].title()}
-        **Complexity:** {analysis['complexity_level'].title()}
+        **Category:** {info_category_title}
+        **Topic:** {topic_area_title}
+        **Complexity:** {complexity_title}
         
         **Recommended Sources:**
-        {chr(10).join(f"• {resource}" for resource in analysis['suggested_resources'])}
+        {resources_list}
         
-        **Response Format:** {analysis['response_format'].title()}
-        **Estimated Time:** {analysis['estimated_response_time']}
+        **Response Format:** {response_format_title}
+        **Estimated Time:** {estimated_response_time}
         
         Let me search our knowledge base for this information...
         """
-    
-    def _format_research_response(self, analysis: Dict) -> str:
-        """NEW: Format research query response"""
-        return f"""
+
+RESEARCH_RESPONSE_TEMPLATE = """
         📊 **Research Query Analysis**
         
-        **Research Type:** {analysis['research_type'].replace('_', ' ').title()}
-        **Subject Area:** {analysis['subject_area'].replace('_', ' ').title()}
-        **Analysis Depth:** {analysis['analysis_depth'].title()}
-        **Academic Level:** {analysis['academic_level'].title()}
+        **Research Type:** {research_type}
+        **Subject Area:** {subject_area}
+        **Analysis Depth:** {analysis_depth}
+        **Academic Level:** {academic_level}
         
-        **Approach:** {analysis['suggested_approach'].replace('_', ' ').title()}
-        **Multi-hop Reasoning:** {"Required" if analysis['multi_hop_reasoning'] else "Not needed"}
-        **Knowledge Graph:** {"Will be used" if analysis['knowledge_graph_needed'] else "Not required"}
+        **Approach:** {approach}
+        **Multi-hop Reasoning:** {multi_hop}
+        **Knowledge Graph:** {knowledge_graph}
         
-        **Expected Output:** {analysis['expected_output'].replace('_', ' ').title()}
-        **Time Sensitivity:** {analysis['time_sensitivity'].replace('_', ' ').title()}
+        **Expected Output:** {expected_output}
+        **Time Sensitivity:** {time_sensitivity}
         
         🔍 **Processing your research query through our academic knowledge base...**
         
         **Potential Follow-up Questions:**
-        {chr(10).join(f"• {q}" for q in analysis.get('follow_up_questions', []))}
+        {follow_up_list}
         """
+
+SLA_TIMES = {
+    "critical": "30 minutes",
+    "high": "4 hours", 
+    "medium": "24 hours",
+    "low": "72 hours"
+}
+
+class SmartChatbotOrchestrator:
+    def __init__(self, claude_api_key: str):
+        # One sync and one async Claude client shared by all five components,
+        # so they reuse a single keep-alive pool (HTTP/2 when available)
+        # instead of five pools each paying their own TLS handshakes
+        limits = httpx.Limits(max_keepalive_connections=32, max_connections=64)
+        self._client = anthropic.Anthropic(
+            api_key=claude_api_key,
+            max_retries=CLAUDE_MAX_RETRIES,
+            http_client=httpx.Client(http2=HTTP2_AVAILABLE, limits=limits)
+        )
+        self._async_client = anthropic.AsyncAnthropic(
+            api_key=claude_api_key,
+            max_retries=CLAUDE_MAX_RETRIES,
+            http_client=httpx.AsyncClient(http2=HTTP2_AVAILABLE, limits=limits)
+        )
+        # One breaker for the shared client pair: its API key and connection
+        # fail or recover together for every component
+        clients = (self._client, self._async_client, CircuitBreaker(CIRCUIT_FAIL_MAX, CIRCUIT_RESET_TIMEOUT))
+        
+        self.intent_classifier = IntentClassifier(*clients)
+        self.incident_handler = SystemIncidentHandler(*clients)
+        self.data_handler = DataQueryHandler(*clients)
+        self.info_handler = InformationRequestHandler(*clients)
+        self.research_handler = ResearchQueryHandler(*clients)  # NEW
+        
+        self.CONFIDENCE_THRESHOLD = 0.7
+        
+        # Intent -> (analyze, async analyze, response formatter, action_taken)
+        self._dispatch = {
+            IntentType.SYSTEM_INCIDENT: (
+                self.incident_handler.analyze_incident, self.incident_handler.aanalyze_incident,
+                self._format_incident_response, "incident_ticket_created"
+            ),
+            IntentType.DATA_QUERY: (
+                self.data_handler.analyze_data_query, self.data_handler.aanalyze_data_query,
+                self._format_data_query_response, "data_operation_initiated"
+            ),
+            IntentType.INFORMATION_REQUEST: (
+                self.info_handler.analyze_info_request, self.info_handler.aanalyze_info_request,
+                self._format_info_response, "knowledge_search_performed"
+            ),
+            IntentType.RESEARCH_QUERY: (  # NEW
+                self.research_handler.analyze_research_query, self.research_handler.aanalyze_research_query,
+                self._format_research_response, "research_analysis_initiated"
+            )
+        }
+        
+    def _components(self):
+        return (self.intent_classifier, self.incident_handler, self.data_handler,
+                self.info_handler, self.research_handler)
+        
+    def clear_caches(self):
+        """Admin hook: forget every cached classification and analysis"""
+        for component in self._components():
+            component.cache_clear()
     
-    def _get_sla_time(self, severity: str) -> str:
-        sla_times = {
-            "critical": "30 minutes",
-            "high": "4 hours", 
-            "medium": "24 hours",
-            "low": "72 hours"
+    def cache_stats(self) -> Dict[str, Dict[str, int]]:
+        """Per-tier cache hit counts for each component"""
+        return {component.namespace: component.cache_stats() for component in self._components()}
+    
+    async def aclose(self):
+        """Close the shared async Claude client"""
+        await self._async_client.close()
+        
+    def process_user_input(self, user_input: str, user_id: str) -> Dict:
+        """
+        Enhanced orchestrator - now handles research queries too
+        """
+        
+        logger.debug("Classifying intent for: '%s'", user_input)
+        
+        # Step 1: Intent Classification
+        classification = self.intent_classifier.classify_intent(user_input)
+        result = self._new_result(user_input, classification)
+        
+        # Step 2: Route to specialized handler based on confidence
+        entry = self._route(result, user_input, classification)
+        if entry is not None:
+            analyze, _, format_response, action = entry
+            self._apply_analysis(result, analyze(user_input), format_response, action)
+        
+        return result
+    
+    async def aprocess_user_input(self, user_input: str, user_id: str, speculative: bool = False) -> Dict:
+        """
+        Async process_user_input; concurrent calls overlap their Claude round trips.
+        speculative=True starts all four handlers alongside the classifier and
+        cancels the ones that lose - lower latency for interactive use, at up
+        to 5x the token cost, so batch callers should leave it off.
+        """
+        
+        speculative_tasks = {}
+        if speculative:
+            speculative_tasks = {
+                intent: asyncio.create_task(aanalyze(user_input))
+                for intent, (_, aanalyze, _, _) in self._dispatch.items()
+            }
+        
+        try:
+            logger.debug("Classifying intent for: '%s'", user_input)
+            
+            # Step 1: Intent Classification
+            classification = await self.intent_classifier.aclassify_intent(user_input)
+            result = self._new_result(user_input, classification)
+            
+            # Step 2: Route to specialized handler based on confidence
+            entry = self._route(result, user_input, classification)
+            if entry is not None:
+                _, aanalyze, format_response, action = entry
+                task = speculative_tasks.get(classification.intent)
+                analysis = await task if task is not None else await aanalyze(user_input)
+                self._apply_analysis(result, analysis, format_response, action)
+            
+            return result
+            
+        finally:
+            for task in speculative_tasks.values():
+                task.cancel()
+    
+    def _new_result(self, user_input: str, classification: IntentClassification) -> Dict:
+        logger.debug("Intent: %s | Confidence: %.2f", classification.intent.value, classification.confidence)
+        logger.debug("Keywords: %s", classification.keywords_matched)
+        
+        return {
+            "user_input": user_input,
+            "classification": classification,
+            "specialized_analysis": None,
+            "action_taken": None,
+            "response_message": "",
+            "confidence_level": "high" if classification.confidence > 0.8 else "medium" if classification.confidence > 0.5 else "low"
         }
-        return sla_times.get(severity, "24 hours")
+    
+    def _route(self, result: Dict, user_input: str, classification: IntentClassification) -> Optional[Tuple]:
+        """Dispatch entry for the intent, or None after filling in a clarification/fallback reply"""
+        if classification.confidence < LOW_CONFIDENCE_THRESHOLD:
+            result["response_message"] = self._handle_low_confidence(user_input, classification)
+            result["action_taken"] = "clarification_requested"
+            return None
+        
+        entry = self._dispatch.get(classification.intent)
+        if entry is None:
+            result["response_message"] = "I'm not sure how to help with that. Can you provide more details?"
+            result["action_taken"] = "general_fallback"
+        return entry
+    
+    def _apply_analysis(self, result: Dict, analysis: Dict, format_response: Callable[[Dict], str], action: str):
+        result["specialized_analysis"] = analysis
+        result["response_message"] = format_response(analysis)
+        result["action_taken"] = action
+    
+    def _handle_low_confidence(self, user_input: str, classification: IntentClassification) -> str:
+        return LOW_CONFIDENCE_TEMPLATE.format(confidence=classification.confidence)
+    
+    def _format_incident_response(self, analysis: Dict) -> str:
+        return INCIDENT_RESPONSE_TEMPLATE.format_map({
+            **analysis,
+            "severity_upper": analysis['severity'].upper(),
+            "affected_system_title": analysis['affected_system'].title(),
+            "escalation": "Escalated to management" if analysis['escalation_needed'] else "Standard response process",
+            "sla_time": self._get_sla_time(analysis['severity'])
+        })
+    
+    def _format_data_query_response(self, analysis: Dict) -> str:
+        return DATA_QUERY_RESPONSE_TEMPLATE.format_map({
+            **analysis,
+            "query_type_title": analysis['query_type'].title(),
+            "target_system_title": analysis['target_system'].replace('_', ' ').title(),
+            "complexity_title": analysis['estimated_complexity'].title(),
+            "approval_msg": "⚠️ **Admin approval required**" if analysis['requires_approval'] else "✅ **No approval needed**",
+            "next_steps_list": bullet_list(analysis['next_steps'])
+        })
+    
+    def _format_info_response(self, analysis: Dict) -> str:
+        return INFO_RESPONSE_TEMPLATE.format_map({
+            **analysis,
+            "info_category_title": analysis['info_category'].title(),
+            "topic_area_title": analysis['topic_area'].title(),
+            "complexity_title": analysis['complexity_level'].title(),
+            "resources_list": bullet_list(analysis['suggested_resources']),
+            "response_format_title": analysis['response_format'].title()
+        })
+    
+    def _format_research_response(self, analysis: Dict) -> str:
+        """NEW: Format research query response"""
+        return RESEARCH_RESPONSE_TEMPLATE.format_map({
+            "research_type": analysis['research_type'].replace('_', ' ').title(),
+            "subject_area": analysis['subject_area'].replace('_', ' ').title(),
+            "analysis_depth": analysis['analysis_depth'].title(),
+            "academic_level": analysis['academic_level'].title(),
+            "approach": analysis['suggested_approach'].replace('_', ' ').title(),
+            "multi_hop": "Required" if analysis['multi_hop_reasoning'] else "Not needed",
+            "knowledge_graph": "Will be used" if analysis['knowledge_graph_needed'] else "Not required",
+            "expected_output": analysis['expected_output'].replace('_', ' ').title(),
+            "time_sensitivity": analysis['time_sensitivity'].replace('_', ' ').title(),
+            "follow_up_list": bullet_list(analysis.get('follow_up_questions', []))
+        })
+    
+    def _get_sla_time(self, severity: str) -> str:
+        return SLA_TIMES.get(severity, "24 hours")
 
 # Example Usage
 if __name__ == "__main__":
+    listener = configure_logging(logger)
+    
     # Initialize the enhanced orchestrator
     chatbot = SmartChatbotOrchestrator("*******")
     
@@ -532,8 +1507,19 @@ if __name__ == "__main__":
         "Analyze neural machine translation techniques"      # NEW
     ]
     
-    for test_input in test_cases:
+    # Classify all test cases concurrently instead of one round trip at a time
+    async def run_test_cases():
+        try:
+            return await asyncio.gather(*[
+                chatbot.aprocess_user_input(test_input, "test.user@company.com")
+                for test_input in test_cases
+            ])
+        finally:
+            await chatbot.aclose()
+    
+    for result in asyncio.run(run_test_cases()):
         print(f"\n{'='*60}")
-        result = chatbot.process_user_input(test_input, "test.user@company.com")
         print(result["response_message"])
-        print(f"Action: {result['action_taken']} | Confidence: {result['confidence_level']}")
\ No newline at end of file
+        print(f"Action: {result['action_taken']} | Confidence: {result['confidence_level']}")
+    
+    listener.stop()
\ No newline at end of file
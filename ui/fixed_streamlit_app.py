@@ -5,16 +5,346 @@ NOW INCLUDES: Research Query Support
 """
 
 import streamlit as st
+import requests
+from requests.adapters import HTTPAdapter
 import asyncio
 import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import asdict, is_dataclass
+from enum import Enum
+from uuid import uuid4
+from common import json_loads, new_event_loop
 
-# THIS IS THE KEY - Import the complete workflow
+def _json_default(value):
+    """Classification dataclasses and enums in workflow details; anything else as text"""
+    if is_dataclass(value):
+        return asdict(value)
+    if isinstance(value, Enum):
+        return value.value
+    return str(value)
+
+# Workflow details are kept as compact JSON bytes and only decoded when an
+# expander is drawn (json_loads); orjson when installed, else the stdlib
 try:
+    import orjson
+    
+    def json_dumps_bytes(obj) -> bytes:
+        return orjson.dumps(obj, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+except ImportError:
+    def json_dumps_bytes(obj) -> bytes:
+        return json.dumps(obj, default=_json_default, separators=(",", ":")).encode("utf-8")
+
+# MCP servers probed by "Check Servers": (display name, port)
+SERVERS = (
+    ("ServiceNow", 8082),
+    ("Database", 8083),
+    ("Research", 8084),
+)
+
+# Per-probe requests timeout, and the hard cap on the whole panel: requests
+# applies its timeout per connect/read phase, so one probe can run past it
+HEALTH_PROBE_TIMEOUT = 3
+HEALTH_PANEL_TIMEOUT = 3.5
+
+@st.cache_resource(show_spinner=False)
+def get_http_session():
+    """Keep-alive session for health probes, reused across clicks and reruns"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=8, pool_maxsize=8, max_retries=0)
+    session.mount("http://", adapter)
+    return session
+
+def probe_server(port: int) -> bool:
+    try:
+        return get_http_session().get(f"http://localhost:{port}/health", timeout=HEALTH_PROBE_TIMEOUT).status_code == 200
+    except requests.RequestException:
+        return False
+
+# Seconds a health result is reused, so repeated clicks don't re-probe
+HEALTH_CACHE_TTL = 10
+
+# Minimum seconds between accepted "Check Servers" clicks
+HEALTH_CLICK_DEBOUNCE = 2.0
+
+@st.cache_data(ttl=HEALTH_CACHE_TTL, show_spinner=False)
+def check_servers() -> list:
+    """
+    (name, port, healthy) for each server. All are probed at once, and a
+    probe still running after HEALTH_PANEL_TIMEOUT counts as down.
+    """
+    executor = ThreadPoolExecutor(max_workers=len(SERVERS))
+    futures = [executor.submit(probe_server, port) for _, port in SERVERS]
+    wait(futures, timeout=HEALTH_PANEL_TIMEOUT)
+    # Don't block on stragglers; their threads finish in the background
+    executor.shutdown(wait=False)
+    return [
+        (name, port, future.done() and future.result())
+        for (name, port), future in zip(SERVERS, futures)
+    ]
+
+@st.cache_resource(show_spinner=False)
+def load_workflow_class():
+    """
+    Import the complete workflow on first use: it pulls in the Claude SDK,
+    MCP client and HTTP stacks, which would otherwise hold up the first paint
+    """
     from complete_chatbot_workflow import CompleteChatbotWorkflow
-    WORKFLOW_AVAILABLE = True
-except ImportError as e:
-    st.error(f"❌ Cannot import complete workflow: {e}")
-    WORKFLOW_AVAILABLE = False
+    return CompleteChatbotWorkflow
+
+@st.cache_resource(show_spinner=False)
+def get_workflow(api_key: str):
+    """One workflow (Claude clients, MCP client, caches) per API key, shared across reruns"""
+    return load_workflow_class()(api_key)
+
+# Seconds a (prompt, user) answer is reused; a repeat within the window
+# returns the original reply without a new workflow run
+WORKFLOW_CACHE_TTL = 24 * 60 * 60
+
+# Only read-only replies are reused. Ticket-creating workflows must file a new
+# ticket each time, live data lookups must see current rows, and failed turns
+# must actually run again once ServiceNow or the database recovers.
+CACHEABLE_WORKFLOWS = frozenset({"research_query", "information_request"})
+
+# Upper bound on one chat turn; an unresponsive Claude or MCP server gets a
+# timeout reply instead of an indefinite spinner. The turn and the detection
+# and search tasks it started are cancelled, but a ticket request already
+# sent to ServiceNow can't be recalled, so the reply says so.
+WORKFLOW_TIMEOUT = 30
+TIMEOUT_MESSAGE = (
+    f"⏱️ Request timed out after {WORKFLOW_TIMEOUT}s. If it was creating a ticket, "
+    "the ticket may still have been filed - please check ServiceNow before trying again."
+)
+
+# Example buttons under the chat: (label, query)
+EXAMPLES = (
+    ("🚨 System Issue", "The downstream integration to Warranty system is not working"),
+    ("🔍 Missing Claim", "I am missing Brazil claim number '1-ABCD' in the Claims report"),
+    ("🔧 Engine Update", "I need help updating the Engine with Serial number '12345678' model name from 'X10' to 'X15'"),
+    ("📊 Research Query", "What are transformer models in machine learning?"),
+    ("🧠 AI Comparison", "Compare LSTM and transformer architectures for NLP tasks"),
+    ("📈 Research Analysis", "Analyze recent advances in neural machine translation"),
+    ("🔬 Algorithm Study", "Find papers on attention mechanisms in deep learning"),
+    ("📚 Process Info", "Can I get more information on how the Brazil claims are uploaded to reliability system?"),
+)
+
+# Static help text for the Research Capabilities expander
+RESEARCH_FEATURES_MD = """
+**What you can ask about:**
+
+**🤖 Machine Learning & AI:**
+- "What are transformer models?"
+- "Compare different neural network architectures"
+- "Explain attention mechanisms in deep learning"
+- "What are the latest advances in computer vision?"
+
+**📝 Natural Language Processing:**
+- "Compare LSTM vs transformer for NLP"
+- "How does BERT work?"
+- "Recent advances in neural machine translation"
+
+**🔍 Research Analysis:**
+- "Find relationships between concept A and concept B"
+- "Analyze the evolution of reinforcement learning"
+- "What are the current challenges in AI safety?"
+
+**📊 Technical Deep Dives:**
+- "Explain backpropagation algorithm"
+- "Compare different optimization techniques"
+- "What is federated learning?"
+
+The system uses multi-hop reasoning and knowledge graphs to provide comprehensive research insights!
+"""
+
+SYSTEM_ISSUES_MD = """
+**System Issues → Incident Tickets:**
+- "The system is down"
+- "Integration not working"
+- "Database connection failed"
+"""
+
+DATA_QUERIES_MD = """
+**Data Queries → Database Operations:**
+- "Find claim 1-ABCD"
+- "Update engine serial 12345"
+- "Missing warranty data"
+"""
+
+RESEARCH_QUERIES_MD = """
+**Research Queries → Knowledge Base:**
+- "What are transformers?"
+- "Compare algorithms"
+- "Recent AI research"
+"""
+
+INFO_REQUESTS_MD = """
+**Information Requests → Documentation:**
+- "How to upload claims?"
+- "Process documentation"
+- "Technical specifications"
+"""
+
+# Messages kept (and re-rendered on every rerun) in the chat view
+CHAT_HISTORY_SIZE = 50
+
+# A repeat of the last user message within this many seconds is treated as
+# an accidental double submit and dropped
+DUPLICATE_WINDOW = 2.0
+
+@st.cache_resource(show_spinner=False)
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """
+    One long-lived event loop on a daemon thread for every turn, so the cached
+    workflow's MCP sessions and Claude/HTTP connection pools, which are bound
+    to the loop that opened them, stay usable across turns. uvloop where
+    installed, without changing Streamlit's own loop policy.
+    """
+    loop = new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return loop
+
+async def _run_turn(workflow, prompt, user_id):
+    """Run one turn and swap queued ticket numbers for the real ones"""
+    async with asyncio.timeout(WORKFLOW_TIMEOUT):
+        result = await workflow.process_complete_workflow(prompt, user_id)
+        await workflow.flush_tickets()
+    return workflow.reconcile_ticket(result)
+
+class _UncachedResult(Exception):
+    """Carries a turn's result out of the cached function without caching it"""
+    
+    def __init__(self, result: dict):
+        super().__init__(result.get("workflow"))
+        self.result = result
+
+@st.cache_data(ttl=WORKFLOW_CACHE_TTL, show_spinner=False)
+def _cached_workflow(api_key: str, prompt: str, user_id: str) -> dict:
+    future = asyncio.run_coroutine_threadsafe(
+        _run_turn(get_workflow(api_key), prompt, user_id), get_event_loop()
+    )
+    result = future.result()
+    # st.cache_data doesn't store calls that raise
+    if result.get("success") is False or result.get("workflow") not in CACHEABLE_WORKFLOWS:
+        raise _UncachedResult(result)
+    return result
+
+def run_workflow(api_key: str, prompt: str, user_id: str) -> dict:
+    try:
+        return _cached_workflow(api_key, prompt, user_id)
+    except _UncachedResult as e:
+        return e.result
+
+def add_message(role: str, content: str, details: dict = None):
+    """Append to the bounded chat history; workflow details live in a side table by message id, as JSON bytes"""
+    history = st.session_state.chat_history
+    if len(history) == history.maxlen:
+        st.session_state.details.pop(history[0]["id"], None)
+    message = {"role": role, "content": content, "id": uuid4().hex, "t": time.monotonic()}
+    history.append(message)
+    if details is not None:
+        st.session_state.details[message["id"]] = json_dumps_bytes(details)
+
+def is_duplicate_submission(prompt: str) -> bool:
+    last = next((m for m in reversed(st.session_state.chat_history) if m["role"] == "user"), None)
+    return (last is not None and last["content"] == prompt
+            and time.monotonic() - last.get("t", 0) < DUPLICATE_WINDOW)
+
+# Streamlit 1.37+ has st.fragment, 1.33-1.36 st.experimental_fragment; older
+# versions just rerun the whole script
+fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda func: func)
+
+@fragment
+def server_status_panel():
+    """
+    Quick server status check. As a fragment, a click reruns only this panel
+    instead of the whole script, which would redraw the entire chat history.
+    """
+    if st.button("🔍 Check Servers"):
+        now = time.monotonic()
+        if now - st.session_state.get("last_health_click", 0.0) < HEALTH_CLICK_DEBOUNCE:
+            st.toast("Please wait…")
+        else:
+            st.session_state.last_health_click = now
+            for name, port, healthy in check_servers():
+                if healthy:
+                    st.success(f"✅ {name} Server ({port})")
+                else:
+                    st.error(f"❌ {name} Server ({port})")
+
+def intent_label(classification_result: dict) -> str:
+    """Display name of the classified intent, e.g. "Research Query"; "Unknown" if unclassified"""
+    classification = classification_result.get("classification")
+    value = getattr(getattr(classification, "intent", None), "value", None)
+    return value.replace("_", " ").title() if value else "Unknown"
+
+def handle_prompt(prompt: str, api_key: str, user_id: str):
+    """Run one chat turn and render the reply with its workflow summary"""
+    try:
+        load_workflow_class()
+    except ImportError as e:
+        st.error(f"❌ Cannot import complete workflow: {e}")
+        return
+    
+    if is_duplicate_submission(prompt):
+        st.toast("Duplicate message ignored")
+        return
+    
+    # Add user message
+    add_message("user", prompt)
+    
+    # Show user message
+    st.chat_message("user").write(prompt)
+    
+    # Process with complete workflow
+    with st.chat_message("assistant"):
+        with st.spinner("🎯 Analyzing and processing your request..."):
+            try:
+                try:
+                    result = run_workflow(api_key, prompt, user_id)
+                except TimeoutError:
+                    # Raised rather than returned so st.cache_data doesn't keep it
+                    result = {
+                        "message": TIMEOUT_MESSAGE,
+                        "success": False,
+                        "workflow": "timeout"
+                    }
+                
+                # Display the response
+                st.markdown(result["message"])
+                
+                # Show workflow summary
+                workflow_type = result.get("workflow", "unknown")
+                success_status = result.get("success", "N/A")
+                
+                col1, col2, col3 = st.columns(3)
+                
+                with col1:
+                    st.metric("Workflow", workflow_type.replace("_", " ").title())
+                
+                with col2:
+                    status_emoji = "✅" if success_status else "❌" if success_status is False else "❓"
+                    st.metric("Status", f"{status_emoji} {success_status}")
+                
+                with col3:
+                    st.metric("Intent", intent_label(result.get("classification_result", {})))
+                
+                # Add to chat history
+                add_message("assistant", result["message"], {
+                    "workflow": result.get("workflow"),
+                    "success": result.get("success"),
+                    "classification": result.get("classification_result", {}),
+                    "mcp_result": result.get("mcp_result", {}),
+                    "research_result": result.get("research_result", {})  # NEW
+                })
+                
+            except Exception as e:
+                error_message = f"❌ Error processing request: {str(e)}"
+                st.error(error_message)
+                
+                # Add error to history
+                add_message("assistant", error_message, {"error": str(e)})
 
 def main():
     st.set_page_config(
@@ -26,10 +356,6 @@ def main():
     st.title("🤖 Enterprise IT Support & Research Chatbot")
     st.markdown("**Complete Workflow: Intent Classification + MCP Integration + Research**")
     
-    if not WORKFLOW_AVAILABLE:
-        st.error("❌ Complete workflow not available. Check imports.")
-        return
-    
     # Sidebar configuration
     with st.sidebar:
         st.header("⚙️ Configuration")
@@ -50,43 +376,7 @@ def main():
         st.markdown("---")
         st.markdown("**Server Status**")
         
-        # Quick server status check
-        if st.button("🔍 Check Servers"):
-            try:
-                import requests
-                
-                # Check ServiceNow server
-                try:
-                    response = requests.get("http://localhost:8082/health", timeout=3)
-                    if response.status_code == 200:
-                        st.success("✅ ServiceNow Server (8082)")
-                    else:
-                        st.error("❌ ServiceNow Server (8082)")
-                except:
-                    st.error("❌ ServiceNow Server (8082)")
-                
-                # Check Database server
-                try:
-                    response = requests.get("http://localhost:8083/health", timeout=3)
-                    if response.status_code == 200:
-                        st.success("✅ Database Server (8083)")
-                    else:
-                        st.error("❌ Database Server (8083)")
-                except:
-                    st.error("❌ Database Server (8083)")
-                
-                # NEW: Check Research server
-                try:
-                    response = requests.get("http://localhost:8084/health", timeout=3)
-                    if response.status_code == 200:
-                        st.success("✅ Research Server (8084)")
-                    else:
-                        st.error("❌ Research Server (8084)")
-                except:
-                    st.error("❌ Research Server (8084)")
-                    
-            except ImportError:
-                st.warning("Install requests: pip install requests")
+        server_status_panel()
     
     # Main chat interface
     if not claude_api_key:
@@ -94,8 +384,8 @@ def main():
         return
     
     # Initialize session state
-    if "chat_history" not in st.session_state:
-        st.session_state.chat_history = []
+    st.session_state.setdefault("chat_history", deque(maxlen=CHAT_HISTORY_SIZE))
+    st.session_state.setdefault("details", {})
     
     # Chat interface
     st.header("💬 Chat Interface")
@@ -108,204 +398,48 @@ def main():
             st.chat_message("assistant").markdown(message["content"])
             
             # Show workflow details in expander
-            if "workflow_details" in message:
+            details = st.session_state.details.get(message["id"])
+            if details is not None:
                 with st.expander("🔍 Workflow Details"):
-                    st.json(message["workflow_details"])
+                    st.json(json_loads(details))
     
     # Chat input
     if prompt := st.chat_input("Type your message here..."):
-        # Add user message
-        st.session_state.chat_history.append({
-            "role": "user",
-            "content": prompt
-        })
-        
-        # Show user message
-        st.chat_message("user").write(prompt)
-        
-        # Process with complete workflow
-        with st.chat_message("assistant"):
-            with st.spinner("🎯 Analyzing and processing your request..."):
-                try:
-                    # Initialize complete workflow
-                    workflow = CompleteChatbotWorkflow(claude_api_key)
-                    
-                    # Process the complete workflow
-                    result = asyncio.run(workflow.process_complete_workflow(prompt, user_id))
-                    
-                    # Display the response
-                    st.markdown(result["message"])
-                    
-                    # Show workflow summary
-                    workflow_type = result.get("workflow", "unknown")
-                    success_status = result.get("success", "N/A")
-                    
-                    col1, col2, col3 = st.columns(3)
-                    
-                    with col1:
-                        st.metric("Workflow", workflow_type.replace("_", " ").title())
-                    
-                    with col2:
-                        status_emoji = "✅" if success_status else "❌" if success_status is False else "❓"
-                        st.metric("Status", f"{status_emoji} {success_status}")
-                    
-                    with col3:
-                        intent = result.get("classification_result", {}).get("classification", {})
-                        if hasattr(intent, 'intent'):
-                            st.metric("Intent", intent.intent.value.replace("_", " ").title())
-                        else:
-                            st.metric("Intent", "Unknown")
-                    
-                    # Add to chat history
-                    st.session_state.chat_history.append({
-                        "role": "assistant",
-                        "content": result["message"],
-                        "workflow_details": {
-                            "workflow": result.get("workflow"),
-                            "success": result.get("success"),
-                            "classification": result.get("classification_result", {}),
-                            "mcp_result": result.get("mcp_result", {}),
-                            "research_result": result.get("research_result", {})  # NEW
-                        }
-                    })
-                    
-                except Exception as e:
-                    error_message = f"❌ Error processing request: {str(e)}"
-                    st.error(error_message)
-                    
-                    # Add error to history
-                    st.session_state.chat_history.append({
-                        "role": "assistant",
-                        "content": error_message,
-                        "workflow_details": {"error": str(e)}
-                    })
+        handle_prompt(prompt, claude_api_key, user_id)
     
     # Example buttons
     st.markdown("---")
     st.markdown("**💡 Try These Examples:**")
     
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        if st.button("🚨 System Issue", use_container_width=True):
-            st.session_state.example_query = "The downstream integration to Warranty system is not working"
-            st.rerun()
-    
-    with col2:
-        if st.button("🔍 Missing Claim", use_container_width=True):
-            st.session_state.example_query = "I am missing Brazil claim number '1-ABCD' in the Claims report"
-            st.rerun()
-    
-    with col3:
-        if st.button("🔧 Engine Update", use_container_width=True):
-            st.session_state.example_query = "I need help updating the Engine with Serial number '12345678' model name from 'X10' to 'X15'"
-            st.rerun()
-    
-    with col4:  # NEW
-        if st.button("📊 Research Query", use_container_width=True):
-            st.session_state.example_query = "What are transformer models in machine learning?"
-            st.rerun()
-    
-    # Second row of examples for research
-    col5, col6, col7, col8 = st.columns(4)
-    
-    with col5:  # NEW
-        if st.button("🧠 AI Comparison", use_container_width=True):
-            st.session_state.example_query = "Compare LSTM and transformer architectures for NLP tasks"
-            st.rerun()
-    
-    with col6:  # NEW
-        if st.button("📈 Research Analysis", use_container_width=True):
-            st.session_state.example_query = "Analyze recent advances in neural machine translation"
-            st.rerun()
-    
-    with col7:  # NEW
-        if st.button("🔬 Algorithm Study", use_container_width=True):
-            st.session_state.example_query = "Find papers on attention mechanisms in deep learning"
-            st.rerun()
-    
-    with col8:
-        if st.button("📚 Process Info", use_container_width=True):
-            st.session_state.example_query = "Can I get more information on how the Brazil claims are uploaded to reliability system?"
-            st.rerun()
-    
-    # Handle example query
-    if hasattr(st.session_state, 'example_query'):
-        st.info(f"Example selected: {st.session_state.example_query}")
-        if st.button("▶️ Send Example Query"):
-            # Add the example as if user typed it
-            st.session_state.chat_history.append({
-                "role": "user", 
-                "content": st.session_state.example_query
-            })
-            delattr(st.session_state, 'example_query')
-            st.rerun()
+    # Two rows of four example buttons
+    for row in range(0, len(EXAMPLES), 4):
+        for i, ((label, query), col) in enumerate(zip(EXAMPLES[row:row + 4], st.columns(4)), start=row):
+            if col.button(label, use_container_width=True, key=f"example_{i}"):
+                # Send the example as if the user typed it; one rerun then
+                # redraws the history with the new turn in place
+                handle_prompt(query, claude_api_key, user_id)
+                st.rerun()
     
     # NEW: Research-specific section
     st.markdown("---")
     st.markdown("**🔬 Research Capabilities**")
     
     with st.expander("📊 Research Features", expanded=False):
-        st.markdown("""
-        **What you can ask about:**
-        
-        **🤖 Machine Learning & AI:**
-        - "What are transformer models?"
-        - "Compare different neural network architectures"
-        - "Explain attention mechanisms in deep learning"
-        - "What are the latest advances in computer vision?"
-        
-        **📝 Natural Language Processing:**
-        - "Compare LSTM vs transformer for NLP"
-        - "How does BERT work?"
-        - "Recent advances in neural machine translation"
-        
-        **🔍 Research Analysis:**
-        - "Find relationships between concept A and concept B"
-        - "Analyze the evolution of reinforcement learning"
-        - "What are the current challenges in AI safety?"
-        
-        **📊 Technical Deep Dives:**
-        - "Explain backpropagation algorithm"
-        - "Compare different optimization techniques"
-        - "What is federated learning?"
-        
-        The system uses multi-hop reasoning and knowledge graphs to provide comprehensive research insights!
-        """)
+        st.markdown(RESEARCH_FEATURES_MD)
         
         st.markdown("**🎯 Intent Detection Examples:**")
         
         col1, col2 = st.columns(2)
         
         with col1:
-            st.markdown("""
-            **System Issues → Incident Tickets:**
-            - "The system is down"
-            - "Integration not working"
-            - "Database connection failed"
-            """)
+            st.markdown(SYSTEM_ISSUES_MD)
             
-            st.markdown("""
-            **Data Queries → Database Operations:**
-            - "Find claim 1-ABCD"
-            - "Update engine serial 12345"
-            - "Missing warranty data"
-            """)
+            st.markdown(DATA_QUERIES_MD)
         
         with col2:
-            st.markdown("""
-            **Research Queries → Knowledge Base:**
-            - "What are transformers?"
-            - "Compare algorithms"
-            - "Recent AI research"
-            """)
+            st.markdown(RESEARCH_QUERIES_MD)
             
-            st.markdown("""
-            **Information Requests → Documentation:**
-            - "How to upload claims?"
-            - "Process documentation"
-            - "Technical specifications"
-            """)
+            st.markdown(INFO_REQUESTS_MD)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file